@@ -3,9 +3,11 @@ import sys, os
 thisdir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0,  os.path.join(thisdir, 'pycparser'))
 
-from pycparser import parse_file
+import pycparser
+from pycparser import preprocess_file, c_parser, c_ast
 
-from . import cfg_ast_visitor, cfg_wcec
+from . import cfg_ast_visitor, cfg_wcec, cfg_cache, cfg_arrays, cfg_parallel
+from . import cfg_call_graph, graphml2cfg, cfg_snapshot
 
 
 class CFG(object):
@@ -16,22 +18,50 @@ class CFG(object):
 
         Args:
             filename (string): C file name
+            cache_dir (string): directory to keep parsed ASTs and assembler
+                tables between runs. If no directory is given, the C file is
+                always parsed and compiled.
+            loop_bounds (dic or string): maximum number of iterations of
+                loops, {loop condition line: iterations}, or the name of a
+                file where each line is '<loop condition line> <iterations>'.
+                They take precedence over '// @LOOP <number>' tags.
+            asm_file (string): assembler code already made from the C file,
+                either gcc '-g -S' output or 'objdump -dl' output. If it is
+                given, the armv4t compiler does not run at all.
 
         Attributes:
             filename (string): C file name
             ast (pycparser/c_ast): Abstract Syntax Tree
             entry_nodes (CFGEntryNode): list of all functions presented in AST
+            cache (CFGCache): on-disk cache or None if it is disabled
+            loop_bounds (dic or string): loop bounds given by the user
+            asm_file (string): assembler code file given by the user
+            cfg_wcec (CFGWCEC): WCEC analysis started by make_cfg(), whose
+                assembler code is made while the C file is parsed
     """
+    CPP_PATH = 'gcc'
+    CPP_ARGS = ['-E']
 
-    def __init__(self, filename):
+    def __init__(self, filename, cache_dir=None, loop_bounds=None,
+            asm_file=None):
         """ Initialize attributes
 
             Args:
                 filename (string): C file name
+                cache_dir (string): directory to keep parsed ASTs and
+                    assembler tables between runs
+                loop_bounds (dic or string): loop bounds or loop bounds file
+                asm_file (string): gcc '-S' or 'objdump -dl' output file
         """
         self._filename = filename
+        self._loop_bounds = loop_bounds
+        self._asm_file = asm_file
+        self._cfg_wcec = None
         self._ast = None
         self._entry_nodes = []
+        self._cache = None
+        if cache_dir is not None:
+            self._cache = cfg_cache.CFGCache(cache_dir)
 
     def get_entry_nodes(self):
         """ Returns:
@@ -45,43 +75,240 @@ class CFG(object):
         """
         return self._filename
 
+    def get_cache(self):
+        """ Returns:
+                On-disk cache (CFGCache) or None if it is disabled
+        """
+        return self._cache
+
     def get_ast(self):
         """ Returns:
                 Abstract syntax tree as pycparser/c_ast object
         """
         return self._ast
 
-    def make_cfg(self):
+    def make_cfg(self, release_ast=False, jobs=1, incremental=False,
+            roots=None):
         """ Parser the source code using pycparser to generate the AST, then
             explore the AST to generate the CFG. After that, WCEC and RWCEC are
-            computed.
+            computed. The assembler code needed by WCEC is made in background
+            while the C file is parsed, since both only need the C file.
+
+            If more than one job is given, functions are analyzed by a pool of
+            processes. See CFGParallel.
+
+            In incremental mode, each function is kept in the cache, so when
+            the C file changes only the functions that were edited are made
+            again. Their callers have only their RWCEC computed again.
+
+            If roots are given, only these functions and the functions they
+            call, directly or not, are made. Other functions are not in the
+            CFG at all, so they have no WCEC and no .graphml nodes.
+
+            Args:
+                release_ast (boolean): true if the AST should be dropped once
+                    the CFG is done. See compact().
+                jobs (int): number of processes to analyze functions. If it
+                    is None, use one process per CPU.
+                incremental (boolean): true if functions that did not change
+                    should be taken from the cache
+                roots (list): names of functions to be made with all
+                    functions they call. If it is None, all functions are
+                    made.
 
             Returns:
                 list of all functions parsed by the AST
+
+            Raises:
+                RuntimeError: if incremental mode is asked without a cache or
+                    a root is not defined
+        """
+        if incremental and self._cache is None:
+            raise RuntimeError('Incremental mode needs a cache directory')
+
+        # preprocess only once for both the parser and the assembler cache
+        text = self._preprocess_file()
+        # run armv4t compiler in background
+        wcec = self._cfg_wcec = self._make_cfg_wcec()
+        wcec.set_cpp_text(text)
+        wcec.start_asm()
+        try:
+            # run pycparser
+            self._ast = self._parse_file(text)
+            ast = self._ast
+            if roots is not None:
+                ast = self._select_funcdefs(ast, roots)
+            if jobs != 1 or incremental:
+                # explore AST, make CFG and compute WCEC of each function apart
+                cache = self._cache if incremental else None
+                parallel = cfg_parallel.CFGParallel(jobs, release_ast, cache)
+                self._cfg_wcec = None
+                self._entry_nodes = parallel.make_cfg(ast, wcec)
+            else:
+                # explore AST and make CFG
+                ast_visitor = cfg_ast_visitor.CFGAstVisitor()
+                self._entry_nodes = ast_visitor.make_cfg_from_ast(ast)
+                self._compute_wcec_rwcec()
+        finally:
+            # the compiler is not left running if anything above fails
+            self._cfg_wcec = None
+            wcec.stop_asm()
+        if release_ast:
+            self.compact()
+        return self._entry_nodes
+
+    def load_graphml(self, filename):
+        """ Load the CFG of the C file from a .graphml file written by
+            CFG2Graphml instead of making it, so the C file is neither parsed
+            nor compiled. Nodes do not have AST elements.
+
+            Args:
+                filename (string): .graphml file name
+
+            Returns:
+                list of all functions read from the .graphml
+        """
+        self._ast = None
+        self._entry_nodes = graphml2cfg.Graphml2CFG().load_graphml(filename)
+        return self._entry_nodes
+
+    def save(self, filename):
+        """ Write a binary snapshot of all functions with their WCEC and
+            RWCEC. See CFGSnapshot.
+
+            Args:
+                filename (string): snapshot file name
+        """
+        cfg_snapshot.CFGSnapshot().save(self, filename)
+
+    def load(self, filename):
+        """ Load the CFG of the C file from a snapshot written by save()
+            instead of making it. The snapshot is mapped in memory and nodes
+            of a function are made only when the function is explored, so
+            opening a snapshot takes time only for its function names.
+
+            Args:
+                filename (string): snapshot file name
+
+            Returns:
+                list of all functions read from the snapshot
+
+            Raises:
+                RuntimeError: if the file is not a snapshot of this version
         """
-        # run pycparser
-        self._ast = parse_file(self._filename, use_cpp=True,
-                                cpp_path='gcc',
-                                cpp_args=['-E'])
-        # explore AST and make CFG
-        ast_visitor = cfg_ast_visitor.CFGAstVisitor()
-        self._entry_nodes = ast_visitor.make_cfg_from_ast(self._ast)
-        self._compute_wcec_rwcec()
+        self._ast = None
+        self._entry_nodes = cfg_snapshot.CFGSnapshot().load(filename)
         return self._entry_nodes
 
+    def _select_funcdefs(self, ast, roots):
+        """ Drop function definitions that can not be reached from roots, so
+            they are not visited at all. Functions called only inside the
+            arguments of another call are not reached, since they have no
+            CALL node.
+
+            Args:
+                ast (pycparser/c_ast): Abstract Syntax Tree
+                roots (list): names of functions where calls start
+
+            Returns:
+                pycparser/c_ast/FileAST with the same declarations and only
+                the reachable function definitions
+
+            Raises:
+                RuntimeError: if a root is not defined
+        """
+        funcdefs = [ext for ext in ast.ext if isinstance(ext, c_ast.FuncDef)]
+        call_graph = cfg_call_graph.CFGCallGraph()
+        call_graph.add_funcdefs(funcdefs)
+        reachable = set(call_graph.get_reachable(roots))
+
+        ext = [e for e in ast.ext if not isinstance(e, c_ast.FuncDef)
+                or e.decl.name in reachable]
+        return c_ast.FileAST(ext, ast.coord)
+
+    def compact(self):
+        """ Drop the AST and all AST elements kept by nodes. Nodes keep only
+            their type, lines, WCEC and RWCEC, so memory depends on the graph
+            size and not on the source size anymore.
+        """
+        for entry in self._entry_nodes:
+            for n in entry.get_order().get_preorder():
+                n.release_ast()
+        self._ast = None
+
+    def to_arrays(self):
+        """ Export nodes, edges and reference nodes of all functions as NumPy
+            arrays, so whole program queries do not need to walk the graph.
+            See CFGArrays.to_arrays() for the arrays layout.
+
+            Returns:
+                Dic of NumPy arrays
+        """
+        return cfg_arrays.CFGArrays().to_arrays(self)
+
+    def _preprocess_file(self):
+        """ Returns:
+                Preprocessed C file (string)
+        """
+        # the compiler may be starting in background, see CFGWCEC.start_asm()
+        with cfg_wcec.PROCESS_LOCK:
+            return preprocess_file(self._filename, cpp_path=self.CPP_PATH,
+                                    cpp_args=self.CPP_ARGS)
+
+    def _parse_file(self, text=None):
+        """ Run pycparser on the C file. If cache is enabled, the file is
+            only preprocessed and its AST is looked up by the hash of the
+            preprocessed text, cpp arguments and pycparser version, so the
+            parser runs only when the translation unit has changed.
+
+            Args:
+                text (string): C file already preprocessed. If it is None,
+                    the C file is preprocessed now.
+
+            Returns:
+                Abstract syntax tree as pycparser/c_ast object
+        """
+        if text is None:
+            text = self._preprocess_file()
+        if self._cache is None:
+            return c_parser.CParser().parse(text, self._filename)
+
+        key = self._cache.make_key(text, pycparser.__version__,
+                self.CPP_PATH, *self.CPP_ARGS)
+        ast = self._cache.get('ast', key)
+        if ast is None:
+            ast = c_parser.CParser().parse(text, self._filename)
+            self._cache.put('ast', key, ast)
+        return ast
+
+    def _make_cfg_wcec(self):
+        """ Returns:
+                WCEC analysis of this CFG (CFGWCEC)
+        """
+        return cfg_wcec.CFGWCEC(self._filename, self, self._cache,
+                self._loop_bounds, self._asm_file)
+
     def _compute_wcec_rwcec(self):
-        """ Compute WCEC and RWCEC of the given CFG.
+        """ Compute WCEC and RWCEC of the given CFG. If make_cfg() already
+            started the WCEC analysis, wait for its assembler code.
         """
-        wcec = cfg_wcec.CFGWCEC(self._filename, self)
+        wcec = self._cfg_wcec
+        if wcec is None:
+            wcec = self._make_cfg_wcec()
+        self._cfg_wcec = None
         wcec.compute_cfg_wcec()
 
-    def show(self, buf=sys.stdout):
+    def show(self, buf=sys.stdout, dump=False):
         """ Display in standard output if no parameter is given all CFG's
             nodes, each one children and their start line,
 
             Args:
                 buf (file): file object to write CFG. If no file is provided,
                     then writes in standard output.
+                dump (boolean): true if each node should be written only once
+                    with references to its children by node id. It takes
+                    linear time, whereas the indented tree repeats every
+                    subtree shared by if-else branches.
         """
         for entry_point in self.get_entry_nodes():
-            entry_point.show(buf=buf)
+            entry_point.show(buf=buf, dump=dump)
@@ -1,25 +1,57 @@
 import sys
 
-from xml.etree import ElementTree as ET
-from xml.dom import minidom
-
 from cfg_nodes import CFGNodeType
 from cfg_nodes import CFGEntryNode
 from cfg_nodes import CFGNode
+from cfg_export import CFGExporter
 from cfg import CFG
 
 
-class CFG2Graphml(object):
-    """ Write CFG to a .graphml file.
+class CFG2Graphml(CFGExporter):
+    """ Write CFG to a .graphml file. Tags are written to the file while the
+        graph is explored, see CFGXMLWriter, so the document is never kept in
+        memory. A file name ending with '.graphmlz' is written through gzip.
+
+        A hierarchical .graphml keeps each function in its own subgraph,
+        which belongs to a summary node of the function. Likewise, each loop,
+        i.e. its PSEUDO node, loop condition and loop body, is kept in a
+        subgraph of a loop summary node inside the subgraph where the loop
+        is. So, functions and loops can be collapsed in yEd. Summary nodes
+        have node type 'function' or 'loop':
+
+            function: WCEC and RWCEC are the RWCEC of its first node, i.e.
+                the worst execution of the function
+            loop: WCEC is the worst execution of the loop and RWCEC is the
+                RWCEC of its PSEUDO node, iterations are the loop bound
+
+        Edges between function summary nodes are the calls, labeled with the
+        RWCEC of the called function. A summary .graphml has only summary
+        nodes and calls.
 
         Attributes:
             _yed_output (boolean): true if graphical information should be
                 presented in the .graphml
+            _pretty (boolean): true if each tag should be written in its own
+                line and indented
+            _hierarchical (boolean): true if functions and loops should be
+                written in subgraphs of summary nodes
+            _summary_only (boolean): true if only summary nodes and calls
+                should be written
+            _writer (CFGXMLWriter): .graphml writer of the current file
+            _func_ids (dic): {CFGEntryNode: function id} of all functions
+            _calls (list): tuples (caller id, called function id, RWCEC of
+                the called function) of all calls written so far
+            _order (CFGOrder): traversal order of the current function
+            _loop_lines (dic): {PSEUDO node: last line of its loop}
+            _open_loops (list): PSEUDO nodes of the loop subgraphs which are
+                not closed yet, from the outermost
             _yed_keys (dic): keeps nodes and edges graphical tags to .graphml
             _node_keys (dic): keeps nodes keys information to write in .graphml
     """
+    COMPRESSED_SUFFIXES = ('.gz', '.graphmlz')
 
-    def make_graphml(self, cfg, file_name='', yed_output=False):
+    def make_graphml(self, cfg, file_name='', yed_output=False, pretty=True,
+            hierarchical=False, summary_only=False):
         """ Write .graphml file.
 
             Args:
@@ -27,195 +59,345 @@ class CFG2Graphml(object):
                 file_name (string): file that the CFG should be written to
                 yed_output (boolean): true if graphical information should be
                     presented in the .graphml
+                pretty (boolean): true if each tag should be written in its
+                    own line and indented
+                hierarchical (boolean): true if functions and loops should be
+                    written in subgraphs of summary nodes
+                summary_only (boolean): true if only summary nodes and calls
+                    should be written. It implies hierarchical.
         """
         self._yed_output = yed_output
+        self._pretty = pretty
+        self._hierarchical = hierarchical or summary_only
+        self._summary_only = summary_only
+        self.export(cfg, file_name)
+
+    def _start(self, buf, cfg):
+        """ Write root tag, keys and graph tag.
+
+            Note: 'parse.nodes' and 'parse.edges' are the number of nodes and
+            edges of the last function, so they are known before any node is
+            written.
+        """
+        self._writer = CFGXMLWriter(buf, self._pretty)
+        self._start_graphml(self._writer)
+        self._define_header(self._writer)
+        if not isinstance(cfg, CFG): return
 
-        root = self._start_graphml()
-        self._define_header(root)
-        self._write_graph(root, cfg)
-        self._save_graphml(file_name, root)
+        if self._hierarchical:
+            self._func_ids = dict((entry, fid) for fid, entry in
+                    enumerate(cfg.get_entry_nodes(), 1))
+            self._calls = []
+            self._writer.start('graph', {
+                'id': 'graph',
+                'edgedefault': 'directed'
+            })
+            return
+
+        nodes = 0
+        edges = 0
+        for entry in cfg.get_entry_nodes():
+            if isinstance(entry, CFGEntryNode):
+                order = entry.get_order()
+                nodes = len(order.get_preorder())
+                edges = len(order.get_edges())
+
+        self._writer.start('graph', {
+            'id': 'graph',
+            'parse.nodes': str(nodes),
+            'parse.edges': str(edges),
+            'parse.order': 'free',
+            'edgedefault': 'directed'
+        })
+
+    def _end(self, buf, cfg):
+        """ Write calls of a hierarchical .graphml, then close graph and root
+            tags.
+        """
+        if isinstance(cfg, CFG):
+            if self._hierarchical:
+                for cid, (fid, callee_fid, rwcec) in enumerate(self._calls):
+                    self._write_edge(buf, 'c%d' % cid, 'g%d' % fid,
+                            'g%d' % callee_fid, rwcec)
+            self._writer.end('graph')
+        self._writer.end('graphml')
+        self._writer = None
+
+    def _start_func(self, buf, fid, entry):
+        """ Open the function summary node and its subgraph, and keep the
+            calls of the function.
+        """
+        if not self._hierarchical: return
+
+        self._order = entry.get_order()
+        self._loop_lines = {}
+        self._open_loops = []
+
+        preorder = self._order.get_preorder()
+        loops = self._order.get_loops()
+        last_line = 0
+        callees = set()
+        for n in preorder:
+            last_line = max(last_line, n.get_last_line())
+            loop = self._get_loop(n, loops)
+            while loop is not None:
+                self._loop_lines[loop] = max(self._loop_lines.get(loop, 0),
+                        n.get_last_line())
+                loop = loops[loop]
+
+            callee = n.get_refnode()
+            if (n.get_type() == CFGNodeType.CALL and callee in self._func_ids
+                    and callee not in callees):
+                callees.add(callee)
+                rwcec = 0
+                if isinstance(callee.get_func_first_node(), CFGNode):
+                    rwcec = callee.get_func_first_node().get_rwcec()
+                self._calls.append((fid, self._func_ids[callee], rwcec))
+
+        rwcec = 0
+        start_line = 0
+        if preorder != []:
+            rwcec = preorder[0].get_rwcec()
+            start_line = preorder[0].get_start_line()
+        self._start_summary('g%d' % fid, entry.get_func_name(), {
+            'node_type': 'function',
+            'start_line': start_line,
+            'last_line': last_line,
+            'function_owner': entry.get_func_name(),
+            'wcec': rwcec,
+            'rwcec': rwcec
+        })
+
+    def _end_func(self, buf, fid, entry):
+        """ Close loop subgraphs left open, then the function summary node.
+        """
+        if not self._hierarchical: return
 
-    def _save_graphml(self, filename, root):
-        """ Write CFG in a file. However, if no filename exists, display
-            graphml in standard output.
+        self._close_loops(0)
+        self._end_summary()
+        self._order = None
+
+    def _get_loop(self, n, loops):
+        """ Args:
+                n (CFGNode): control flow graph node
+                loops (dic): see CFGOrder.get_loops()
+
+            Returns:
+                PSEUDO node of the innermost loop that n belongs to or None.
+                A PSEUDO node belongs to its own loop.
+        """
+        if (n.get_type() == CFGNodeType.PSEUDO
+                and isinstance(n.get_refnode(), CFGNode)):
+            return n
+        return loops[n]
+
+    def _enter_loops(self, fid, n):
+        """ Open the subgraphs of all loops that n belongs to and close the
+            others. Nodes of a loop come one after another in preorder, from
+            its PSEUDO node, so each loop subgraph is opened only once.
 
             Args:
-                filename (string): file name to write CFG
-                root (ElementTree.Element): root tag of graphml
+                fid (int): function id
+                n (CFGNode): node about to be written
+        """
+        loops = self._order.get_loops()
+        chain = []
+        loop = self._get_loop(n, loops)
+        while loop is not None:
+            chain.append(loop)
+            loop = loops[loop]
+        chain.reverse()
+
+        depth = 0
+        while (depth < len(self._open_loops) and depth < len(chain)
+                and self._open_loops[depth] == chain[depth]):
+            depth += 1
+        self._close_loops(depth)
+
+        node_ids = self._order.get_node_ids()
+        for pseudo in chain[depth:]:
+            loop_cond = pseudo.get_refnode()
+            exit_rwcec = max([c.get_rwcec() for c in pseudo.get_children()]
+                    or [0])
+            self._start_summary('g%dl%d' % (fid, node_ids[pseudo]),
+                    'loop %d' % loop_cond.get_start_line(), {
+                'node_type': 'loop',
+                'start_line': loop_cond.get_start_line(),
+                'last_line': self._loop_lines[pseudo],
+                'function_owner': loop_cond.get_func_owner(),
+                'iterations': loop_cond.get_loop_iters(),
+                'wcec': pseudo.get_rwcec() - exit_rwcec,
+                'rwcec': pseudo.get_rwcec()
+            })
+            self._open_loops.append(pseudo)
+
+    def _close_loops(self, depth):
+        """ Close loop subgraphs until only depth of them are open.
         """
-        try:
-            with open(filename, 'w') as f:
-                f.write(self._pretty_print(root))
-        except IOError:
-            sys.stdout.write(self._pretty_print(root))
+        while len(self._open_loops) > depth:
+            self._open_loops.pop()
+            self._end_summary()
 
-    def _pretty_print(self, root):
-        """ Just make a pretty write using indentation.
+    def _start_summary(self, summary_id, label, values):
+        """ Open a summary node and its subgraph.
 
             Args:
-                root (ElementTree.Element): root tag of graphml
+                summary_id (string): graphml id of the summary node
+                label (string): label of the node in yEd
+                values (dic): {key name: value} of the node, other keys have
+                    their default values
         """
-        rough_string = ET.tostring(root)
-        reparsed = minidom.parseString(rough_string)
-        return reparsed.toprettyxml(indent='  ', encoding='UTF-8')
+        writer = self._writer
+
+        attrs = {'id': summary_id}
+        if self._yed_output:
+            attrs['yfiles.foldertype'] = 'group'
+        writer.start('node', attrs)
+
+        for key in self._node_keys:
+            text = key['default']
+            if key['attr.name'] in values:
+                text = str(values[key['attr.name']]).lower()
+            writer.element('data', {'key': key['id']}, text)
+
+        if self._yed_output:
+            self._write_summary_yed(writer, label, values['wcec'])
+
+        writer.start('graph', {
+            'id': summary_id + ':',
+            'edgedefault': 'directed'
+        })
 
-    def _start_graphml(self):
+    def _end_summary(self):
+        """ Close the last summary node and its subgraph.
+        """
+        self._writer.end('graph')
+        self._writer.end('node')
+
+    def _write_summary_yed(self, writer, label, wcec):
+        """ Define summary node shape for graphical view
+
+            Args:
+                writer (CFGXMLWriter): .graphml writer
+                label (string): function name or loop line
+                wcec (int): WCEC of the summary node
+        """
+        for key in self._yed_keys:
+            if key['for'] == 'node':
+                break
+
+        if key == {} or key['for'] != 'node': return
+
+        writer.start('data', {'key': key['id']})
+        writer.start('y:ShapeNode')
+        writer.element('y:Shape', {'type': 'roundrectangle'})
+        writer.element('y:Fill', {'color': '#F5F5F5'})
+        writer.element('y:NodeLabel',
+                {'modelName': 'internal', 'modelPosition': 't'},
+                '%s W.%d' % (label, wcec))
+        writer.end('y:ShapeNode')
+        writer.end('data')
+
+    def _start_graphml(self, writer):
         """ Start .graphml by seting 'graphml' as root tag
 
-            Returns:
-                root (ElementTree.Element) tag of graphml
+            Args:
+                writer (CFGXMLWriter): .graphml writer
         """
-        root = ET.Element('graphml')
-        root.set('xmlns', 'http://graphml.graphdrawing.org/xmlns')
-        root.set('xmlns:xsi', 'http://www.w3.org/2001/XMLSchema-instance')
+        attrs = {
+            'xmlns': 'http://graphml.graphdrawing.org/xmlns',
+            'xmlns:xsi': 'http://www.w3.org/2001/XMLSchema-instance'
+        }
 
         if self._yed_output:
-            root.set('xmlns:y', 'http://www.yworks.com/xml/graphml')
-            root.set('xsi:schemaLocation',
-                    'http://graphml.graphdrawing.org/xmlns'
+            attrs['xmlns:y'] = 'http://www.yworks.com/xml/graphml'
+            attrs['xsi:schemaLocation'] = ('http://graphml.graphdrawing.org/xmlns'
                     + ' http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd'
                     + ' http://www.yworks.com/xml/schema/graphml/1.0/ygraphml.xsd')
         else:
-            root.set('xsi:schemaLocation',
-                    'http://graphml.graphdrawing.org/xmlns'
+            attrs['xsi:schemaLocation'] = ('http://graphml.graphdrawing.org/xmlns'
                     + ' http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd')
 
-        return root
+        writer.start_document()
+        writer.start('graphml', attrs)
 
-    def _define_header(self, root):
+    def _define_header(self, writer):
         """ Define .graphml headers according to graphical information and node
             keys.
 
             Args:
-                root (ElementTree.Element): root tag of graphml
+                writer (CFGXMLWriter): .graphml writer
         """
-        self._define_yed_keys(root)
-        self._define_node_keys(root)
+        self._define_yed_keys(writer)
+        self._define_node_keys(writer)
 
-    def _define_yed_keys(self, root):
+    def _define_yed_keys(self, writer):
         """ Define header tags for graphical view
 
             Args:
-                root (ElementTree.Element): root tag of graphml
+                writer (CFGXMLWriter): .graphml writer
         """
         if not self._yed_output: return
 
         for key in self._yed_keys:
-            xml_key = ET.SubElement(root, 'key')
-            for attr, v in key.iteritems():
-                xml_key.set(attr, v)
+            writer.element('key', key)
 
-    def _define_node_keys(self, root):
+    def _define_node_keys(self, writer):
         """ Define keys that each node tag must have
 
             Args:
-                root (ElementTree.Element): root tag of graphml
+                writer (CFGXMLWriter): .graphml writer
         """
         for key in self._node_keys:
-            xml_key = ET.SubElement(root, 'key')
-            for attr, v in key.iteritems():
-                if attr == 'default':
-                    xml_default = ET.SubElement(xml_key, 'default')
-                    xml_default.text = v
-                elif attr != 'get_data':
-                    xml_key.set(attr, v)
-
-    def _write_graph(self, root, cfg):
-        """ Write graph tag and add CFG nodes and edges by exploring the graph
-
-            Args:
-                root (ElementTree.Element): root tag of graphml
-                cfg (CFG): control flow graph
-        """
-        if not isinstance(cfg, CFG): return
-
-        xml_graph = ET.SubElement(root, 'graph')
-        edges = 0
-        func_id = 0
-        for entry in cfg.get_entry_nodes():
-            func_id += 1
-            if isinstance(entry, CFGEntryNode):
-                # write nodes
-                visited_nodes = {}
-                self._write_node(xml_graph, entry.get_func_name(), func_id,
-                        entry.get_func_first_node(), 0, visited_nodes)
-
-                # write edges
-                edges = self._write_edge(xml_graph, func_id,
-                            entry.get_func_first_node(), 0, 0, {})
-
-        xml_graph.set('id', 'graph')
-        xml_graph.set('parse.nodes', str(len(visited_nodes)))
-        xml_graph.set('parse.edges', str(edges))
-        xml_graph.set('parse.order', 'free')
-        xml_graph.set('edgedefault', 'directed')
-
-    def _write_node(self, xml_graph, func_name, fid, n, nid, visited):
-        """ Explore each node to write its attributes to graphml file.
+            attrs = dict((attr, v) for attr, v in key.iteritems()
+                    if attr != 'default' and attr != 'get_data')
+            writer.start('key', attrs)
+            if 'default' in key:
+                writer.element('default', text=key['default'])
+            writer.end('key')
+
+    def _write_node(self, buf, fid, nid, n, node_id):
+        """ Write node attributes to graphml file.
 
             Args:
-                xml_graph (ElementTree.SubElement): graph tag of .graphml
-                func_name (string): function name that node belongs to
+                buf (file): file object of the .graphml
                 fid (int): function id
-                n (CFGNode): control flow graph node
                 nid (int): node id of the given function
-                visited (dic): keeps information of all visited nodes
+                n (CFGNode): control flow graph node
+                node_id (string): graphml id of the node
         """
-        if not isinstance(n, CFGNode): return
+        if self._hierarchical:
+            self._enter_loops(fid, n)
+            if self._summary_only: return
 
-        # node is visited
-        visited[n] = 'g%sn%s' % (fid, nid)
+        writer = self._writer
 
-        # write node xml data
-        self._write_node_xml(xml_graph, fid, n, nid, visited)
-
-        # explore loop if current node is PSEUDO
-        if n.get_type() == CFGNodeType.PSEUDO:
-            self._write_node(xml_graph, func_name, fid, n.get_refnode(),
-                    len(visited), visited)
-
-        # explore node children that were not visit yet
-        for child in n.get_children():
-            if child not in visited:
-                self._write_node(xml_graph, func_name, fid, child,
-                        len(visited), visited)
-
-    def _write_node_xml(self, xml_graph, fid, n, nid, visited):
-        """ Write node attributes to graphml file.
-
-            Args:
-                xml_graph (ElementTree.SubElement): graph tag of .graphml
-                fid (int): function id
-                n (CFGNode): control flow graph node
-                nid (int): node id of the given function
-                visited (dic): keeps information of all visited nodes
-        """
         # create node tag
-        xml_node = ET.SubElement(xml_graph, 'node')
-        xml_node.set('id', visited[n])
+        writer.start('node', {'id': node_id})
 
         # add data based on node keys
         for key in self._node_keys:
-            xml_data = ET.SubElement(xml_node, 'data')
-            xml_data.set('key', key['id'])
             try:
                 method_name = key['get_data']
                 method = getattr(n, method_name)
-                xml_data.text = str(method()).lower()
+                text = str(method()).lower()
             except AttributeError:
-                xml_data.text = key['default']
+                text = key['default']
+            writer.element('data', {'key': key['id']}, text)
 
         # add graphical information
         if self._yed_output:
-            self._write_node_yed(n, nid, xml_node)
+            self._write_node_yed(writer, n, nid)
 
-    def _write_node_yed(self, n, nid, xml_node):
+        writer.end('node')
+
+    def _write_node_yed(self, writer, n, nid):
         """ Define node shape and position for graphical view
 
             Args:
+                writer (CFGXMLWriter): .graphml writer
                 n (CFGNode): control flow graph node
                 nid (int): node id of the given function
-                xml_node (ElementTree.SubElement): node tag in .graphml
         """
         if not isinstance(n, CFGNode): return
 
@@ -225,126 +407,62 @@ class CFG2Graphml(object):
 
         if key == {} or key['for'] != 'node': return
 
-        xml_data = ET.SubElement(xml_node, 'data')
-        xml_data.set('key', key['id'])
-
-        xml_shape_node = ET.SubElement(xml_data, 'y:ShapeNode')
-        xml_shape = ET.SubElement(xml_shape_node, 'y:Shape')
-        xml_shape.set('type', 'ellipse')
-
-        xml_geometry = ET.SubElement(xml_shape_node, 'y:Geometry')
-        xml_geometry.set('height', '30.0')
-        xml_geometry.set('width', '30.0')
-
-        xml_fill = ET.SubElement(xml_shape_node, 'y:Fill')
-        xml_fill.set('color', '#FFCC00')
-
-        xml_label = ET.SubElement(xml_shape_node, 'y:NodeLabel')
-        xml_label.set('modelName', 'internal')
-        xml_label.set('modelPosition', 'c')
-        xml_label.text = ('%d' % nid)
-
-        xml_label = ET.SubElement(xml_shape_node, 'y:NodeLabel')
-        xml_label.set('modelName', 'sides')
-        xml_label.set('modelPosition', 'e')
-        xml_label.text = ('W.%d' % n.get_wcec())
-
-    def _write_edge(self, xml_graph, fid, n, nid, eid, visited):
-        """ Write edge attributes to graphml file by first discovering
-            all nodes, then create edges in preorder.
+        writer.start('data', {'key': key['id']})
+        writer.start('y:ShapeNode')
+        writer.element('y:Shape', {'type': 'ellipse'})
+        writer.element('y:Geometry', {'height': '30.0', 'width': '30.0'})
+        writer.element('y:Fill', {'color': '#FFCC00'})
+        writer.element('y:NodeLabel',
+                {'modelName': 'internal', 'modelPosition': 'c'},
+                '%d' % nid)
+        writer.element('y:NodeLabel',
+                {'modelName': 'sides', 'modelPosition': 'e'},
+                'W.%d' % n.get_wcec())
+        writer.end('y:ShapeNode')
+        writer.end('data')
+
+    def _write_edge(self, buf, edge_id, source, target, rwcec):
+        """ Write edge attributes to graphml file. See
+            CFGExporter._get_edge_rwcec() for the RWCEC of an edge.
 
             Args:
-                xml_graph (ElementTree.SubElement): graph tag of .graphml
-                fid (int): function id
-                n (CFGNode): control flow graph node
-                nid (int): node id of the given function
-                eid (int): edge id of the given function
-                visited (dic): keeps information of all visited nodes
-
-            Returns:
-                The number of edges (int).
+                buf (file): file object of the .graphml
+                edge_id (string): graphml id of the edge
+                source (string): graphml id of the edge source
+                target (string): graphml id of the edge target
+                rwcec (int): RWCEC of the edge
         """
-        if not isinstance(n, CFGNode): return
+        if self._hierarchical and self._order is not None:
+            # edges of a function are kept in its subgraph
+            self._close_loops(0)
+            if self._summary_only: return
 
-        # node is visited
-        visited[n] = 'g%sn%s' % (fid, nid)
-
-        # explore loop if current one is PSEUDO
-        if n.get_type() == CFGNodeType.PSEUDO:
-            loop_node = n.get_refnode()
-            eid = self._write_edge(xml_graph, fid, loop_node,
-                    len(visited), eid, visited)
-            self._write_edge_xml(xml_graph, fid, eid, n, nid, loop_node,
-                    visited)
-            eid += 1
-
-        # write node children that were not visit yet
-        for child in n.get_children():
-            if child not in visited:
-                eid = self._write_edge(xml_graph, fid, child,
-                        len(visited), eid, visited)
-            self._write_edge_xml(xml_graph, fid, eid, n, nid, child, visited)
-            eid += 1
-
-        return eid
-
-    def _write_edge_xml(self, xml_graph, fid, eid, n, nid, child, visited):
-        """ Write edge attributes to graphml file.
-
-            Note: all nodes whose child is a WHILE, can not get its child RWCEC,
-            because RWCEC of a WHILE node is the value of the worst execution
-            of a loop. If current node has a WHILE as a child, so it is making
-            the loop cycle and all loop nodes were already executed once. Then,
-            the right RWCEC is the loop RWCEC minus the WCEC of one loop
-            iteration. This idea is applied only to nodes before loop condition
-            inside a loop.
+        writer = self._writer
 
-            Args:
-                xml_graph (ElementTree.SubElement): graph tag of .graphml
-                fid (int): function id
-                eid (int): edge id of the given function
-                n (CFGNode): control flow graph node
-                nid (int): node id of the given function
-                child (CFGNode): child node of n
-                visited (dic): keeps information of all visited nodes
-        """
         # create edge tag
-        xml_edge = ET.SubElement(xml_graph, 'edge')
-        xml_edge.set('id', 'g%se%s' % (fid, eid))
-        xml_edge.set('source', visited[n])
-        xml_edge.set('target', visited[child])
-
-        rwcec = 0
-        if n.get_refnode() != child and child.get_type() == CFGNodeType.WHILE:
-            loop_wcec = ((child.get_rwcec() - child.get_wcec()) /
-                            child.get_loop_iters())
-            rwcec = child.get_rwcec() - loop_wcec
+        writer.start('edge', {
+            'id': edge_id,
+            'source': source,
+            'target': target
+        })
 
         # add only rwcec key tag
         for key in self._node_keys:
             if key['attr.name'] == 'rwcec':
-                xml_data = ET.SubElement(xml_edge, 'data')
-                xml_data.set('key', key['id'])
-                try:
-                    if rwcec == 0: # current node does not have a WHILE child
-                        method_name = key['get_data']
-                        method = getattr(child, method_name)
-                        rwcec = method()
-                except AttributeError:
-                    rwcec = int(key['default'])
-                finally:
-                    xml_data.text = str(rwcec)
-                    break
+                writer.element('data', {'key': key['id']}, str(rwcec))
+                break
 
         # add graphical information
         if self._yed_output:
-            self._write_edge_yed(xml_edge, rwcec)
+            self._write_edge_yed(writer, rwcec)
 
-    def _write_edge_yed(self, xml_edge, rwcec):
+        writer.end('edge')
+
+    def _write_edge_yed(self, writer, rwcec):
         """ Define edge shape and position for graphical view
 
             Args:
-                xml_node (ElementTree.SubElement): node tag in .graphml
+                writer (CFGXMLWriter): .graphml writer
                 rwcec (int): RWCEC of the given edge
         """
         for key in self._yed_keys:
@@ -353,23 +471,26 @@ class CFG2Graphml(object):
 
         if key == {} or key['for'] != 'edge': return
 
-        xml_data = ET.SubElement(xml_edge, 'data')
-        xml_data.set('key', key['id'])
-
-        xml_poly_line = ET.SubElement(xml_data, 'y:PolyLineEdge')
-
-        xml_arrows = ET.SubElement(xml_poly_line, 'y:Arrows')
-        xml_arrows.set('source', 'none')
-        xml_arrows.set('target', 'short')
-
-        xml_label = ET.SubElement(xml_poly_line, 'y:EdgeLabel')
-        xml_label.set('alignment', 'center')
-        xml_label.text = str(rwcec)
+        writer.start('data', {'key': key['id']})
+        writer.start('y:PolyLineEdge')
+        writer.element('y:Arrows', {'source': 'none', 'target': 'short'})
+        writer.element('y:EdgeLabel', {'alignment': 'center'}, str(rwcec))
+        writer.end('y:PolyLineEdge')
+        writer.end('data')
 
     def __init__(self):
         """ Initialize class attributes.
         """
         self._yed_output = False
+        self._pretty = True
+        self._hierarchical = False
+        self._summary_only = False
+        self._writer = None
+        self._func_ids = {}
+        self._calls = []
+        self._order = None
+        self._loop_lines = {}
+        self._open_loops = []
         self._yed_keys = [
             {
                 'id': 'nyed',
@@ -457,3 +578,104 @@ class CFG2Graphml(object):
             }
         ]
 
+
+class CFGXMLWriter(object):
+    """ Write XML tags straight to a file while they are made. A start tag is
+        kept open until its first child or its end, so a tag without children
+        is written as '<tag/>'. The layout is the same as minidom
+        toprettyxml(): attributes are sorted and a tag with only text is kept
+        in one line.
+
+        Args:
+            buf (file): file object to write XML
+            pretty (boolean): true if each tag should be written in its own
+                line and indented
+
+        Attributes:
+            _buf (file): file object to write XML
+            _indent (string): indentation of each level
+            _newline (string): end of each tag line
+            _depth (int): number of open tags
+            _open_start (boolean): true if the last start tag is not closed
+                with '>' yet
+    """
+    def __init__(self, buf, pretty=True):
+        self._buf = buf
+        self._indent = '  ' if pretty else ''
+        self._newline = '\n' if pretty else ''
+        self._depth = 0
+        self._open_start = False
+
+    def start_document(self):
+        """ Write XML declaration.
+        """
+        self._buf.write('<?xml version="1.0" encoding="UTF-8"?>' +
+                self._newline)
+
+    def start(self, tag, attrs={}):
+        """ Write a start tag whose children come next.
+
+            Args:
+                tag (string): tag name
+                attrs (dic): {attribute: value}
+        """
+        self._close_start()
+        self._buf.write(self._indent * self._depth + '<' + tag +
+                self._format_attrs(attrs))
+        self._open_start = True
+        self._depth += 1
+
+    def end(self, tag):
+        """ Write an end tag.
+
+            Args:
+                tag (string): tag name
+        """
+        self._depth -= 1
+        if self._open_start:
+            self._buf.write('/>' + self._newline)
+            self._open_start = False
+        else:
+            self._buf.write(self._indent * self._depth + '</' + tag + '>' +
+                    self._newline)
+
+    def element(self, tag, attrs={}, text=None):
+        """ Write a tag without children, but maybe with a text.
+
+            Args:
+                tag (string): tag name
+                attrs (dic): {attribute: value}
+                text (string): text of the tag or None
+        """
+        if text is None:
+            self.start(tag, attrs)
+            self.end(tag)
+            return
+
+        self._close_start()
+        self._buf.write(self._indent * self._depth + '<' + tag +
+                self._format_attrs(attrs) + '>' + self._escape(text) +
+                '</' + tag + '>' + self._newline)
+
+    def _close_start(self):
+        """ Close the last start tag, since a child is coming.
+        """
+        if self._open_start:
+            self._buf.write('>' + self._newline)
+            self._open_start = False
+
+    def _format_attrs(self, attrs):
+        """ Returns:
+                Attributes sorted by name (string)
+        """
+        return ''.join(' %s="%s"' % (attr, self._escape(attrs[attr]))
+                for attr in sorted(attrs))
+
+    def _escape(self, data):
+        """ Escape text and attribute values in the same way as minidom.
+
+            Returns:
+                Escaped data (string)
+        """
+        return (data.replace('&', '&amp;').replace('<', '&lt;')
+                .replace('"', '&quot;').replace('>', '&gt;'))
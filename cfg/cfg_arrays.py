@@ -0,0 +1,117 @@
+from cfg_nodes import CFGNodeType, CFGEntryNode, CFGNode
+
+
+# node type codes used by 'type' array, i.e. NODE_TYPES[code] is the type
+NODE_TYPES = [
+    CFGNodeType.COMMON,
+    CFGNodeType.IF,
+    CFGNodeType.ELSE,
+    CFGNodeType.ELSE_IF,
+    CFGNodeType.END_IF,
+    CFGNodeType.FOR,
+    CFGNodeType.WHILE,
+    CFGNodeType.DO_WHILE,
+    CFGNodeType.PSEUDO,
+    CFGNodeType.CALL,
+    CFGNodeType.END
+]
+
+
+class CFGArrays(object):
+    """ Export a CFG as NumPy arrays. Nodes of all functions are numbered
+        together: functions in the same order as CFG entry nodes and, inside
+        each function, nodes in preorder (the same order as .graphml ids).
+
+        Children are kept in CSR format: children of node i are
+        child_indices[child_offsets[i]:child_offsets[i + 1]]. Reference nodes
+        are kept apart, since they are not edges of the graph: a PSEUDO node
+        refers to its loop condition node and a CALL node refers to the first
+        node of the function it calls.
+
+        Note: NumPy is needed only by this class.
+    """
+    def to_arrays(self, cfg):
+        """ Make all arrays of the given CFG.
+
+            Args:
+                cfg (CFG): control flow graph
+
+            Returns:
+                Dic of arrays, where n is the number of nodes and f the number
+                of functions: {
+                    'type': node type codes, see NODE_TYPES (n),
+                    'start_line': node first line (n),
+                    'last_line': node last line (n),
+                    'wcec': node WCEC (n),
+                    'rwcec': node RWCEC (n),
+                    'loop_iters': loop maximum iterations (n),
+                    'func': function id of each node (n),
+                    'child_offsets': CSR offsets of children (n + 1),
+                    'child_indices': CSR children (number of edges),
+                    'refnode': reference node or -1 (n),
+                    'func_first_node': first node of each function (f),
+                    'func_names': function names (f)
+                }
+
+            Raises:
+                RuntimeError: if NumPy is not installed
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError('NumPy is needed to export CFG as arrays')
+
+        type_codes = dict((t, code) for code, t in enumerate(NODE_TYPES))
+
+        # number all nodes
+        nodes = []
+        node_ids = {}
+        entry_ids = {}
+        func_first_node = []
+        func_names = []
+        for fid, entry in enumerate(cfg.get_entry_nodes()):
+            entry_ids[entry] = fid
+            func_names.append(entry.get_func_name())
+            func_first_node.append(len(nodes))
+            for n in entry.get_order().get_preorder():
+                node_ids[n] = len(nodes)
+                nodes.append((n, fid))
+
+        size = len(nodes)
+        arrays = {
+            'type': numpy.zeros(size, dtype=numpy.int8),
+            'start_line': numpy.zeros(size, dtype=numpy.int32),
+            'last_line': numpy.zeros(size, dtype=numpy.int32),
+            'wcec': numpy.zeros(size, dtype=numpy.int64),
+            'rwcec': numpy.zeros(size, dtype=numpy.int64),
+            'loop_iters': numpy.zeros(size, dtype=numpy.int32),
+            'func': numpy.zeros(size, dtype=numpy.int32),
+            'child_offsets': numpy.zeros(size + 1, dtype=numpy.int64),
+            'refnode': numpy.full(size, -1, dtype=numpy.int64),
+            'func_first_node': numpy.array(func_first_node, dtype=numpy.int64),
+            'func_names': numpy.array(func_names)
+        }
+
+        child_indices = []
+        for nid, (n, fid) in enumerate(nodes):
+            arrays['type'][nid] = type_codes[n.get_type()]
+            arrays['start_line'][nid] = n.get_start_line()
+            arrays['last_line'][nid] = n.get_last_line()
+            arrays['wcec'][nid] = n.get_wcec()
+            arrays['rwcec'][nid] = n.get_rwcec()
+            arrays['loop_iters'][nid] = n.get_loop_iters()
+            arrays['func'][nid] = fid
+
+            for child in n.get_children():
+                child_indices.append(node_ids[child])
+            arrays['child_offsets'][nid + 1] = len(child_indices)
+
+            refnode = n.get_refnode()
+            if isinstance(refnode, CFGNode) and refnode in node_ids:
+                arrays['refnode'][nid] = node_ids[refnode]
+            elif isinstance(refnode, CFGEntryNode) and refnode in entry_ids:
+                arrays['refnode'][nid] = func_first_node[entry_ids[refnode]]
+
+        arrays['child_indices'] = numpy.array(child_indices,
+                dtype=numpy.int64)
+        return arrays
@@ -47,11 +47,29 @@ class CFGAstVisitor(object):
     def make_cfg_from_ast(self, ast):
         if isinstance(ast, c_ast.FileAST):
             self.visit(ast)
+            self._add_last_node()
             self._update_call()
             self._clean_graph()
 
         return self._get_entry_nodes()
 
+    def link_entry_nodes(self, entry_nodes):
+        """ Add functions whose graphs were made apart, i.e. by other
+            processes, and set reference nodes of their CALL nodes.
+
+            Args:
+                entry_nodes (list): CFGEntryNodes in the same order as their
+                    function definitions
+
+            Returns:
+                list of all functions
+        """
+        for entry in entry_nodes:
+            self._add_entry_node(entry)
+        self._update_call()
+
+        return self._get_entry_nodes()
+
     ####### AST visit algorithm #######
 
     def visit(self, n):
@@ -68,7 +86,6 @@ class CFGAstVisitor(object):
             if isinstance(ext, c_ast.FuncDef):
                 self._init_vars()
                 self.visit(ext)
-                self._add_last_node()
 
     def visit_FuncDef(self, n):
         """ Get function name and explore its statements
@@ -153,7 +170,7 @@ class CFGAstVisitor(object):
         if n.stmt is not None: self.visit(n.stmt)
 
         # get all stmt nodes without child and point them to while-cond
-        self._make_loop_cycle(cond, cond, {})
+        self._make_loop_cycle(cond)
 
         # pseudo:   reference -> while-cond
         #           child -> other CFG nodes
@@ -212,64 +229,56 @@ class CFGAstVisitor(object):
         elif len(children) == 2 and isinstance(iffalse_last_node, CFGNode):
             iffalse_last_node.add_child(end_node)
 
-    def _make_loop_cycle(self, cond, child, visited):
-        visited[child] = True
-        if child.get_children() == []:
-            child.add_child(cond)
-        else:
+    def _make_loop_cycle(self, cond):
+        """ Explore loop graph with an explicit stack, so long loops do not
+            reach the recursion limit, and point all nodes without children
+            to the loop condition.
+
+            cond:
+                CFGNode of the loop condition
+        """
+        visited = {cond: True}
+        stack = [cond]
+        while stack:
+            child = stack.pop()
+            if child.get_children() == []:
+                child.add_child(cond)
+                continue
+
             for c in child.get_children():
                 if c not in visited:
-                    self._make_loop_cycle(cond, c, visited)
+                    visited[c] = True
+                    stack.append(c)
 
     def _update_call(self):
         """ Explore all functions graphs to find CALL nodes and set its
             reference node to the function that is being called.
         """
+        entries = {}
         for entry in self._entry_nodes:
-            self._update_call_visit(entry.get_func_first_node(), {})
-
-    def _update_call_visit(self, n, visited):
-        """ Explore graph to find CALL nodes to set its reference node.
-
-            n:
-                CFGNode
-
-            visited:
-                Dictionary which keeps all nodes that were already visited
-        """
-        visited[n] = True
-
-        if n.get_type() == CFGNodeType.PSEUDO:
-            self._update_call_visit(n.get_refnode(), visited)
+            entries.setdefault(entry.get_func_name(), entry)
 
-        elif n.get_type() == CFGNodeType.CALL:
-            # update reference node to the right entry node
-            for entry in self._entry_nodes:
-                if n.get_call_func_name() == entry.get_func_name():
-                    n.set_refnode(entry)
-                    break
-
-        for child in n.get_children():
-            if child not in visited:
-                self._update_call_visit(child, visited)
+        for entry in self._entry_nodes:
+            for n in entry.get_order().get_preorder():
+                if (n.get_type() == CFGNodeType.CALL
+                        and n.get_call_func_name() in entries):
+                    # update reference node to the right entry node
+                    n.set_refnode(entries[n.get_call_func_name()])
 
     def _clean_graph(self):
         """ Search for unnecessary nodes and remove them.
         """
         for entry_node in self._entry_nodes:
-            self._clean_graph_visit(entry_node.get_func_first_node(), {})
+            for node in entry_node.get_order().get_preorder():
+                self._clean_node(node)
+            entry_node.invalidate_order()
 
-    def _clean_graph_visit(self, node, visited):
-        """ Remove only END_IF nodes from the graph
+    def _clean_node(self, node):
+        """ Remove only END_IF nodes from the node children
 
             node:
                 CFGNode
-
-            visited:
-                Dictionary of which nodes have already been visited
         """
-        visited[node] = True
-
         while True:
             rp_node = None
             rp_id = -1
@@ -288,40 +297,16 @@ class CFGAstVisitor(object):
             if rp_node == None:
                 break
 
-        if node.get_type() == CFGNodeType.PSEUDO:
-            self._clean_graph_visit(node.get_refnode(), visited)
-
-        for child in node.get_children():
-            if child not in visited:
-                self._clean_graph_visit(child, visited)
-
     def _add_last_node(self):
-        """ Add last node to the function graph.
+        """ Add last node to the function graph. Each node (except reference
+            node) that does not have children gets the function last node as
+            its child. In this way, all functions will always have one start
+            and one end points.
         """
         for entry in self._entry_nodes:
             last_node = CFGNode(CFGNodeType.END)
             last_node.set_func_owner(entry.get_func_name())
-            self._add_last_node_visit(entry.get_func_first_node(), last_node, {})
-
-    def _add_last_node_visit(self, n, last_node, visited):
-        """ Search for each node (except reference node) that does not have
-            children and add to it function last node. In this way, all
-            functions will always have one start and one end points.
-
-            n:
-                CFGNode
-
-            last_node:
-                CFGNode
-
-            visited:
-                Dictionary of which nodes have already been visited
-        """
-        visited[n] = True
-
-        for child in n.get_children():
-            if child not in visited:
-                self._add_last_node_visit(child, last_node, visited)
-
-        if n.get_type() != CFGNodeType.END and n.get_children() == []:
-            n.add_child(last_node)
+            for n in entry.get_order().get_postorder():
+                if n.get_type() != CFGNodeType.END and n.get_children() == []:
+                    n.add_child(last_node)
+            entry.invalidate_order()
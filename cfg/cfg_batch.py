@@ -0,0 +1,196 @@
+import sys, os, glob, traceback
+import multiprocessing
+
+from . import cfg, cfg2graphml, cfg_cdvfs_generator
+
+
+class CFGBatch(object):
+    """ Analyze many C files at once. Each file has its CFG made, then its
+        .graphml and DVFS-aware code are written. Files are spread over a pool
+        of processes, so a file that fails does not stop the others.
+
+        Args:
+            jobs (int): number of worker processes. If it is None, use one
+                process per CPU.
+            output_dir (string): directory to write results. If it is None,
+                results are written next to each C file. Otherwise, each
+                result keeps the path of its C file relative to the
+                directory shared by all C files, so files with the same name
+                in different directories do not overwrite each other.
+            graphml (boolean): true if .graphml should be written
+            yed_output (boolean): true if graphical information should be
+                presented in the .graphml
+            dvfs (boolean): true if DVFS-aware code should be generated
+            cache_dir (string): directory of CFG on-disk cache
+
+        Attributes:
+            _jobs (int): number of worker processes
+            _options (dic): options given to each worker
+    """
+    def __init__(self, jobs=None, output_dir=None, graphml=True,
+            yed_output=False, dvfs=False, cache_dir=None):
+        self._jobs = jobs or multiprocessing.cpu_count()
+        self._options = {
+            'output_dir': output_dir,
+            'graphml': graphml,
+            'yed_output': yed_output,
+            'dvfs': dvfs,
+            'cache_dir': cache_dir
+        }
+
+    def find_files(self, paths):
+        """ Expand files, directories and glob patterns into a list of C files.
+            Directories are explored recursively.
+
+            Args:
+                paths (list): files, directories or glob patterns
+
+            Returns:
+                Sorted list of C file names without duplicates
+        """
+        files = set()
+        for path in paths:
+            matches = glob.glob(path) if glob.has_magic(path) else [path]
+            for match in matches:
+                if os.path.isdir(match):
+                    for root, dirs, names in os.walk(match):
+                        for name in names:
+                            if self._is_cfile(name):
+                                files.add(os.path.join(root, name))
+                else:
+                    files.add(match)
+
+        return sorted(files)
+
+    def _is_cfile(self, name):
+        """ Generated DVFS-aware code is not a source to be analyzed.
+
+            Returns:
+                True if name is a C file (boolean)
+        """
+        return name.endswith('.c') and not name.endswith('_dvfs.c')
+
+    def run(self, paths, log=sys.stderr):
+        """ Analyze all C files found in paths and report the progress.
+
+            Args:
+                paths (list): files, directories or glob patterns
+                log (file): file object to write progress and failures
+
+            Returns:
+                Dic: {cfile: error message} of files that failed
+        """
+        files = self.find_files(paths)
+        output_dir = self._options['output_dir']
+        if output_dir is not None and not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+
+        basenames = self._get_output_basenames(files)
+        tasks = [(cfile, basenames[cfile], self._options) for cfile in files]
+        failures = {}
+
+        if self._jobs == 1:
+            results = (_analyze_file(task) for task in tasks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(self._jobs)
+            results = pool.imap_unordered(_analyze_file, tasks)
+
+        try:
+            for done, (cfile, error) in enumerate(results):
+                status = 'ok'
+                if error is not None:
+                    failures[cfile] = error
+                    status = 'FAILED'
+                log.write('[%d/%d] %s %s\n' % (done + 1, len(files), cfile,
+                        status))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        for cfile in sorted(failures):
+            log.write('%s: %s\n' % (cfile, failures[cfile]))
+        log.write('%d files, %d failed\n' % (len(files), len(failures)))
+
+        return failures
+
+
+    def _get_output_basenames(self, files):
+        """ Args:
+                files (list): C file names
+
+            Returns:
+                Dic: {cfile: output file name without extension}
+        """
+        basenames = {}
+        output_dir = self._options['output_dir']
+        if output_dir is None:
+            for cfile in files:
+                basenames[cfile] = os.path.splitext(cfile)[0]
+            return basenames
+
+        root = self._get_common_dir(files)
+        for cfile in files:
+            relname = os.path.relpath(os.path.abspath(cfile), root)
+            basenames[cfile] = os.path.join(output_dir,
+                    os.path.splitext(relname)[0])
+        return basenames
+
+    def _get_common_dir(self, files):
+        """ Returns:
+                Deepest directory (string) that has all given files
+        """
+        common = None
+        for cfile in files:
+            parts = os.path.dirname(os.path.abspath(cfile)).split(os.sep)
+            if common is None:
+                common = parts
+                continue
+            size = 0
+            while (size < len(common) and size < len(parts)
+                    and common[size] == parts[size]):
+                size += 1
+            common = common[:size]
+
+        if not common: return os.getcwd()
+        return os.sep.join(common) or os.sep
+
+
+def _analyze_file(task):
+    """ Make the CFG of one C file and write its results. This is done by a
+        worker process, so it must be a module function.
+
+        Args:
+            task (tuple): (C file name, output file name without extension,
+                options dic)
+
+        Returns:
+            Tuple (C file name, None) or (C file name, error message)
+    """
+    cfile, basename, options = task
+    try:
+        graph = cfg.CFG(cfile, cache_dir=options['cache_dir'])
+        graph.make_cfg(release_ast=True)
+
+        output_dir = os.path.dirname(basename)
+        if output_dir != '' and not os.path.isdir(output_dir):
+            try:
+                os.makedirs(output_dir)
+            except OSError:
+                # another worker made it at the same time
+                if not os.path.isdir(output_dir): raise
+
+        if options['graphml']:
+            graphml = cfg2graphml.CFG2Graphml()
+            graphml.make_graphml(graph, basename + '.graphml',
+                    options['yed_output'])
+
+        if options['dvfs']:
+            cdvfs = cfg_cdvfs_generator.CFG_CDVFS()
+            cdvfs.gen(graph, basename + '.c')
+    except Exception as e:
+        lines = traceback.format_exception_only(type(e), e)
+        return (cfile, ''.join(lines).strip())
+
+    return (cfile, None)
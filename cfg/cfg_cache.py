@@ -0,0 +1,176 @@
+import os, hashlib, tempfile, threading
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+
+class CFGCache(object):
+    """ Content-addressed cache kept on disk. Each entry is a pickled python
+        object stored in '<cache_dir>/<namespace>/<key>.pickle', where key is
+        a hash made of everything the object depends on. So, an entry is never
+        out of date: if anything changes, a new key is made.
+
+        The cache size is limited by max_size. Every time an entry is read its
+        modification time is updated, then when the cache is full the least
+        recently used entries are removed first. The cache directory is
+        walked only once to know its size, then a running total is kept and
+        the directory is walked again only when the total is over max_size.
+        Entries written by other processes are counted at that time.
+
+        Args:
+            cache_dir (string): directory where entries are written
+            max_size (int): maximum size in bytes of all entries together
+
+        Attributes:
+            _cache_dir (string): directory where entries are written
+            _max_size (int): maximum size in bytes of all entries together
+            _size (int): size in bytes of all entries together or None if
+                the cache directory was not walked yet
+            _size_lock (Lock): guards _size, since the assembler table is
+                written by its own thread, see CFGWCEC.start_asm()
+    """
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._size = None
+        self._size_lock = threading.Lock()
+
+    def get_cache_dir(self):
+        """ Returns:
+                Directory where entries are written (string)
+        """
+        return self._cache_dir
+
+    def make_key(self, *parts):
+        """ Hash all given parts together to make an entry key.
+
+            Args:
+                parts (string): anything the cached object depends on
+
+            Returns:
+                Hexadecimal digest (string)
+        """
+        digest = hashlib.sha1()
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = str(part).encode('utf-8')
+            digest.update(part)
+            digest.update(b'\0') # parts boundary
+        return digest.hexdigest()
+
+    def get(self, namespace, key):
+        """ Load an entry from disk and mark it as the most recently used.
+
+            Args:
+                namespace (string): kind of object, i.e. 'ast' or 'asm'
+                key (string): entry key made by make_key()
+
+            Returns:
+                The cached object or None if there is no valid entry
+        """
+        path = self._entry_path(namespace, key)
+        try:
+            with open(path, 'rb') as f:
+                obj = pickle.load(f)
+        except (IOError, OSError):
+            return None
+        except Exception:
+            # broken entry, i.e. an interrupted write or an old format
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return obj
+
+    def put(self, namespace, key, obj):
+        """ Write an entry to disk and remove the least recently used ones if
+            the cache is full. The entry is first written to a temporary file
+            and then renamed, so readers never see half written entries.
+
+            Args:
+                namespace (string): kind of object, i.e. 'ast' or 'asm'
+                key (string): entry key made by make_key()
+                obj (object): any object that can be pickled
+        """
+        path = self._entry_path(namespace, key)
+        dirname = os.path.dirname(path)
+        try:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+        except OSError:
+            if not os.path.isdir(dirname): return
+
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp_path)
+            old_size = self._get_file_size(path)
+            os.rename(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        with self._size_lock:
+            if self._size is not None:
+                self._size += size - old_size
+            if self._size is None or self._size > self._max_size:
+                self._evict()
+
+    def _entry_path(self, namespace, key):
+        """ Returns:
+                Entry file path (string)
+        """
+        return os.path.join(self._cache_dir, namespace, key + '.pickle')
+
+    def _evict(self):
+        """ Remove the least recently used entries until all entries together
+            fit in max_size. The running total of the cache size is set to
+            what is left on disk.
+        """
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self._cache_dir):
+            for name in files:
+                if not name.endswith('.pickle'): continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self._max_size: break
+            self._remove(path)
+            total -= size
+        self._size = total
+
+    def _get_file_size(self, path):
+        """ Returns:
+                Size in bytes of a file (int) or 0 if it does not exist
+        """
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _remove(self, path):
+        """ Remove a file ignoring if it was already removed.
+
+            Args:
+                path (string): file path
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,279 @@
+import sys, os
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,  os.path.join(thisdir, 'pycparser'))
+
+from pycparser import c_ast
+
+from cfg_nodes import CFGNodeType, CFGEntryNode, CFGNode
+
+
+class CFGCallGraph(object):
+    """ Call graph of all functions of a CFG, where there is an edge from a
+        function to each function called by one of its CALL nodes. Functions
+        that call each other, directly or not, are kept together in a strongly
+        connected component (SCC), so the call graph can be visited bottom-up:
+        every function comes after all functions it calls.
+
+        Functions are CFGEntryNodes if the call graph is made from a CFG.
+        Otherwise, functions and their calls are given by add_function() or
+        add_funcdefs(), i.e. function names found in the AST before the CFG is
+        made.
+
+        Args:
+            cfg (CFG): control flow graph or None for an empty call graph
+
+        Attributes:
+            entry_nodes (list): all functions
+            callees (dic): {function: list of functions it calls}
+            sccs (list): strongly connected components in bottom-up order, made
+                only when they are needed
+    """
+    def __init__(self, cfg=None):
+        self._entry_nodes = []
+        self._callees = {}
+        self._sccs = None
+        if cfg is not None:
+            for entry in cfg.get_entry_nodes():
+                self.add_function(entry, self._find_callees(entry))
+
+    def add_function(self, func, callees):
+        """ Add a function and the functions it calls.
+
+            Args:
+                func (CFGEntryNode or string): function
+                callees (list): functions called by func
+        """
+        self._entry_nodes.append(func)
+        self._callees[func] = callees
+        self._sccs = None
+
+    def add_funcdefs(self, funcdefs):
+        """ Add functions by their names from the AST, before their CFG is
+            made. Calls to functions that are not defined are ignored.
+
+            Args:
+                funcdefs (list): pycparser/c_ast FuncDef elements
+        """
+        names = [self._get_funcdef_name(funcdef) for funcdef in funcdefs]
+        for name, funcdef in zip(names, funcdefs):
+            callees = [callee for callee in self._find_funcdef_callees(funcdef)
+                    if callee in names]
+            self.add_function(name, callees)
+
+    def get_entry_nodes(self):
+        """ Returns:
+                List of all functions
+        """
+        return self._entry_nodes
+
+    def get_callees(self, entry):
+        """ Args:
+                entry (CFGEntryNode): a function of the call graph
+
+            Returns:
+                List of functions called by the function, in the order they
+                are first called
+        """
+        return self._callees[entry]
+
+    def get_reachable(self, roots):
+        """ Args:
+                roots (list): functions where calls start
+
+            Returns:
+                List of functions called by roots, directly or not, and roots
+                themselves, in the order they were added
+
+            Raises:
+                RuntimeError: if a root is not a function of the call graph
+        """
+        reachable = {}
+        stack = []
+        for root in roots:
+            if root not in self._callees:
+                raise RuntimeError('Function not found: ' +
+                        self._get_func_name(root))
+            stack.append(root)
+
+        while stack:
+            func = stack.pop()
+            if func in reachable: continue
+            reachable[func] = True
+            stack.extend(self._callees[func])
+
+        return [func for func in self._entry_nodes if func in reachable]
+
+    def get_sccs(self):
+        """ Strongly connected components are found by Tarjan's algorithm,
+            which finishes a component only after all components it calls.
+
+            Returns:
+                List of SCCs in bottom-up order, where each SCC is a list of
+                functions
+        """
+        if self._sccs is None:
+            self._sccs = self._find_sccs()
+        return self._sccs
+
+    def get_levels(self):
+        """ Level of a function is 0 if it does not call any function, else
+            it is one more than the greatest level of functions it calls. So,
+            functions of the same level do not depend on each other.
+
+            Returns:
+                List of levels, where each level is a list of functions in
+                the order they were added
+
+            Raises:
+                RuntimeError: if there is a recursive function
+        """
+        self.check_recursion()
+
+        func_levels = {}
+        for scc in self.get_sccs():
+            level = 0
+            for callee in self._callees.get(scc[0], []):
+                level = max(level, func_levels[callee] + 1)
+            func_levels[scc[0]] = level
+
+        levels = []
+        for func in self._entry_nodes:
+            while len(levels) <= func_levels[func]:
+                levels.append([])
+            levels[func_levels[func]].append(func)
+        return levels
+
+    def is_recursive(self, scc):
+        """ Args:
+                scc (list): a strongly connected component
+
+            Returns:
+                True if the functions of the SCC call each other or the only
+                function of the SCC calls itself (boolean)
+        """
+        return len(scc) > 1 or scc[0] in self._callees.get(scc[0], [])
+
+    def check_recursion(self):
+        """ Recursive functions have no bound on the number of calls, so their
+            RWCEC can not be computed.
+
+            Raises:
+                RuntimeError: if there is a recursive function
+        """
+        for scc in self.get_sccs():
+            if self.is_recursive(scc):
+                names = ', '.join(self._get_func_name(entry)
+                        for entry in scc)
+                raise RuntimeError('Recursive functions are not supported: ' +
+                        names)
+
+    def _get_func_name(self, func):
+        """ Returns:
+                Function name (string)
+        """
+        if isinstance(func, CFGEntryNode):
+            return func.get_func_name()
+        return func
+
+    def _get_funcdef_name(self, funcdef):
+        """ Returns:
+                Function name (string) or None if it has no declaration
+        """
+        if isinstance(funcdef.decl, c_ast.Decl):
+            return funcdef.decl.name
+        return None
+
+    def _find_funcdef_callees(self, funcdef):
+        """ Args:
+                funcdef (pycparser/c_ast/FuncDef): function definition
+
+            Returns:
+                List of function names called by the function without
+                duplicates. Like CFGVisitor, calls inside the arguments of
+                another call are not taken into account, since they have no
+                CALL node.
+        """
+        callees = []
+        stack = [funcdef]
+        while stack:
+            elem = stack.pop()
+            if isinstance(elem, c_ast.FuncCall):
+                if (isinstance(elem.name, c_ast.ID)
+                        and elem.name.name not in callees):
+                    callees.append(elem.name.name)
+                continue
+            children = [child for name, child in elem.children()]
+            stack.extend(reversed(children))
+        return callees
+
+    def _find_callees(self, entry):
+        """ Args:
+                entry (CFGEntryNode): function to look for CALL nodes
+
+            Returns:
+                List of CFGEntryNodes called by the function without
+                duplicates
+        """
+        callees = []
+        found = {}
+        for n in entry.get_order().get_preorder():
+            callee = n.get_refnode()
+            if (n.get_type() == CFGNodeType.CALL
+                    and isinstance(callee, CFGEntryNode)
+                    and isinstance(callee.get_func_first_node(), CFGNode)
+                    and callee not in found):
+                found[callee] = True
+                callees.append(callee)
+        return callees
+
+    def _find_sccs(self):
+        """ Tarjan's algorithm with an explicit stack, so long call chains do
+            not reach the recursion limit.
+
+            Returns:
+                List of SCCs in bottom-up order
+        """
+        index = {}
+        lowlink = {}
+        on_stack = {}
+        scc_stack = []
+        sccs = []
+
+        for root in self._entry_nodes:
+            if root in index: continue
+
+            index[root] = lowlink[root] = len(index)
+            scc_stack.append(root)
+            on_stack[root] = True
+            stack = [(root, iter(self._callees.get(root, [])))]
+
+            while stack:
+                entry, callees = stack[-1]
+                for callee in callees:
+                    if callee not in index:
+                        index[callee] = lowlink[callee] = len(index)
+                        scc_stack.append(callee)
+                        on_stack[callee] = True
+                        stack.append((callee,
+                                iter(self._callees.get(callee, []))))
+                        break
+                    elif on_stack.get(callee):
+                        lowlink[entry] = min(lowlink[entry], index[callee])
+                else:
+                    # all callees were explored
+                    stack.pop()
+                    if stack != []:
+                        caller = stack[-1][0]
+                        lowlink[caller] = min(lowlink[caller], lowlink[entry])
+
+                    if lowlink[entry] == index[entry]:
+                        scc = []
+                        while True:
+                            member = scc_stack.pop()
+                            on_stack[member] = False
+                            scc.append(member)
+                            if member == entry: break
+                        sccs.append(scc[::-1])
+
+        return sccs
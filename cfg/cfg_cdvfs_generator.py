@@ -25,17 +25,17 @@ class CFG_CDVFS(object):
         When a type-B edge is found, all new information, including call to
         change frequency, is added in the begining of the node. Although,
         type-L edge must set the five variables before loop begins, then the
-        call to change frequency must be added in next node right after loop
-        execution.
+        call to change frequency must be added right after loop execution.
 
         Note-I: the header file (cfg/cfg_wcec.h) is copy to the same directory
         as the given C file to it runs properly.
 
-        Note-II: nested loops are not supported in code generation, because the
-        node right after a nested loop could be a condition one from parent
-        loop. So, we can not add DVFS information in this case. Another
-        approach should be by getting the line of each bracket '}' as the last
-        line.
+        Note-II: in nested loops, the node right after an inner loop could be
+        the condition of its parent loop, so the call to change frequency is
+        added right after the closing bracket '}' of each loop. The five
+        variables are shared by all loops and may be changed by the loop
+        body, i.e. by inner loops or called functions, so each loop sets its
+        variables again before the call.
 
         Attributes:
             _dvfscode (string): template string to add DVFG information code
@@ -44,9 +44,10 @@ class CFG_CDVFS(object):
         self._dvfscode = '\n{sp}/*** auto generate DVFS code ***/\n{code}\n'
 
     def gen(self, graph=None, dvfsfilename=''):
-        """ Generates DVFS-aware code by first getting C code lines as a list
-            then inserting in each position where a type-B or type-L edge is
-            the DVFS information
+        """ Generates DVFS-aware code by first getting C code lines, then
+            planning DVFS information before each line where a type-B or type-L
+            edge is and, at last, writing lines and planned code in a single
+            pass
 
             Args:
                 graph (cfg.CFG): CFG of the given C file
@@ -64,30 +65,26 @@ class CFG_CDVFS(object):
         if clines == []:
             raise RuntimeError('no lines in {0}'.format(graph.get_cfilename()))
 
-        self._insert_dvfs_info(graph, clines) # explore CFG graph
-        self._write_new_code(dvfsfilename, clines) # write to a file
+        plan = CFGInsertPlan(clines)
+        self._insert_dvfs_info(graph, plan) # explore CFG graph
+        self._write_new_code(dvfsfilename, plan) # write to a file
         self._copy_new_header(dvfsfilename)
 
     def _get_file_lines(self, filename):
-        """ Read C code and create a list from its lines by enumerating all
-            them according to the line number they belong to
+        """ Read C code lines, so line n is the (n - 1)th element
 
             Returns:
-                List of tuples (clines, text) from C code
+                List of lines (string) from C code
         """
-        lines_list = []
         with open(filename, 'rU') as f:
-            lines = f.readlines()
-            for k, l in enumerate(lines):
-                lines_list.append((k + 1, l))
-        return lines_list
+            return f.readlines()
 
-    def _insert_header(self, clines):
+    def _insert_header(self, plan):
         """ Insert cfg_wcec.h and define some variables important to control
             program flow
 
             Args:
-                clines (list): list of tuples (clines, text) from C code
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
         """
         spaces = ''
         autocode = spaces + '#include "cfg_wcec.h"\n'
@@ -95,53 +92,50 @@ class CFG_CDVFS(object):
         autocode += spaces + 'float __cfg_rwcec_bi;\n'
         autocode += spaces + 'float __cfg_rwcec_bj;\n'
         autocode += spaces + 'int __cfg_loop_max_iter;\n'
-        newline = (-1, self._dvfscode.format(sp='', code=autocode))
-        clines.insert(0, newline)
+        plan.insert(1, self._dvfscode.format(sp='', code=autocode))
 
-    def _insert_dvfs_info(self, graph, clines):
+    def _insert_dvfs_info(self, graph, plan):
         """ Explore all functions in the C code
 
             Args:
                 graph (cfg.CFG): CFG of the given C file
-                clines (list): list of tuples (clines, text) from C code
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
         """
-        self._insert_header(clines)
+        self._insert_header(plan)
         for entry in graph.get_entry_nodes():
             if isinstance(entry, CFGEntryNode):
-                n = entry.get_func_first_node()
-                self._insert_dvfs_info_visit(clines, n, {})
+                self._insert_dvfs_info_func(plan, entry.get_order())
 
-    def _insert_dvfs_info_visit(self, clines, n, visited):
-        """ Looking for all type-B and type-L edges in all functions
+    def _insert_dvfs_info_func(self, plan, order):
+        """ Looking for all type-B and type-L edges in a function. Only edges
+            by which a node is discovered are checked, in the order nodes are
+            discovered.
 
             Args:
-                clines (list): list of tuples (clines, text) from C code
-                n (CFGNode): current node being visited
-                visited (dic): keep track of all visited node
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
+                order (CFGOrder): traversal order of the function graph
         """
-        if not isinstance(n, CFGNode): return
-
-        visited[n] = True
-
-        # explore loop if current node is PSEUDO
-        if n.get_type() == CFGNodeType.PSEUDO:
-            self._insert_dvfs_info_visit(clines, n.get_refnode(), visited)
-
-        # explore node children that were not visited yet
-        for child in n.get_children():
-            if child not in visited:
-                if n.get_type() == CFGNodeType.IF:
-                    self._check_typeB_edge(clines, n, child)
-                elif n.get_type() == CFGNodeType.PSEUDO:
-                    self._check_typeL_edge(clines, n, child)
-                self._insert_dvfs_info_visit(clines, child, visited)
-
-    def _check_typeB_edge(self, clines, n, child):
+        dfs_parents = order.get_dfs_parents()
+        for child in order.get_preorder():
+            n = dfs_parents.get(child)
+            if (n is not None and n.get_refnode() is not child
+                    and n.get_type() == CFGNodeType.IF):
+                self._check_typeB_edge(plan, n, child)
+
+            # the node after an inner loop may be already discovered, i.e.
+            # its parent loop condition, so loops are checked by their PSEUDO
+            # node
+            if (child.get_type() == CFGNodeType.PSEUDO
+                    and isinstance(child.get_refnode(), CFGNode)):
+                for loop_after in child.get_children():
+                    self._check_typeL_edge(plan, child, loop_after)
+
+    def _check_typeB_edge(self, plan, n, child):
         """ Check if current child has a RWCEC less than the greatest RWCEC of
             a successor of current node. If it is, so this is a type-B edge.
 
             Args:
-                clines (list): list of tuples (clines, text) from C code
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
                 n (CFGNode): current node being visited
                 child (CFGNode): child of n
         """
@@ -149,13 +143,13 @@ class CFG_CDVFS(object):
         bj = child.get_rwcec()
         bjline = child.get_start_line()
         if bj < succbi:
-            self._insert_typeB_info(clines, bjline, succbi, bj)
+            self._insert_typeB_info(plan, bjline, succbi, bj)
 
-    def _check_typeL_edge(self, clines, n, child):
+    def _check_typeL_edge(self, plan, n, child):
         """ Get loop information from current node and child and add DVFS code
 
             Args:
-                clines (list): list of tuples (clines, text) from C code
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
                 n (CFGNode): current node being visited
                 child (CFGNode): child of n
         """
@@ -167,121 +161,126 @@ class CFG_CDVFS(object):
         loop_max_iter = n.get_loop_iters()
         loop_after_line = child.get_start_line()
         loop_after_rwcec = child.get_rwcec()
-        self._insert_typeL_info(clines, loop_cond_line, loop_wcec_once,
+        self._insert_typeL_info(plan, loop_cond_line, loop_wcec_once,
                 loop_max_iter, loop_after_line, loop_after_rwcec)
 
-    def _insert_typeB_info(self, clines, bjline, rwcec_bi, rwcec_bj):
-        """ Gather all information from a type-B edge and add DVFS code to C
-            lines list.
-
-            Note: since DVFS information is not a real part of the C code yet,
-            it does not have a line, so -1 is used instead.
+    def _insert_typeB_info(self, plan, bjline, rwcec_bi, rwcec_bj):
+        """ Gather all information from a type-B edge and plan DVFS code
+            before bj line.
 
             Args:
-                clines (list): list of tuples (clines, text) from C code
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
                 bjline (int): start line of bj
                 rwcec_bi (int): RWCEC of bi
                 rwcec_bj (int): RWCEC of bj
         """
-        index, spaces = self._get_line_index_spaces(clines, bjline)
+        spaces = plan.get_spaces(bjline)
         autocode = spaces + '__cfg_type = __CFG_TYPE_B;\n'
         autocode += spaces + '__cfg_rwcec_bi = ' + str(rwcec_bi) + ';\n'
         autocode += spaces + '__cfg_rwcec_bj = ' + str(rwcec_bj) + ';\n'
         autocode += spaces + '__cfg_change_freq(&__cfg_type, '
         autocode += '__cfg_rwcec_bi, __cfg_rwcec_bj, 0, 0);\n'
-        newline = (-1, self._dvfscode.format(sp=spaces, code=autocode))
-        clines.insert(index, newline)
+        plan.insert(bjline, self._dvfscode.format(sp=spaces, code=autocode))
 
-    def _insert_typeL_info(self, clines, loop_cond_line, loop_wcec_once,
+    def _insert_typeL_info(self, plan, loop_cond_line, loop_wcec_once,
             loop_max_iter, loop_after_line, loop_after_rwcec):
-        """ Gather all information from a type-L edge and add DVFS code to C
-            lines list.
+        """ Gather all information from a type-L edge and plan DVFS code.
 
             Type-L edges have three parts to be added: first, it is before loop
             starts and all variables are define; second is inside the loop
             where a counter is add to count how many iterations the loop did at
-            runtime; third, inserts information in the node right after loop.
-            This last information is the call to change processor frequency if
-            it is possible.
+            runtime; third, inserts information right after loop. This last
+            information is the call to change processor frequency if it is
+            possible.
 
             Note-I: all loops must have its own iteration counter, so it is
             unique. This is done by add to the variable name loop start line
-            since it is different of each loop.
+            since it is different of each loop. An inner loop counter is
+            defined inside its parent loop, so it starts again at each parent
+            iteration.
+
+            Note-II: the node after a loop is where the call to change
+            frequency should be, but only if it is the next statement after
+            the loop closing bracket '}'. Otherwise, the loop is the last one
+            of a block, e.g. of its parent loop or of an if statement, so the
+            call is added right after the closing bracket.
 
-            Note-II: nested loops are not supported in code generation, because
-            the node right after a nested loop could be a condition one from
-            parent loop. So, we can not add DVFS information in this case.
-            Another approach should be by getting the line of each bracket '}'
-            as the last line.
+            Note-III: since inner loops, called functions and type-B edges
+            change the five variables, they are set again right before the
+            call to change frequency.
 
             Args:
-                clines (list): list of tuples (clines, text) from C code
-                bjline (int): start line of bj
-                rwcec_bi (int): RWCEC of bi
-                rwcec_bj (int): RWCEC of bj
+                plan (CFGInsertPlan): DVFS code to be inserted in C code
+                loop_cond_line (int): start line of the loop condition
+                loop_wcec_once (int): WCEC of one loop iteration
+                loop_max_iter (int): loop maximum number of iterations
+                loop_after_line (int): start line of the node after loop
+                loop_after_rwcec (int): RWCEC of the node after loop
         """
-        # before loop starts
-        index, spaces = self._get_line_index_spaces(clines, loop_cond_line)
-        autocode = spaces + '__cfg_type = __CFG_TYPE_L;\n'
-        autocode += spaces + '__cfg_rwcec_bi = ' + str(loop_wcec_once) + ';\n'
-        autocode += spaces + '__cfg_rwcec_bj = ' + str(loop_after_rwcec) + ';\n'
-        autocode += spaces + '__cfg_loop_max_iter = ' +str(loop_max_iter)+';\n'
+        # before loop starts: keep a blank line between code and loop if
+        # there is one, but never go out of the loop block
+        spaces = plan.get_spaces(loop_cond_line)
+        autocode = self._get_typeL_vars(spaces, loop_wcec_once,
+                loop_max_iter, loop_after_rwcec)
         autocode += spaces + 'int __cfg_loop{0}_iter = 0;\n'
         autocode = autocode.format(loop_cond_line)
-        newline = (-1, self._dvfscode.format(sp=spaces, code=autocode))
-        clines.insert(index - 1, newline)
+        before_line = loop_cond_line
+        if (plan.is_blank(loop_cond_line - 1)
+                and not plan.has_code(loop_cond_line)):
+            before_line = loop_cond_line - 1
+        plan.insert(before_line,
+                self._dvfscode.format(sp=spaces, code=autocode))
 
         # inside loop
-        index, spaces = self._get_line_index_spaces(clines, loop_cond_line + 1)
+        spaces = plan.get_spaces(loop_cond_line + 1)
         autocode = spaces + '__cfg_loop{0}_iter++;\n'
         autocode = autocode.format(loop_cond_line)
-        newline = (-1, self._dvfscode.format(sp=spaces, code=autocode))
-        clines.insert(index, newline)
+        plan.insert(loop_cond_line + 1,
+                self._dvfscode.format(sp=spaces, code=autocode))
 
         # after loop
-        index, spaces = self._get_line_index_spaces(clines, loop_after_line)
-        autocode = spaces + '__cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, '
+        loop_end_line = plan.get_block_end_line(loop_cond_line)
+        if plan.get_next_line(loop_end_line) != loop_after_line:
+            loop_after_line = loop_end_line + 1
+            spaces = plan.get_spaces(loop_cond_line)
+        else:
+            spaces = plan.get_spaces(loop_after_line)
+        autocode = self._get_typeL_vars(spaces, loop_wcec_once,
+                loop_max_iter, loop_after_rwcec)
+        autocode += spaces + '__cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, '
         autocode += '__cfg_rwcec_bj, __cfg_loop_max_iter, '
         autocode += '__cfg_loop{0}_iter);\n'
         autocode = autocode.format(loop_cond_line)
-        newline = (-1, self._dvfscode.format(sp=spaces, code=autocode))
-        clines.insert(index, newline)
-
-    def _get_line_index_spaces(self, clines, line):
-        """ Find the index of a line in the clines. It also get the number of
-            spaces to indent a block according to the given line.
+        plan.insert(loop_after_line,
+                self._dvfscode.format(sp=spaces, code=autocode))
 
-            Args:
-                clines (list): list of tuples (clines, text) from C code
-                line (int): line from C code
+    def _get_typeL_vars(self, spaces, loop_wcec_once, loop_max_iter,
+            loop_after_rwcec):
+        """ Returns:
+                Code (string) that sets the variables of a type-L edge
         """
-        index = -1
-        indentation = ''
-        for l, text in clines:
-            index += 1
-            if l == line:
-                indentation = ' ' * (len(text) - len(text.lstrip()))
-                break
-        return index, indentation
-
-    def _write_new_code(self, filename='', clines=[]):
+        autocode = spaces + '__cfg_type = __CFG_TYPE_L;\n'
+        autocode += spaces + '__cfg_rwcec_bi = ' + str(loop_wcec_once) + ';\n'
+        autocode += spaces + '__cfg_rwcec_bj = ' + str(loop_after_rwcec) + ';\n'
+        autocode += spaces + '__cfg_loop_max_iter = ' +str(loop_max_iter)+';\n'
+        return autocode
+
+    def _write_new_code(self, filename='', plan=None):
         """ Write the new code into the given file and append '_dvfs' string to
             it. However, if no name is given, write it at standard output.
 
             Args:
                 filename (string): new C file name
-                clines (list): list of tuples (clines, text) from C code
+                plan (CFGInsertPlan): C code lines and DVFS code to be inserted
         """
         if filename != '':
             filename = os.path.splitext(filename)[0]
             filename = filename + '_dvfs.c'
         try:
             with open(filename, 'w') as f:
-                for line, text in clines:
-                    f.write(text)
+                plan.write(f)
         except IOError:
-            for line, text in clines:
-                sys.stdout.write(text)
+            plan.write(sys.stdout)
 
     def _copy_new_header(self, filename):
         """ Copy cfg_wcec.h to C file directory.
@@ -293,3 +292,148 @@ class CFG_CDVFS(object):
         cheader = os.path.join(cheader_dir, 'cfg_wcec.h')
         filedir = os.path.dirname(os.path.abspath(filename))
         shutil.copy(cheader, filedir)
+
+
+class CFGInsertPlan(object):
+    """ DVFS code to be inserted in C code, kept by the line it must come
+        before. Code is only planned while the CFG is explored, so C lines are
+        never moved, and the new code is written in a single pass at the end.
+
+        A line which is not in the C code, e.g. line 0 of END nodes, is the
+        last line without indentation.
+
+        Args:
+            clines (list): lines (string) from C code
+
+        Attributes:
+            clines (list): lines (string) from C code
+            before (dic): {line: list of code (string) to be written before
+                it, in order}
+            spaces (dic): {line: indentation (string)} of lines already asked
+                for
+    """
+    def __init__(self, clines):
+        self._clines = clines
+        self._before = {}
+        self._spaces = {}
+
+    def get_spaces(self, line):
+        """ Args:
+                line (int): line from C code
+
+            Returns:
+                Indentation (string) of the given line
+        """
+        if line not in self._spaces:
+            spaces = ''
+            if 1 <= line <= len(self._clines):
+                text = self._clines[line - 1]
+                spaces = ' ' * (len(text) - len(text.lstrip()))
+            self._spaces[line] = spaces
+        return self._spaces[line]
+
+    def insert(self, line, code):
+        """ Plan code right before a line, i.e. after all code already planned
+            before it.
+
+            Args:
+                line (int): line from C code
+                code (string): code to be inserted
+        """
+        self._before.setdefault(self._get_line(line), []).append(code)
+
+    def has_code(self, line):
+        """ Returns:
+                True if some code is already planned before the given line
+        """
+        return self._before.get(self._get_line(line), []) != []
+
+    def is_blank(self, line):
+        """ Returns:
+                True if the given line is in C code and it is blank
+        """
+        if not 1 <= line <= len(self._clines): return False
+        return self._clines[line - 1].strip() == ''
+
+    def get_next_line(self, line):
+        """ Returns:
+                First line (int) after the given one which is not blank, or
+                None if there is no such line
+        """
+        for next_line in range(max(line, 0) + 1, len(self._clines) + 1):
+            if not self.is_blank(next_line):
+                return next_line
+        return None
+
+    def get_block_end_line(self, line):
+        """ Find where the statement which starts at the given line ends: the
+            line of the bracket '}' that closes its block or, if it has no
+            block, the line of its ';'. Comments, strings and characters are
+            skipped.
+
+            Args:
+                line (int): start line of a statement, e.g. a loop
+
+            Returns:
+                Last line (int) of the statement or the last line of the C
+                code if its end is not found
+        """
+        parens = 0
+        brackets = 0
+        comment = False
+        for cur_line in range(max(line, 1), len(self._clines) + 1):
+            text = self._clines[cur_line - 1]
+            quote = None
+            i = 0
+            while i < len(text):
+                c = text[i]
+                if comment:
+                    if text.startswith('*/', i):
+                        comment = False
+                        i += 1
+                elif quote is not None:
+                    if c == '\\':
+                        i += 1
+                    elif c == quote:
+                        quote = None
+                elif text.startswith('//', i):
+                    break
+                elif text.startswith('/*', i):
+                    comment = True
+                    i += 1
+                elif c in '"\'':
+                    quote = c
+                elif c == '(':
+                    parens += 1
+                elif c == ')':
+                    parens -= 1
+                elif c == '{' and parens == 0:
+                    brackets += 1
+                elif c == '}' and parens == 0:
+                    brackets -= 1
+                    if brackets == 0:
+                        return cur_line
+                elif c == ';' and parens == 0 and brackets == 0:
+                    return cur_line
+                i += 1
+
+        return len(self._clines)
+
+    def write(self, buf):
+        """ Write C code lines and the code planned before each one.
+
+            Args:
+                buf (file): file object to write C code
+        """
+        for line, text in enumerate(self._clines, 1):
+            for code in self._before.get(line, []):
+                buf.write(code)
+            buf.write(text)
+
+    def _get_line(self, line):
+        """ Returns:
+                Given line or the last line if it is not in C code
+        """
+        if 1 <= line <= len(self._clines):
+            return line
+        return len(self._clines)
@@ -0,0 +1,269 @@
+import sys, os, gzip, json
+
+from cfg_nodes import CFGNodeType
+from cfg_nodes import CFGEntryNode
+from cfg import CFG
+
+
+class CFGExporter(object):
+    """ Base of all CFG writers. The CFG is explored once, in the same way by
+        every writer: for each function, its nodes in preorder and then its
+        edges in the order they are finished. Subclasses only write what is
+        given to each hook, straight to a buffered file.
+
+        Node ids are 'g<function id>n<node id>' and edge ids are
+        'g<function id>e<edge id>', as in .graphml.
+
+        If the file name ends with a compressed suffix, the file is written
+        through gzip.
+
+        Attributes:
+            BUFFER_SIZE (int): size in bytes of the file buffer
+            COMPRESSED_SUFFIXES (tuple): file name suffixes written by gzip
+    """
+    BUFFER_SIZE = 64 * 1024
+    COMPRESSED_SUFFIXES = ('.gz',)
+
+    def export(self, cfg, filename=''):
+        """ Write CFG to a file. However, if the file can not be written, i.e.
+            no filename is given, write it to standard output.
+
+            Args:
+                cfg (CFG): control flow graph
+                filename (string): file that the CFG should be written to
+        """
+        f = self._open(filename)
+        try:
+            self._write_cfg(f or sys.stdout, cfg)
+        finally:
+            if f is not None:
+                f.close()
+
+    def _open(self, filename):
+        """ Returns:
+                Buffered file object or None if it can not be opened
+        """
+        try:
+            if filename.endswith(self.COMPRESSED_SUFFIXES):
+                return gzip.open(filename, 'wb')
+            return open(filename, 'w', self.BUFFER_SIZE)
+        except IOError:
+            return None
+
+    def _write_cfg(self, buf, cfg):
+        """ Explore all functions and call the hooks of each part.
+
+            Args:
+                buf (file): file object to write CFG
+                cfg (CFG): control flow graph
+        """
+        self._start(buf, cfg)
+
+        if isinstance(cfg, CFG):
+            func_id = 0
+            for entry in cfg.get_entry_nodes():
+                func_id += 1
+                if not isinstance(entry, CFGEntryNode): continue
+
+                order = entry.get_order()
+                node_ids = {}
+                for nid, n in enumerate(order.get_preorder()):
+                    node_ids[n] = 'g%sn%s' % (func_id, nid)
+
+                self._start_func(buf, func_id, entry)
+                for nid, n in enumerate(order.get_preorder()):
+                    self._write_node(buf, func_id, nid, n, node_ids[n])
+                for eid, (n, child) in enumerate(order.get_edges()):
+                    self._write_edge(buf, 'g%se%s' % (func_id, eid),
+                            node_ids[n], node_ids[child],
+                            self._get_edge_rwcec(n, child))
+                self._end_func(buf, func_id, entry)
+
+        self._end(buf, cfg)
+
+    def _get_edge_rwcec(self, n, child):
+        """ RWCEC of an edge is RWCEC of its target.
+
+            Note: all nodes whose child is a WHILE, can not get its child RWCEC,
+            because RWCEC of a WHILE node is the value of the worst execution
+            of a loop. If current node has a WHILE as a child, so it is making
+            the loop cycle and all loop nodes were already executed once. Then,
+            the right RWCEC is the loop RWCEC minus the WCEC of one loop
+            iteration. This idea is applied only to nodes before loop condition
+            inside a loop.
+
+            Args:
+                n (CFGNode): edge source
+                child (CFGNode): edge target
+
+            Returns:
+                RWCEC of the edge (int)
+        """
+        rwcec = 0
+        if n.get_refnode() != child and child.get_type() == CFGNodeType.WHILE:
+            loop_wcec = ((child.get_rwcec() - child.get_wcec()) /
+                            child.get_loop_iters())
+            rwcec = child.get_rwcec() - loop_wcec
+
+        if rwcec == 0: # current node does not have a WHILE child
+            rwcec = child.get_rwcec()
+        return rwcec
+
+    def _start(self, buf, cfg):
+        """ Write what comes before all functions.
+        """
+        pass
+
+    def _start_func(self, buf, fid, entry):
+        """ Write what comes before the nodes of a function.
+
+            Args:
+                buf (file): file object to write CFG
+                fid (int): function id
+                entry (CFGEntryNode): function
+        """
+        pass
+
+    def _write_node(self, buf, fid, nid, n, node_id):
+        """ Write a node.
+
+            Args:
+                buf (file): file object to write CFG
+                fid (int): function id
+                nid (int): node id of the given function
+                n (CFGNode): control flow graph node
+                node_id (string): node id of the whole CFG
+        """
+        pass
+
+    def _write_edge(self, buf, edge_id, source, target, rwcec):
+        """ Write an edge.
+
+            Args:
+                buf (file): file object to write CFG
+                edge_id (string): edge id of the whole CFG
+                source (string): node id of the edge source
+                target (string): node id of the edge target
+                rwcec (int): RWCEC of the edge
+        """
+        pass
+
+    def _end_func(self, buf, fid, entry):
+        """ Write what comes after the edges of a function.
+        """
+        pass
+
+    def _end(self, buf, cfg):
+        """ Write what comes after all functions.
+        """
+        pass
+
+
+class CFG2JSONL(CFGExporter):
+    """ Write CFG as JSON Lines: one JSON object per line, first a 'function'
+        record, then a 'node' record for each of its nodes and an 'edge'
+        record for each of its edges. Node attributes have the same names as
+        .graphml keys.
+    """
+
+    def _start_func(self, buf, fid, entry):
+        self._write_record(buf, {
+            'record': 'function',
+            'id': 'g%s' % fid,
+            'name': entry.get_func_name()
+        })
+
+    def _write_node(self, buf, fid, nid, n, node_id):
+        self._write_record(buf, {
+            'record': 'node',
+            'id': node_id,
+            'node_type': n.get_type().lower(),
+            'start_line': n.get_start_line(),
+            'last_line': n.get_last_line(),
+            'function_owner': n.get_func_owner(),
+            'call': n.get_call_func_name(),
+            'refnode_wcec': n.get_refnode_rwcec(),
+            'iterations': n.get_loop_iters(),
+            'wcec': n.get_wcec(),
+            'rwcec': n.get_rwcec()
+        })
+
+    def _write_edge(self, buf, edge_id, source, target, rwcec):
+        self._write_record(buf, {
+            'record': 'edge',
+            'id': edge_id,
+            'source': source,
+            'target': target,
+            'rwcec': rwcec
+        })
+
+    def _write_record(self, buf, record):
+        """ Write a JSON object in its own line with sorted keys, so the same
+            CFG is always written in the same way.
+
+            Args:
+                buf (file): file object to write CFG
+                record (dic): JSON object
+        """
+        buf.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+class CFG2Dot(CFGExporter):
+    """ Write CFG in Graphviz DOT language. Each function is a cluster whose
+        nodes are labeled with their id, type, lines, WCEC and RWCEC. Edges
+        are labeled with their RWCEC.
+    """
+    def _start(self, buf, cfg):
+        buf.write('digraph cfg {\n')
+
+    def _start_func(self, buf, fid, entry):
+        buf.write('  subgraph cluster_g%s {\n' % fid)
+        buf.write('    label=%s;\n' % self._quote(entry.get_func_name()))
+
+    def _write_node(self, buf, fid, nid, n, node_id):
+        label = '%d %s\\n%d-%d\\nW.%d R.%d' % (nid, n.get_type().lower(),
+                n.get_start_line(), n.get_last_line(), n.get_wcec(),
+                n.get_rwcec())
+        buf.write('    %s [label="%s"];\n' % (node_id, label))
+
+    def _write_edge(self, buf, edge_id, source, target, rwcec):
+        buf.write('    %s -> %s [label="%d"];\n' % (source, target, rwcec))
+
+    def _end_func(self, buf, fid, entry):
+        buf.write('  }\n')
+
+    def _end(self, buf, cfg):
+        buf.write('}\n')
+
+    def _quote(self, name):
+        """ Returns:
+                DOT string of the given name
+        """
+        return '"%s"' % str(name).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def get_exporter(filename):
+    """ Choose a writer by the file name suffix.
+
+        Args:
+            filename (string): file that the CFG should be written to
+
+        Returns:
+            CFGExporter
+
+        Raises:
+            RuntimeError: if there is no writer for the file suffix
+    """
+    from cfg2graphml import CFG2Graphml
+
+    exporters = {
+        '.graphml': CFG2Graphml,
+        '.graphmlz': CFG2Graphml,
+        '.jsonl': CFG2JSONL,
+        '.dot': CFG2Dot
+    }
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    suffix = os.path.splitext(name)[1]
+    if suffix not in exporters:
+        raise RuntimeError('No CFG writer for ' + filename)
+    return exporters[suffix]()
@@ -28,10 +28,15 @@ class CFGEntryNode(object):
         Attributes:
             func_name (string): function name
             func_first_node (CFGNode): first node of the current function
+            order (CFGOrder): traversal order of the function graph, made
+                only when it is needed
     """
+    __slots__ = ('_func_name', '_func_first_node', '_order')
+
     def __init__(self, name, first_node):
         self._func_name = name
         self._func_first_node = first_node
+        self._order = None
 
     def get_func_name(self):
         """ Returns:
@@ -45,18 +50,290 @@ class CFGEntryNode(object):
         """
         return self._func_first_node
 
-    def show(self, buf=sys.stdout, indent=2):
+    def get_order(self):
+        """ Traversal order is computed once and shared by all passes over the
+            function graph. If the graph is changed, invalidate_order() must be
+            called.
+
+            Returns:
+                Traversal order of the function graph (CFGOrder)
+        """
+        if self._order is None:
+            self._order = CFGOrder(self.get_func_first_node())
+        return self._order
+
+    def invalidate_order(self):
+        """ Drop the traversal order, so it is made again on next use. It must
+            be called every time a node or an edge is added to or removed from
+            the function graph.
+        """
+        self._order = None
+
+    def pack(self, ast_ids=None):
+        """ Flatten the function graph into lists of plain values, where nodes
+            refer to each other by their position in preorder. So, the graph
+            can be pickled without recursion, i.e. to be sent to another
+            process. See unpack_entry_node().
+
+            Args:
+                ast_ids (dic): {pycparser/c_ast element: id} used to pack AST
+                    elements of each node. If it is None, only node lines are
+                    kept.
+
+            Returns:
+                Tuple (function name, list of packed nodes in preorder)
+        """
+        order = self.get_order()
+        node_ids = order.get_node_ids()
+        packed_nodes = []
+        for n in order.get_preorder():
+            refnode = None
+            if isinstance(n._refnode, CFGNode):
+                refnode = node_ids[n._refnode]
+            ast_elems = []
+            if ast_ids is not None:
+                ast_elems = [ast_ids[elem] for elem in n._ast_elem_list]
+
+            packed_nodes.append((n._type, n.get_start_line(),
+                    n.get_last_line(), n._func_owner, n._call_func_name,
+                    refnode, n._refnode_rwcec, n._loop_iters, n._wcec,
+                    n._rwcec, [node_ids[c] for c in n._children], ast_elems))
+
+        return (self._func_name, packed_nodes)
+
+    def show(self, buf=sys.stdout, indent=2, dump=False):
         """ Display current function and all its nodes.
 
             Args:
                 buf (file): file object to write CFG. If no file is provided,
                     then writes in standard output.
                 indent (int): indentation to apply in each tree level
+                dump (boolean): true if each node should be written only once
+                    with references to its children by node id. Otherwise,
+                    write the indented tree, which repeats shared subtrees.
         """
         lead = ' ' * indent
         buf.write((lead + 'entry point - %s\n') % self._func_name)
-        if isinstance(self._func_first_node, CFGNode):
-            self._func_first_node.show(buf=buf, lead=lead)
+        if not isinstance(self.get_func_first_node(), CFGNode): return
+
+        if dump:
+            self._dump(buf, lead + ' ')
+        else:
+            self.get_func_first_node().show(buf=buf, lead=lead)
+
+    def _dump(self, buf, lead):
+        """ Write each node once in preorder, i.e. the same order as node ids
+            in .graphml. Children, loop (PSEUDO) and called function (CALL)
+            are written as references, so it is linear in nodes and edges.
+
+            Args:
+                buf (file): file object to write CFG
+                lead (string): the spaces that precede each node
+        """
+        order = self.get_order()
+        node_ids = order.get_node_ids()
+        for n in order.get_preorder():
+            msg = (lead + 'n%d - %s, %d') % (node_ids[n],
+                    n.get_type().lower(), n.get_start_line())
+            if n.get_type() == CFGNodeType.PSEUDO:
+                msg += ' [loop n%d]' % node_ids[n.get_refnode()]
+            elif n.get_type() == CFGNodeType.CALL:
+                msg += ' [call %s]' % n.get_call_func_name()
+
+            children = ['n%d' % node_ids[c] for c in n.get_children()]
+            if children != []:
+                msg += ' -> ' + ', '.join(children)
+            buf.write(msg + '\n')
+
+
+def unpack_entry_node(packed, ast_elems=None):
+    """ Make again a function graph flattened by CFGEntryNode.pack(). CALL
+        nodes do not refer to the functions they call, since these functions
+        were not packed together.
+
+        Args:
+            packed (tuple): function graph made by CFGEntryNode.pack()
+            ast_elems (list): pycparser/c_ast elements by id, i.e. in the same
+                order used to make ast_ids given to CFGEntryNode.pack(). If it
+                is None, nodes do not keep AST elements.
+
+        Returns:
+            CFGEntryNode
+    """
+    func_name, packed_nodes = packed
+    nodes = [CFGNode(packed_node[0]) for packed_node in packed_nodes]
+    for n, packed_node in zip(nodes, packed_nodes):
+        (n._type, n._start_line, n._last_line, n._func_owner,
+                n._call_func_name, refnode, n._refnode_rwcec, n._loop_iters,
+                n._wcec, n._rwcec, children, ast_ids) = packed_node
+        if refnode is not None:
+            n._refnode = nodes[refnode]
+        n._children = [nodes[c] for c in children]
+        if ast_elems is not None:
+            n._ast_elem_list = [ast_elems[i] for i in ast_ids]
+
+    return CFGEntryNode(func_name, nodes[0])
+
+
+class CFGOrder(object):
+    """ Depth-first traversal of a function graph. The graph is explored in
+        the same way as every pass does: first the node, then its loop if it
+        is a PSEUDO node, then its children which were not visited yet. So,
+        passes iterate over flat lists instead of exploring the graph again.
+
+        Args:
+            first_node (CFGNode): first node of the function
+
+        Attributes:
+            preorder (list): nodes in the order they are discovered
+            postorder (list): nodes in the order they are finished
+            node_ids (dic): {node: position in preorder}
+            edges (list): tuples (node, child) in the order they are finished,
+                including the edge from a PSEUDO node to its loop
+            dfs_parents (dic): {node: node it was discovered from}
+            loops (dic): {node: PSEUDO node of the loop it was discovered in},
+                None if node was discovered out of any loop
+            loop_bodies (dic): {WHILE node: postorder of its loop body}
+    """
+    def __init__(self, first_node):
+        self._preorder = []
+        self._postorder = []
+        self._node_ids = {}
+        self._edges = []
+        self._dfs_parents = {}
+        self._loops = {}
+        self._loop_bodies = {}
+        if isinstance(first_node, CFGNode):
+            self._make_order(first_node)
+
+    def get_preorder(self):
+        """ Returns:
+                List of CFGNodes in the order they are discovered
+        """
+        return self._preorder
+
+    def get_postorder(self):
+        """ Returns:
+                List of CFGNodes in the order they are finished, i.e. a node
+                comes after all nodes discovered from it
+        """
+        return self._postorder
+
+    def get_rpo(self):
+        """ Returns:
+                List of CFGNodes in reverse postorder
+        """
+        return self._postorder[::-1]
+
+    def get_node_ids(self):
+        """ Returns:
+                Dic: {CFGNode: position in preorder}
+        """
+        return self._node_ids
+
+    def get_edges(self):
+        """ Returns:
+                List of tuples (CFGNode, child CFGNode) in the order they are
+                finished, including the edge from a PSEUDO node to its loop
+        """
+        return self._edges
+
+    def get_dfs_parents(self):
+        """ Returns:
+                Dic: {CFGNode: CFGNode it was discovered from}. The first node
+                does not have a parent.
+        """
+        return self._dfs_parents
+
+    def get_loops(self):
+        """ Returns:
+                Dic: {CFGNode: PSEUDO CFGNode of the loop it was discovered in
+                or None if it was discovered out of any loop}
+        """
+        return self._loops
+
+    def get_loop_body(self, loop_cond):
+        """ Loop body is made of all nodes reached from the loop condition by
+            children only, so inner loops are not included.
+
+            Args:
+                loop_cond (CFGNode): WHILE node
+
+            Returns:
+                List of CFGNodes of the loop body in postorder. The loop
+                condition is the last one.
+        """
+        if loop_cond not in self._loop_bodies:
+            body = []
+            children = lambda n, loop: [(c, None) for c in n.get_children()]
+            self._explore(loop_cond, None, children, None, body, None, None,
+                    None)
+            self._loop_bodies[loop_cond] = body
+        return self._loop_bodies[loop_cond]
+
+    def _make_order(self, first_node):
+        """ Explore function graph and keep the order of nodes and edges.
+
+            Args:
+                first_node (CFGNode): first node of the function
+        """
+        self._explore(first_node, None, self._successors, self._preorder,
+                self._postorder, self._edges, self._dfs_parents, self._loops)
+        for nid, n in enumerate(self._preorder):
+            self._node_ids[n] = nid
+
+    def _successors(self, n, loop):
+        """ Returns:
+                List of tuples (CFGNode, PSEUDO CFGNode of its loop) that are
+                explored from n. The loop of a PSEUDO node comes first.
+        """
+        succ = []
+        if (n.get_type() == CFGNodeType.PSEUDO
+                and isinstance(n.get_refnode(), CFGNode)):
+            succ.append((n.get_refnode(), n))
+        for child in n.get_children():
+            succ.append((child, loop))
+        return succ
+
+    def _explore(self, first_node, first_loop, successors, preorder,
+            postorder, edges, dfs_parents, loops):
+        """ Depth-first search with an explicit stack. Lists and dictionaries
+            that are None are not filled.
+
+            Args:
+                first_node (CFGNode): node to start from
+                first_loop (CFGNode): PSEUDO node of the first node loop
+                successors (function): given a node and its loop, returns a
+                    list of tuples (node, loop) to be explored
+                preorder (list): nodes in the order they are discovered
+                postorder (list): nodes in the order they are finished
+                edges (list): edges in the order they are finished
+                dfs_parents (dic): {node: node it was discovered from}
+                loops (dic): {node: PSEUDO node of its loop}
+        """
+        visited = {first_node: True}
+        if preorder is not None: preorder.append(first_node)
+        if loops is not None: loops[first_node] = first_loop
+        stack = [(first_node, iter(successors(first_node, first_loop)))]
+
+        while stack:
+            n, succ = stack[-1]
+            for child, loop in succ:
+                if child not in visited:
+                    visited[child] = True
+                    if preorder is not None: preorder.append(child)
+                    if dfs_parents is not None: dfs_parents[child] = n
+                    if loops is not None: loops[child] = loop
+                    stack.append((child, iter(successors(child, loop))))
+                    break
+                elif edges is not None:
+                    edges.append((n, child))
+            else:
+                # all successors were explored
+                stack.pop()
+                postorder.append(n)
+                if edges is not None and stack != []:
+                    edges.append((stack[-1][0], n))
 
 
 class CFGNode(object):
@@ -73,13 +350,21 @@ class CFGNode(object):
             func_owner (string): function name current node belongs to
             call_func_name (string): function name that is being called
             refnode (CFGNode): reference node for PSEUDO or CALL nodes
+            refnode_rwcec (int): RWCEC of the function called by a CALL node
             loop_wcec (int): loop WCEC
             loop_iters (int): number of iterations in a loop
             wcec (int): WCEC value
             rwcec (int): RWCEC value
             children (int): all children of the current node
             ast_elem_list (list): list of pycparser/c_ast elements
+
+        Note: nodes are slotted, so large graphs do not keep a dictionary per
+        node. After release_ast(), only lines and type are kept from the AST.
     """
+    __slots__ = ('_type', '_start_line', '_last_line', '_func_owner',
+            '_call_func_name', '_refnode', '_refnode_rwcec', '_loop_iters',
+            '_wcec', '_rwcec', '_children', '_ast_elem_list')
+
     def __init__(self, type):
         self._type = type
         self._start_line = 0
@@ -87,6 +372,7 @@ class CFGNode(object):
         self._func_owner = None
         self._call_func_name = None
         self._refnode = None
+        self._refnode_rwcec = 0
         self._loop_iters = 0
         self._wcec = 0
         self._rwcec = 0
@@ -107,6 +393,15 @@ class CFGNode(object):
         """
         return self._type
 
+    def set_start_line(self, line):
+        """ Set node first line when there are no AST elements, i.e. when
+            the node is loaded from a .graphml file.
+
+            Args:
+                line (int): first line in C code
+        """
+        self._start_line = line
+
     def get_start_line(self):
         """ Return node first line related to the first pycparser/c_ast element
             added.
@@ -119,6 +414,15 @@ class CFGNode(object):
 
         return self._start_line
 
+    def set_last_line(self, line):
+        """ Set node last line when there are no AST elements, i.e. when
+            the node is loaded from a .graphml file.
+
+            Args:
+                line (int): last line in C code
+        """
+        self._last_line = line
+
     def get_last_line(self):
         """ Return node last line related to the last pycparser/c_ast element
             added.
@@ -179,6 +483,16 @@ class CFGNode(object):
         """
         return self._refnode
 
+    def set_refnode_rwcec(self, rwcec):
+        """ Set RWCEC of the function called by a CALL node. It is set once
+            the called function is done, so it is not looked up again on every
+            access.
+
+            Args:
+                rwcec (int): RWCEC of the called function
+        """
+        self._refnode_rwcec = rwcec
+
     def get_refnode_rwcec(self):
         """ RWCEC of referenced node is applied in only two cases: when current
             current node is a PSEUDO one or it is of type CALL. If it is
@@ -193,10 +507,8 @@ class CFGNode(object):
                 and isinstance(self._refnode, CFGNode)):
             return self._refnode.get_rwcec()
 
-        elif (self._type == CFGNodeType.CALL
-                and isinstance(self._refnode, CFGEntryNode)
-                and isinstance(self._refnode.get_func_first_node(), CFGNode)):
-            return self._refnode.get_func_first_node().get_rwcec()
+        elif self._type == CFGNodeType.CALL:
+            return self._refnode_rwcec
 
         return 0
 
@@ -237,10 +549,8 @@ class CFGNode(object):
                 isinstance(self._refnode, CFGNode)):
             return self._refnode.get_wcec()
 
-        elif (self._type == CFGNodeType.CALL
-                and isinstance(self._refnode, CFGEntryNode)
-                and isinstance(self._refnode.get_func_first_node(), CFGNode)):
-            return self._wcec + self.get_refnode_rwcec()
+        elif self._type == CFGNodeType.CALL:
+            return self._wcec + self._refnode_rwcec
 
         return self._wcec
 
@@ -294,8 +604,18 @@ class CFGNode(object):
         """
         return self._ast_elem_list
 
+    def release_ast(self):
+        """ Keep start and last lines and drop all AST elements, so this node
+            does not hold the AST in memory anymore.
+        """
+        self.get_start_line()
+        self.get_last_line()
+        self._ast_elem_list = []
+
     def show(self, buf=sys.stdout, indent=1, lead=''):
-        """ Display current node line and its children.
+        """ Display current node line and its children. The tree is written
+            with an explicit stack, so deep graphs do not reach the recursion
+            limit.
 
             Args:
                 buf (file): file object to write CFG. If no file is provided,
@@ -303,19 +623,30 @@ class CFGNode(object):
                 indent (int): indentation to apply in each tree level
                 lead (string): the number of spaces that precedes current node
         """
-        lead += ' ' * indent
-
-        msg = ((lead + '- %s, %d\n')
-                % (self.get_type().lower(), self.get_start_line()))
-        buf.write(msg)
-
-        if self._type == CFGNodeType.PSEUDO:
-            self.get_refnode().show(buf, indent, lead + '|') # write loop
-
-        for child in self._children:
-            if child.get_type() == CFGNodeType.WHILE:
-                msg = ((lead + '| - %s, %d\n')
-                        % (child.get_type().lower(), child.get_start_line()))
-                buf.write(msg)
-            else:
-                child.show(buf, indent, lead + '|')
+        # stack of (node, lead) or (message, None) to be written
+        stack = [(self, lead)]
+        while stack:
+            n, lead = stack.pop()
+            if lead is None:
+                buf.write(n)
+                continue
+
+            lead += ' ' * indent
+
+            msg = ((lead + '- %s, %d\n')
+                    % (n.get_type().lower(), n.get_start_line()))
+            buf.write(msg)
+
+            todo = []
+            if n.get_type() == CFGNodeType.PSEUDO:
+                todo.append((n.get_refnode(), lead + '|')) # write loop
+
+            for child in n.get_children():
+                if child.get_type() == CFGNodeType.WHILE:
+                    msg = ((lead + '| - %s, %d\n') % (child.get_type().lower(),
+                            child.get_start_line()))
+                    todo.append((msg, None))
+                else:
+                    todo.append((child, lead + '|'))
+
+            stack.extend(reversed(todo))
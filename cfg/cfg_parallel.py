@@ -0,0 +1,309 @@
+import sys, os
+import multiprocessing
+
+thisdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,  os.path.join(thisdir, 'pycparser'))
+
+from pycparser import c_ast, c_generator
+
+from cfg_nodes import unpack_entry_node
+from cfg_ast_visitor import CFGAstVisitor
+from cfg_call_graph import CFGCallGraph
+from cfg_wcec import CFGWCEC
+
+
+class CFGParallel(object):
+    """ Make the CFG of each function of a C file apart, possibly in a pool of
+        processes. Each worker makes the graph, WCEC and RWCEC of one function
+        definition.
+
+        RWCEC of a function depends on RWCEC of functions it calls, so
+        functions are sent by call-graph level: a level is sent only after all
+        functions of lower levels are done. The call graph is made from the
+        AST, before any CFG exists.
+
+        Graphs are sent back flattened, see CFGEntryNode.pack(), and they are
+        merged into the same entry nodes CFGAstVisitor would make.
+
+        If a cache is given, functions are kept in it by a key made of their
+        source, lines, assembler cycles and loop bounds. Lines are taken from
+        the function first line, so a function moved by an edit above it has
+        the same key and only its node lines are moved. A function whose key
+        is found is not made again: only its RWCEC is computed again, and
+        only if RWCEC of a function it calls has changed.
+
+        Args:
+            jobs (int): number of worker processes. If it is None, use one
+                process per CPU. If it is 1, functions are done by this
+                process.
+            release_ast (boolean): true if nodes should not keep AST elements
+            cache (CFGCache): on-disk cache of functions or None
+
+        Attributes:
+            _jobs (int): number of worker processes
+            _release_ast (boolean): true if nodes should not keep AST elements
+            _cache (CFGCache): on-disk cache of functions or None
+            _reused (list): names of functions taken from the cache by the
+                last make_cfg()
+    """
+    CACHE_NAMESPACE = 'func'
+
+    def __init__(self, jobs=None, release_ast=False, cache=None):
+        self._jobs = jobs or multiprocessing.cpu_count()
+        self._release_ast = release_ast
+        self._cache = cache
+        self._reused = []
+
+    def get_reused(self):
+        """ Returns:
+                List of function names taken from the cache by the last
+                make_cfg()
+        """
+        return self._reused
+
+    def make_cfg(self, ast, wcec):
+        """ Make the CFG of all function definitions and compute their WCEC and
+            RWCEC.
+
+            Args:
+                ast (pycparser/c_ast): Abstract Syntax Tree
+                wcec (CFGWCEC): WCEC analysis of the C file, which gives the
+                    C line-cycles table and loop bounds
+
+            Returns:
+                list of all functions, as made by CFGAstVisitor
+
+            Raises:
+                RuntimeError: if there are recursive functions
+        """
+        funcdefs = [ext for ext in ast.ext if isinstance(ext, c_ast.FuncDef)]
+        func_ids = dict((self._get_func_name(funcdef), fid)
+                for fid, funcdef in enumerate(funcdefs))
+        call_graph = CFGCallGraph()
+        call_graph.add_funcdefs(funcdefs)
+        levels = call_graph.get_levels()
+
+        cline_cycle_table = wcec.get_cline_cycle_table()
+        loop_bound_index = wcec.get_loop_bound_index()
+        # functions kept in the cache need their AST ids
+        pack_ast = not self._release_ast or self._cache is not None
+
+        self._reused = []
+        packed_entries = [None] * len(funcdefs)
+        func_rwcecs = {}
+        pool = None
+        if self._jobs != 1:
+            pool = multiprocessing.Pool(self._jobs)
+        try:
+            for level in levels:
+                tasks = []
+                keys = {}
+                for name in level:
+                    fid = func_ids[name]
+                    callee_rwcecs = dict((callee, func_rwcecs[callee])
+                            for callee in call_graph.get_callees(name)
+                            if callee in func_rwcecs)
+                    cline_cycles = cline_cycle_table.get(name, {})
+
+                    if self._cache is not None:
+                        first_line = self._get_first_line(funcdefs[fid])
+                        key = self._make_func_key(funcdefs[fid], first_line,
+                                cline_cycles, loop_bound_index)
+                        keys[fid] = (key, first_line, callee_rwcecs)
+                        found = self._reuse_func(key, first_line,
+                                funcdefs[fid], wcec, callee_rwcecs)
+                        if found is not None:
+                            packed_entries[fid], func_rwcecs[name] = found
+                            self._reused.append(name)
+                            continue
+
+                    tasks.append((fid, funcdefs[fid], cline_cycles,
+                            loop_bound_index, callee_rwcecs, pack_ast))
+
+                if pool is None:
+                    results = (_analyze_func(task) for task in tasks)
+                else:
+                    results = pool.imap_unordered(_analyze_func, tasks)
+
+                for fid, packed, rwcec in results:
+                    packed_entries[fid] = packed
+                    if packed is None: continue
+                    func_rwcecs[self._get_func_name(funcdefs[fid])] = rwcec
+                    if fid in keys:
+                        key, first_line, callee_rwcecs = keys[fid]
+                        self._cache.put(self.CACHE_NAMESPACE, key,
+                                (packed, first_line, callee_rwcecs, rwcec))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        entry_nodes = []
+        for fid, packed in enumerate(packed_entries):
+            if packed is None: continue
+            ast_elems = None
+            if not self._release_ast:
+                ast_elems = _number_ast(funcdefs[fid])
+            entry_nodes.append(unpack_entry_node(packed, ast_elems))
+
+        return CFGAstVisitor().link_entry_nodes(entry_nodes)
+
+    def _get_first_line(self, funcdef):
+        """ Returns:
+                First line of a function definition (int)
+        """
+        lines = [elem.coord.line for elem in _number_ast(funcdef)
+                if elem.coord]
+        return min(lines) if lines else 0
+
+    def _make_func_key(self, funcdef, first_line, cline_cycles,
+            loop_bound_index):
+        """ Make the cache key of a function. Besides its source, the key has
+            the line of each AST element, since nodes keep lines, and the
+            cycles and loop bounds of these lines. All lines are taken from
+            the function first line, so the key does not change when lines
+            are added or removed above the function.
+
+            Args:
+                funcdef (pycparser/c_ast/FuncDef): function definition
+                first_line (int): first line of the function
+                cline_cycles (dic): {cline: cycles} of the function
+                loop_bound_index (dic): {loop condition line: iterations}
+
+            Returns:
+                Cache key (string)
+        """
+        elems = _number_ast(funcdef)
+        lines = [elem.coord.line - first_line if elem.coord else None
+                for elem in elems]
+        last_line = max(line for line in lines if line is not None)
+        loop_bounds = sorted((line - first_line, iters)
+                for line, iters in loop_bound_index.items()
+                if 0 <= line - first_line <= last_line)
+
+        return self._cache.make_key(
+                c_generator.CGenerator().visit(funcdef),
+                [(type(elem).__name__, line)
+                    for elem, line in zip(elems, lines)],
+                sorted((cline - first_line, cycles)
+                    for cline, cycles in cline_cycles.items()),
+                loop_bounds)
+
+    def _reuse_func(self, key, first_line, funcdef, wcec, callee_rwcecs):
+        """ Look up a function in the cache. If the function was moved since
+            it was kept, its node lines are moved too. If RWCEC of a function
+            it calls has changed since it was kept, its RWCEC is computed
+            again and it is kept again.
+
+            Args:
+                key (string): function key, see _make_func_key()
+                first_line (int): first line of the function
+                funcdef (pycparser/c_ast/FuncDef): function definition
+                wcec (CFGWCEC): WCEC analysis of the C file
+                callee_rwcecs (dic): {function name: RWCEC} of functions
+                    called by the function
+
+            Returns:
+                Tuple (packed CFGEntryNode, function RWCEC) or None if the
+                function is not in the cache
+        """
+        found = self._cache.get(self.CACHE_NAMESPACE, key)
+        if found is None: return None
+
+        packed, cached_first_line, cached_callee_rwcecs, rwcec = found
+        if cached_first_line != first_line:
+            packed = _move_packed_lines(packed, first_line - cached_first_line)
+        if cached_callee_rwcecs == callee_rwcecs:
+            return (packed, rwcec)
+
+        ast_elems = _number_ast(funcdef)
+        entry = unpack_entry_node(packed, ast_elems)
+        rwcec = wcec.compute_func_rwcec(entry, callee_rwcecs)
+        packed = entry.pack(dict((elem, i) for i, elem in enumerate(ast_elems)))
+        self._cache.put(self.CACHE_NAMESPACE, key,
+                (packed, first_line, callee_rwcecs, rwcec))
+        return (packed, rwcec)
+
+    def _get_func_name(self, funcdef):
+        """ Returns:
+                Function name (string) or None if it has no declaration
+        """
+        if isinstance(funcdef.decl, c_ast.Decl):
+            return funcdef.decl.name
+        return None
+
+
+def _number_ast(ast):
+    """ List all elements of an AST in preorder with an explicit stack. The
+        same AST always gives the same list, even after it is pickled, so the
+        position of an element is its id.
+
+        Args:
+            ast (pycparser/c_ast): AST element
+
+        Returns:
+            List of pycparser/c_ast elements
+    """
+    elems = []
+    stack = [ast]
+    while stack:
+        elem = stack.pop()
+        elems.append(elem)
+        children = [child for name, child in elem.children()]
+        stack.extend(reversed(children))
+    return elems
+
+def _move_packed_lines(packed, offset):
+    """ Move the lines of a function graph flattened by CFGEntryNode.pack().
+        Lines of nodes without lines, i.e. 0, are kept.
+
+        Args:
+            packed (tuple): function graph made by CFGEntryNode.pack()
+            offset (int): number of lines to add to each node line
+
+        Returns:
+            Tuple (function name, list of packed nodes in preorder)
+    """
+    func_name, packed_nodes = packed
+    moved_nodes = []
+    for packed_node in packed_nodes:
+        start_line, last_line = packed_node[1:3]
+        if start_line != 0:
+            start_line += offset
+        if last_line != 0:
+            last_line += offset
+        moved_nodes.append(packed_node[:1] + (start_line, last_line) +
+                packed_node[3:])
+    return (func_name, moved_nodes)
+
+def _analyze_func(task):
+    """ Make the CFG of one function definition and compute its WCEC and
+        RWCEC. This is done by a worker process, so it must be a module
+        function.
+
+        Args:
+            task (tuple): (function id, FuncDef, C line-cycles table of the
+                function, loop bound index, {function name: RWCEC} of called
+                functions, true if AST elements should be packed)
+
+        Returns:
+            Tuple (function id, packed CFGEntryNode, function RWCEC). Packed
+            entry node is None if the function has no statements.
+    """
+    (fid, funcdef, cline_cycles, loop_bound_index, callee_rwcecs,
+            pack_ast) = task
+
+    ast_visitor = CFGAstVisitor()
+    entry_nodes = ast_visitor.make_cfg_from_ast(c_ast.FileAST([funcdef]))
+    if entry_nodes == []:
+        return (fid, None, 0)
+
+    wcec = CFGWCEC()
+    wcec.set_loop_bound_index(loop_bound_index)
+    rwcec = wcec.compute_func_wcec(entry_nodes[0], cline_cycles,
+            callee_rwcecs)
+
+    ast_ids = None
+    if pack_ast:
+        ast_ids = dict((elem, i) for i, elem in enumerate(_number_ast(funcdef)))
+    return (fid, entry_nodes[0].pack(ast_ids), rwcec)
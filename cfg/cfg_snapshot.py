@@ -0,0 +1,290 @@
+import struct, mmap
+
+from cfg_nodes import CFGNodeType, CFGEntryNode, CFGNode
+from cfg_arrays import NODE_TYPES
+
+
+class CFGSnapshot(object):
+    """ Binary snapshot of an annotated CFG. Every section is an array of
+        fixed-width little-endian records, so a snapshot is opened by mapping
+        the file in memory and nothing is read until it is needed:
+
+            header: magic, version, number of records and offset of each
+                section, see HEADER
+            functions: name and range of nodes of each function, see FUNC
+            nodes: all nodes of all functions, each function in preorder, see
+                NODE. Reference node is a node index for PSEUDO nodes and a
+                function index for CALL nodes, or -1.
+            children: node indices, where children of a node are
+                children[child_offset:child_offset + child_count]
+            strings: offset and length of each name, see STRING, followed by
+                all names in UTF-8
+
+        Node types are kept as codes of cfg_arrays.NODE_TYPES. Names are kept
+        once in the strings section and nodes refer to them by index, or -1
+        for no name.
+
+        Note: RWCEC of a function depends on WCEC of nodes, so a snapshot is
+        meant to be read, not changed.
+    """
+    MAGIC = b'CFGSNAP\0'
+    VERSION = 1
+
+    # magic, version, functions, nodes, children, strings and the offset of
+    # functions, nodes, children and strings sections
+    HEADER = struct.Struct('<8sIIIIIQQQQ')
+    # name, first node, number of nodes
+    FUNC = struct.Struct('<iqq')
+    # type, start line, last line, owner, call, loop iterations, WCEC, RWCEC,
+    # RWCEC of the called function, reference node, child offset, children
+    NODE = struct.Struct('<biiiiiqqqqqi')
+    CHILD = struct.Struct('<q')
+    # offset in names, length
+    STRING = struct.Struct('<qi')
+
+    def save(self, cfg, filename):
+        """ Write a snapshot of all functions of the given CFG.
+
+            Args:
+                cfg (CFG): control flow graph with WCEC and RWCEC
+                filename (string): snapshot file name
+        """
+        type_codes = dict((t, code) for code, t in enumerate(NODE_TYPES))
+        strings = []
+        string_ids = {}
+        def string_id(name):
+            if name is None: return -1
+            if name not in string_ids:
+                string_ids[name] = len(strings)
+                strings.append(name)
+            return string_ids[name]
+
+        entries = cfg.get_entry_nodes()
+        entry_ids = dict((entry, fid) for fid, entry in enumerate(entries))
+
+        funcs = []
+        nodes = []
+        children = []
+        for entry in entries:
+            first = len(nodes)
+            order = entry.get_order()
+            node_ids = order.get_node_ids()
+            for n in order.get_preorder():
+                refnode = n.get_refnode()
+                ref = -1
+                wcec = n.get_wcec()
+                refnode_rwcec = 0
+                if n.get_type() == CFGNodeType.CALL:
+                    # WCEC of a CALL node has the RWCEC of the called function
+                    refnode_rwcec = n.get_refnode_rwcec()
+                    wcec -= refnode_rwcec
+                    ref = entry_ids.get(refnode, -1)
+                elif isinstance(refnode, CFGNode) and refnode in node_ids:
+                    ref = first + node_ids[refnode]
+
+                nodes.append(self.NODE.pack(type_codes[n.get_type()],
+                        n.get_start_line(), n.get_last_line(),
+                        string_id(n.get_func_owner()),
+                        string_id(n.get_call_func_name()), n.get_loop_iters(),
+                        wcec, n.get_rwcec(), refnode_rwcec, ref, len(children),
+                        len(n.get_children())))
+                for child in n.get_children():
+                    children.append(self.CHILD.pack(first + node_ids[child]))
+
+            funcs.append(self.FUNC.pack(string_id(entry.get_func_name()),
+                    first, len(nodes) - first))
+
+        names = []
+        string_records = []
+        offset = 0
+        for name in strings:
+            data = name
+            if not isinstance(data, bytes):
+                data = data.encode('utf-8')
+            string_records.append(self.STRING.pack(offset, len(data)))
+            names.append(data)
+            offset += len(data)
+
+        funcs_offset = self.HEADER.size
+        nodes_offset = funcs_offset + len(funcs) * self.FUNC.size
+        children_offset = nodes_offset + len(nodes) * self.NODE.size
+        strings_offset = children_offset + len(children) * self.CHILD.size
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, len(funcs),
+                len(nodes), len(children), len(strings), funcs_offset,
+                nodes_offset, children_offset, strings_offset)
+
+        with open(filename, 'wb') as f:
+            f.write(header)
+            for section in (funcs, nodes, children, string_records, names):
+                f.write(b''.join(section))
+
+    def load(self, filename):
+        """ Map a snapshot in memory and make its entry nodes. Nodes of a
+            function are made only when its first node is asked for.
+
+            Args:
+                filename (string): snapshot file name
+
+            Returns:
+                List of CFGSnapshotEntryNodes
+
+            Raises:
+                RuntimeError: if the file is not a snapshot of this version
+        """
+        with open(filename, 'rb') as f:
+            f.seek(0, 2)
+            if f.tell() < self.HEADER.size:
+                raise RuntimeError('Not a CFG snapshot: ' + filename)
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, func_count, node_count, child_count, string_count,
+                funcs_offset, nodes_offset, children_offset,
+                strings_offset) = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            raise RuntimeError('Not a CFG snapshot: ' + filename)
+        if version != self.VERSION:
+            raise RuntimeError('Unsupported CFG snapshot version %d: %s' %
+                    (version, filename))
+
+        reader = CFGSnapshotReader(data, nodes_offset, children_offset,
+                strings_offset, string_count)
+        entries = []
+        for fid in range(func_count):
+            name, first, count = self.FUNC.unpack_from(data,
+                    funcs_offset + fid * self.FUNC.size)
+            entries.append(CFGSnapshotEntryNode(reader.get_string(name),
+                    reader, first, count))
+        reader.set_entry_nodes(entries)
+
+        return entries
+
+
+class CFGSnapshotReader(object):
+    """ Make nodes from a snapshot mapped in memory.
+
+        Args:
+            data (mmap): snapshot file
+            nodes_offset (int): offset of nodes section
+            children_offset (int): offset of children section
+            strings_offset (int): offset of strings section
+            string_count (int): number of names
+
+        Attributes:
+            data (mmap): snapshot file
+            nodes_offset (int): offset of nodes section
+            children_offset (int): offset of children section
+            strings_offset (int): offset of strings section
+            names_offset (int): offset of names after strings records
+            strings (dic): {string index: name} of names already read
+            entry_nodes (list): all functions of the snapshot
+    """
+    def __init__(self, data, nodes_offset, children_offset, strings_offset,
+            string_count):
+        self._data = data
+        self._nodes_offset = nodes_offset
+        self._children_offset = children_offset
+        self._strings_offset = strings_offset
+        self._names_offset = (strings_offset +
+                string_count * CFGSnapshot.STRING.size)
+        self._strings = {}
+        self._entry_nodes = []
+
+    def set_entry_nodes(self, entry_nodes):
+        """ Args:
+                entry_nodes (list): all functions, so CALL nodes can refer to
+                    them
+        """
+        self._entry_nodes = entry_nodes
+
+    def get_string(self, sid):
+        """ Args:
+                sid (int): string index or -1
+
+            Returns:
+                Name (string) in UTF-8 or None
+        """
+        if sid < 0: return None
+        if sid not in self._strings:
+            offset, length = CFGSnapshot.STRING.unpack_from(self._data,
+                    self._strings_offset + sid * CFGSnapshot.STRING.size)
+            start = self._names_offset + offset
+            self._strings[sid] = self._data[start:start + length]
+        return self._strings[sid]
+
+    def make_func_nodes(self, first, count):
+        """ Make all nodes of a function and link them.
+
+            Args:
+                first (int): index of the function first node
+                count (int): number of nodes of the function
+
+            Returns:
+                First node of the function (CFGNode) or None if it has no nodes
+        """
+        nodes = []
+        links = []
+        for i in range(first, first + count):
+            (type_code, start_line, last_line, owner, call, loop_iters, wcec,
+                    rwcec, refnode_rwcec, ref, child_offset,
+                    child_count) = CFGSnapshot.NODE.unpack_from(self._data,
+                            self._nodes_offset + i * CFGSnapshot.NODE.size)
+
+            n = CFGNode(NODE_TYPES[type_code])
+            n.set_start_line(start_line)
+            n.set_last_line(last_line)
+            n.set_func_owner(self.get_string(owner))
+            n.set_call_func_name(self.get_string(call))
+            n.set_loop_iters(loop_iters)
+            n.set_wcec(wcec)
+            n.set_rwcec(rwcec)
+            n.set_refnode_rwcec(refnode_rwcec)
+            nodes.append(n)
+            links.append((ref, child_offset, child_count))
+
+        for n, (ref, child_offset, child_count) in zip(nodes, links):
+            if ref >= 0 and n.get_type() == CFGNodeType.CALL:
+                n.set_refnode(self._entry_nodes[ref])
+            elif ref >= 0:
+                n.set_refnode(nodes[ref - first])
+
+            for i in range(child_offset, child_offset + child_count):
+                child, = CFGSnapshot.CHILD.unpack_from(self._data,
+                        self._children_offset + i * CFGSnapshot.CHILD.size)
+                n.add_child(nodes[child - first])
+
+        if nodes == []: return None
+        return nodes[0]
+
+
+class CFGSnapshotEntryNode(CFGEntryNode):
+    """ Function of a snapshot, whose nodes are made on first access.
+
+        Args:
+            name (string): function name
+            reader (CFGSnapshotReader): snapshot reader
+            first (int): index of the function first node
+            count (int): number of nodes of the function
+
+        Attributes:
+            reader (CFGSnapshotReader): snapshot reader, None once nodes are
+                made
+            first (int): index of the function first node
+            count (int): number of nodes of the function
+    """
+    __slots__ = ('_reader', '_first', '_count')
+
+    def __init__(self, name, reader, first, count):
+        super(CFGSnapshotEntryNode, self).__init__(name, None)
+        self._reader = reader
+        self._first = first
+        self._count = count
+
+    def get_func_first_node(self):
+        """ Returns:
+                First node of the current function (CFGNode)
+        """
+        if self._reader is not None:
+            self._func_first_node = self._reader.make_func_nodes(self._first,
+                    self._count)
+            self._reader = None
+        return self._func_first_node
@@ -1,12 +1,18 @@
-import sys, os, re
+import sys, os, re, bisect, itertools, threading
 
 thisdir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0,  os.path.join(thisdir, 'pycparser'))
 
-from subprocess import Popen, PIPE
+from subprocess import Popen, PIPE, CalledProcessError
+from pycparser import preprocess_file
 
-from cfg_nodes import CFGNodeType, CFGEntryNode, CFGNode
+from cfg_nodes import CFGNodeType, CFGNode
+from cfg_call_graph import CFGCallGraph
 
+# Processes are created one at a time. subprocess of Python 2 is not safe when
+# two threads create processes at once, and a child may also keep the pipe of
+# another one open, so its reader never gets end of file. See start_asm().
+PROCESS_LOCK = threading.Lock()
 
 class CFGWCEC(object):
     """ Compute WCEC and RWCEC for each node of the given CFG. It also takes
@@ -16,28 +22,209 @@ class CFGWCEC(object):
         Args:
             cfile (string): C file name
             cfg (CFG): control flow graph made from AST
+            cache (CFGCache): on-disk cache to keep the assembler table of
+                each C file. If it is None, the compiler always runs.
+            loop_bounds (dic or string): maximum number of iterations of
+                loops, {loop condition line: iterations}, or the name of a
+                file where each line is '<loop condition line> <iterations>'.
+                They take precedence over '// @LOOP <number>' tags.
+            asm_file (string): assembler code already made from the C file,
+                either gcc '-g -S' output or 'objdump -dl' output. If it is
+                given, the compiler does not run at all.
 
         Attributes:
             _cfile (string): C file name
             _cfg (CFG): control flow graph made from AST
+            _cache (CFGCache): on-disk cache of assembler tables
+            _loop_bounds (dic or string): loop bounds given by the user
+            _loop_bound_index (dic): {loop condition line: iterations} of
+                all loops, made only once per analysis
+            _asm_file (string): assembler code file given by the user
+            _asm_thread (Thread): thread making the C line-cycles table, see
+                start_asm()
+            _asm_result (dic): {'table': C line-cycles table} or
+                {'error': exception} once _asm_thread is done
+            _cpp_text (string): preprocessed C file given by the CFG, so it
+                is not preprocessed again for the cache key
     """
-    def __init__(self, cfile=None, cfg=None):
+    ASM_CC_PATH = '../tools/toolschain/4.4.3/bin/arm-none-linux-gnueabi-gcc'
+    ASM_CC_ARGS = ['-march=armv4t', '-g', '-S']
+    CPP_PATH = 'gcc'
+    CPP_ARGS = ['-E']
+    LOOP_PATTERN = re.compile(r'[^//]*\s*[@LOOP]\s*(\d+)')
+
+    # assembler patterns, all of them anchored at the line beginning
+    ASM_FUNC_PATTERN = re.compile(r'(\w+):')
+    ASM_LOC_PATTERN = re.compile(r'\s*\.loc\b\s+\d+\s+(\d+)\s+')
+    ASM_INSTR_PATTERN = re.compile(r'\s+(\w+)')
+
+    # objdump patterns: file header '<file>:     file format <format>',
+    # function '<address> <name>:', C line '<file>:<line>' and instruction
+    # '<address>:<tab><bytes><tab><instruction>'
+    OBJDUMP_HEADER_PATTERN = re.compile(r'\S.*:\s+file format\s')
+    OBJDUMP_FUNC_PATTERN = re.compile(r'[0-9a-fA-F]+\s+<(\w+)>:')
+    OBJDUMP_LINE_PATTERN = re.compile(
+            r'\S.*:(\d+)(\s+\(discriminator\s+\d+\))?\s*$')
+    OBJDUMP_INSTR_PATTERN = re.compile(
+            r'\s+[0-9a-fA-F]+:\t[0-9a-fA-F ]+\t(\w+)')
+
+    def __init__(self, cfile=None, cfg=None, cache=None, loop_bounds=None,
+            asm_file=None):
         self._cfile = cfile
         self._cfg = cfg
+        self._cache = cache
+        self._loop_bounds = loop_bounds
+        self._loop_bound_index = None
+        self._asm_file = asm_file
+        self._asm_thread = None
+        self._asm_result = None
+        self._cpp_text = None
+
+    def set_cpp_text(self, text):
+        """ Set the preprocessed C file, already made to parse it, so the
+            cache key of the assembler table does not preprocess it again.
+
+            Args:
+                text (string): preprocessed C file
+        """
+        self._cpp_text = text
+
+    def start_asm(self):
+        """ Start making the C line-cycles table in a background thread, so
+            the compiler runs while the C file is parsed and its CFG is made.
+            The thread is joined by compute_cfg_wcec() or stop_asm(). The
+            table depends only on the C file, so the CFG does not need to be
+            done yet. Any process run at the same time must be created while
+            holding PROCESS_LOCK.
+        """
+        if self._asm_thread is not None: return
+
+        self._asm_result = {}
+        self._asm_thread = threading.Thread(target=self._run_asm)
+        self._asm_thread.daemon = True
+        self._asm_thread.start()
+
+    def stop_asm(self):
+        """ Wait for the thread started by start_asm(), if any, and drop its
+            table. It is used when the CFG can not be made, so the compiler is
+            never left running.
+        """
+        if self._asm_thread is None: return
+
+        self._asm_thread.join()
+        self._asm_thread = None
+        self._asm_result = None
 
     def compute_cfg_wcec(self):
         """ Compute CFG WCEC for all nodes.
         """
         if self._cfg is None: return
 
+        # make C line-cycles table
+        cline_cycle_table = self.get_cline_cycle_table()
+
+        self._compute_wcec(self._cfg, cline_cycle_table)
+        self._compute_cfg_rwcec(self._cfg)
+
+    def compute_func_wcec(self, entry, cline_cycles, callee_rwcecs):
+        """ Compute WCEC and RWCEC of one function whose called functions
+            are already done. It does not need the whole CFG, so it can run in
+            another process, see CFGParallel.
+
+            Args:
+                entry (CFGEntryNode): function to be visited
+                cline_cycles (dic): {cline1: cycles1, cline2: cycles2, ...} of
+                    the function
+                callee_rwcecs (dic): {function name: RWCEC} of functions
+                    called by the function
+
+            Returns:
+                RWCEC of the function (int)
+        """
+        line_costs = CFGLineCosts(cline_cycles)
+        preorder = entry.get_order().get_preorder()
+        for nid, n in enumerate(preorder):
+            self._compute_node_wcec(n, nid == 0, line_costs)
+
+        return self.compute_func_rwcec(entry, callee_rwcecs)
+
+    def compute_func_rwcec(self, entry, callee_rwcecs):
+        """ Compute RWCEC of one function whose WCEC is already done, i.e.
+            again after RWCEC of a called function has changed.
+
+            Args:
+                entry (CFGEntryNode): function to be visited
+                callee_rwcecs (dic): {function name: RWCEC} of functions
+                    called by the function
+
+            Returns:
+                RWCEC of the function (int)
+        """
+        for n in entry.get_order().get_preorder():
+            if n.get_type() == CFGNodeType.CALL:
+                n.set_refnode_rwcec(callee_rwcecs.get(n.get_call_func_name(),
+                        0))
+
+        self._compute_func_rwcec(entry, {})
+        return entry.get_func_first_node().get_rwcec()
+
+    def get_loop_bound_index(self):
+        """ Returns:
+                Dic: {loop condition line: iterations} of all loops, see
+                _make_loop_bound_index()
+        """
+        if self._loop_bound_index is None:
+            self._loop_bound_index = self._make_loop_bound_index()
+        return self._loop_bound_index
+
+    def set_loop_bound_index(self, index):
+        """ Set loop bounds already found, i.e. by another process, so the C
+            file is not read again.
+
+            Args:
+                index (dic): {loop condition line: iterations}
+        """
+        self._loop_bound_index = index
+
+    def _make_cline_cycle_table(self):
+        """ Returns:
+                C line-cycles table of the C file, see
+                _asm_cycles_from_clines()
+        """
         # make asm instruction-cycle table
         instr_cycle_table = self._make_instr_cycle_table()
 
-        # make C line-asmInstruction table
-        cline_instr_table = self._asm_instr_from_clines(self._cfile)
+        return self._asm_cycles_from_clines(self._cfile, instr_cycle_table)
 
-        self._compute_wcec(self._cfg, instr_cycle_table, cline_instr_table)
-        self._compute_cfg_rwcec(self._cfg)
+    def _run_asm(self):
+        """ Body of the thread started by start_asm(). Errors are kept to be
+            raised by the thread that needs the table.
+        """
+        try:
+            self._asm_result['table'] = self._make_cline_cycle_table()
+        except Exception as e:
+            self._asm_result['error'] = e
+
+    def get_cline_cycle_table(self):
+        """ Wait for the thread started by start_asm(), if any, else make the
+            table right now.
+
+            Returns:
+                C line-cycles table of the C file, see
+                _asm_cycles_from_clines()
+
+            Raises:
+                RuntimeError: if the assembler code could not be made
+        """
+        if self._asm_thread is None:
+            return self._make_cline_cycle_table()
+
+        self._asm_thread.join()
+        self._asm_thread = None
+        result, self._asm_result = self._asm_result, None
+        if 'error' in result:
+            raise result['error']
+        return result['table']
 
     def _make_instr_cycle_table(self, asm_cycle_file=None):
         """ Make a dictionary based on _asm_cycle.txt where each asm
@@ -70,138 +257,319 @@ class CFGWCEC(object):
 
     def _gen_asm_file(self, cfile):
         """ Runs gcc of armv4t architecture to get assembler code with debug
-            information in standard output.
+            information in standard output. Lines are read from the pipe as
+            gcc writes them, so the whole assembler code is never kept in
+            memory.
 
             Args:
                 cfile (string): C file name.
 
             Returns:
-                List where each element is a line from assembler code.
+                Iterator over lines of assembler code.
         """
-        curdir = os.path.dirname(os.path.abspath(__file__))
-        cpp_path = os.path.join(curdir,
-                '../tools/toolschain/4.4.3/bin/arm-none-linux-gnueabi-gcc')
-        cpp_args = ['-march=armv4t', '-g', '-S', '-o', '/dev/stdout']
+        cpp_path = self._get_asm_cc_path()
+        cpp_args = self.ASM_CC_ARGS + ['-o', '/dev/stdout']
         path_list = [cpp_path] + cpp_args + [cfile]
-        text = []
 
         try:
             # Note the use of universal_newlines to treat all newlines
             # as \n for Python's purpose
             #
-            pipe = Popen(   path_list,
-                            stdout=PIPE,
-                            universal_newlines=True)
-            text = pipe.communicate()[0]
-            text = text.split('\n') # make each line a list member
+            with PROCESS_LOCK:
+                pipe = Popen(   path_list,
+                                stdout=PIPE,
+                                universal_newlines=True)
         except OSError as e:
             raise RuntimeError("Unable to produce assembler code.\n" +
                     ('Original error: %s' % e))
 
-        return text
+        try:
+            for line in pipe.stdout:
+                yield line
+        finally:
+            pipe.stdout.close()
+            pipe.wait()
+
+    def _get_asm_cc_path(self):
+        """ Returns:
+                Path of gcc from armv4t architecture (string)
+        """
+        curdir = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(curdir, self.ASM_CC_PATH)
+
+    def _make_asm_cache_key(self, cfile, instr_cycle_table):
+        """ Make the cache key of the assembler table of a C file. The key
+            covers the preprocessed C file, so editing an included header
+            also makes a new key, the compiler, its flags and the cost of each
+            instruction. Compiler version is given by its path, size and
+            modification time, so only the preprocessor needs to run to check
+            if an entry is valid.
 
-    def _asm_instr_from_clines(self, cfile):
-        """ Parse assembler code from a C file.
+            Args:
+                cfile (string): C file name.
+                instr_cycle_table (dic): {instr1: cost_cycle1, ...}
+
+            Returns:
+                Cache key (string) or None if cache is disabled or the C file
+                can not be preprocessed
+        """
+        if self._cache is None: return None
+
+        cc_path = self._get_asm_cc_path()
+        try:
+            text = self._cpp_text
+            if text is None or cfile != self._cfile:
+                with PROCESS_LOCK:
+                    text = preprocess_file(cfile, cpp_path=self.CPP_PATH,
+                                        cpp_args=self.CPP_ARGS)
+            cc_stat = os.stat(cc_path)
+        except (RuntimeError, CalledProcessError, OSError):
+            return None
+
+        costs = sorted(instr_cycle_table.items())
+        return self._cache.make_key(text, self.CPP_PATH, self.CPP_ARGS,
+                os.path.abspath(cc_path), cc_stat.st_size, cc_stat.st_mtime,
+                costs, *self.ASM_CC_ARGS)
+
+    def _asm_cycles_from_clines(self, cfile, instr_cycle_table):
+        """ Get the table of cycles of each C line. If an assembler code file
+            was given, the table is made from it. Else, if cache is enabled and
+            the C file was already compiled with the same compiler and flags,
+            the table is loaded from cache. In both cases the compiler does not
+            run at all.
+
+            Args:
+                cfile (string): C file name.
+                instr_cycle_table (dic): {instr1: cost_cycle1, ...}
+
+            Returns:
+                Dic: {
+                    func_name1: {cline1: cycles1, cline2: cycles2, ...},
+                    func_name2: {cline4: cycles4, ...},
+                    ...
+                }
+        """
+        if self._asm_file is not None:
+            return self._read_asm_file(self._asm_file, instr_cycle_table)
+
+        key = self._make_asm_cache_key(cfile, instr_cycle_table)
+        if key is not None:
+            func_cline_table = self._cache.get('asm', key)
+            if func_cline_table is not None:
+                return func_cline_table
+
+        func_cline_table = self._parse_asm(self._gen_asm_file(cfile),
+                instr_cycle_table)
+        if key is not None and func_cline_table:
+            self._cache.put('asm', key, func_cline_table)
+
+        return func_cline_table
+
+    def _read_asm_file(self, asm_file, instr_cycle_table):
+        """ Make the table of cycles of each C line from an assembler code
+            file. Its format is found by its first line: 'objdump -dl' output
+            starts with the object file format, anything else is taken as gcc
+            '-g -S' output.
+
+            Args:
+                asm_file (string): assembler code file name
+                instr_cycle_table (dic): {instr1: cost_cycle1, ...}
+
+            Returns:
+                Dic: {
+                    func_name1: {cline1: cycles1, cline2: cycles2, ...},
+                    func_name2: {cline4: cycles4, ...},
+                    ...
+                }
+
+            Raises:
+                RuntimeError: if the file can not be read
+        """
+        try:
+            with open(asm_file, 'rU') as f:
+                # look at the first line that is not empty and put it back
+                first_line = ''
+                for line in f:
+                    if line.strip():
+                        first_line = line
+                        break
+                asm_lines = itertools.chain([first_line], f)
+
+                if self.OBJDUMP_HEADER_PATTERN.match(first_line):
+                    return self._parse_objdump(asm_lines, instr_cycle_table)
+                return self._parse_asm(asm_lines, instr_cycle_table)
+        except (IOError, OSError) as e:
+            raise RuntimeError("Unable to read assembler code.\n" +
+                    ('Original error: %s' % e))
+
+    def _parse_asm(self, asm_lines, instr_cycle_table):
+        """ Parse assembler code of a C file and sum up the cycles of each C
+            line while lines are read.
 
             Searches for three patterns: '<function name>:', '.loc' and
             '<spaces> instruction'. The first tells which function we will
             start to get the assembly code. The second tells the line of C code
             the following assembler instructions are related to. The latter is
-            simply the map assembler instructions from C code.
+            an assembler instruction, whose cost is added to the current C
+            line. A line can match only one pattern, so the most frequent one,
+            instructions, is tried first.
 
             Args:
-                cfile (string): C file name.
+                asm_lines (iterator): lines of assembler code
+                instr_cycle_table (dic): {instr1: cost_cycle1, ...}
 
             Returns:
                 Dic: {
-                    func_name1: {cline1: [asm_instr1, asm_instr2, ...], ...},
-                    func_name2: {cline4: [asm_instr1, asm_instr2, ...], ...},
+                    func_name1: {cline1: cycles1, cline2: cycles2, ...},
+                    func_name2: {cline4: cycles4, ...},
                     ...
                 }
+
+            Raises:
+                RuntimeError: if an instruction is not in instr_cycle_table or
+                    there is no '.loc' before it in its function
         """
-        # generate .s file
-        asm_lines = self._gen_asm_file(cfile)
-        if asm_lines == []: return
-
-        # regular expressions for function name, instructions and locs
-        pattern_func_name = r'^(\w+):\s*'
-        pattern_loc = r'^\s*\.loc\b\s+\d+\s+(\d+)\s+'
-        pattern_instr = r'^\s+(\w+)[^\.]*(\.\w+)?.*'
-
-        # states of the automaton
-        INIT = 0
-        FUNC_NAME = 1
-        NEW_LOC = 2
-        ADD_INSTR = 3
-
-        # initial settings
-        state = INIT;
-        curline = 0
-        cline = 0
-        data = None
-        func_name = None
+        match_func_name = self.ASM_FUNC_PATTERN.match
+        match_loc = self.ASM_LOC_PATTERN.match
+        match_instr = self.ASM_INSTR_PATTERN.match
+
+        cline = None
+        cline_cycles = None # C line table of the current function
         func_cline_table = {}
 
-        for line in asm_lines:
-            res = re.search(pattern_func_name, line)
+        for asm_line, line in enumerate(asm_lines, 1):
+            res = match_instr(line)
+            if res: # found assembly instruction
+                try:
+                    cline_cycles[cline] += instr_cycle_table[res.group(1)]
+                except (KeyError, TypeError):
+                    raise self._make_asm_error(res.group(1), asm_line, line,
+                            instr_cycle_table)
+                continue
+
+            res = match_loc(line)
+            if res: # found .loc, the C line
+                cline = int(res.group(1))
+                if cline not in cline_cycles:
+                    cline_cycles[cline] = 0
+                continue
+
+            res = match_func_name(line)
             if res: # found function being parsed
-                func_name = res.group(1)
-                state = FUNC_NAME
-            else:
-                res = re.search(pattern_loc, line)
-                if res: # found .loc, the C line
-                    cline = int(res.group(1))
-                    state = NEW_LOC
-                else:
-                    res = re.search(pattern_instr, line)
-                    if res: # found assembly instruction
-                        data = res.group(1)
-                        state = ADD_INSTR
-                    else:
-                        continue
-
-            if state == FUNC_NAME:
-                if func_name not in func_cline_table:
-                    func_cline_table[func_name] = {}
-
-            # each loc is made of a list of instrs
-            elif state == NEW_LOC:
-                if cline not in func_cline_table[func_name]:
-                    func_cline_table[func_name][cline] = []
-                curline = cline
-
-            elif state == ADD_INSTR:
-                func_cline_table[func_name][cline].append(data)
+                cline_cycles = func_cline_table.setdefault(res.group(1), {})
+                cline = None
 
         return func_cline_table
 
-    def _compute_wcec(self, cfg, instr_cycle_table, cline_instr_table):
-        """ Visit all nodes of each function and set their WCEC.
+    def _parse_objdump(self, asm_lines, instr_cycle_table):
+        """ Parse 'objdump -dl' output of an object file compiled with debug
+            information and sum up the cycles of each C line.
+
+            It works like _parse_asm(), but functions are found by
+            '<address> <function name>:', C lines by '<file>:<line>' and
+            instructions by '<address>: <bytes> instruction'. Instructions
+            without C line, i.e. from code compiled without debug
+            information, are not taken into account.
 
             Args:
-                cfg (CFG): control flow graph
+                asm_lines (iterator): lines of objdump output
+                instr_cycle_table (dic): {instr1: cost_cycle1, ...}
+
+            Returns:
+                Dic: {
+                    func_name1: {cline1: cycles1, cline2: cycles2, ...},
+                    func_name2: {cline4: cycles4, ...},
+                    ...
+                }
+
+            Raises:
+                RuntimeError: if an instruction is not in instr_cycle_table
+        """
+        match_func_name = self.OBJDUMP_FUNC_PATTERN.match
+        match_line = self.OBJDUMP_LINE_PATTERN.match
+        match_instr = self.OBJDUMP_INSTR_PATTERN.match
+
+        cline = None
+        cline_cycles = None # C line table of the current function
+        func_cline_table = {}
+
+        for asm_line, line in enumerate(asm_lines, 1):
+            res = match_instr(line)
+            if res: # found assembly instruction
+                if cline is not None:
+                    try:
+                        cline_cycles[cline] += instr_cycle_table[res.group(1)]
+                    except KeyError:
+                        raise self._make_asm_error(res.group(1), asm_line,
+                                line, instr_cycle_table)
+                continue
+
+            res = match_func_name(line)
+            if res: # found function being parsed
+                cline_cycles = func_cline_table.setdefault(res.group(1), {})
+                cline = None
+                continue
+
+            res = match_line(line)
+            if res and cline_cycles is not None: # found the C line
+                cline = int(res.group(1))
+                if cline not in cline_cycles:
+                    cline_cycles[cline] = 0
+
+        return func_cline_table
 
-                instr_cycle_table (dic): Dictionary keeping the cost in cycles
-                    to execute each assembly instruction, i.e.
-                    {instr1: cost_cycle1, instr2: cost_cycle2, ...}
+    def _make_asm_error(self, instr, asm_line, line, instr_cycle_table):
+        """ Make the error of an assembler instruction whose cost can not be
+            added to a C line.
+
+            Args:
+                instr (string): instruction mnemonic
+                asm_line (int): line number in the assembler code
+                line (string): line of assembler code
+                instr_cycle_table (dic): {instr1: cost_cycle1, ...}
+
+            Returns:
+                RuntimeError
+        """
+        if instr not in instr_cycle_table:
+            reason = "Unknown instruction '%s'" % instr
+        else:
+            reason = "No C line for instruction '%s'" % instr
+        return RuntimeError('%s at assembler line %d: %s' % (reason,
+                asm_line, line.strip()))
 
-                cline_instr_table (dic): Dictionary keeping the list of assembly
-                    instructions that map to each C line of each function, i.e.
-                    cic: {
-                        func_name1: {cline1: [asm_instr1, asm_instr2, ...], ..},
-                        func_name2: {cline4: [asm_instr1, asm_instr2, ...], ..},
+    def _compute_wcec(self, cfg, cline_cycle_table):
+        """ Visit all nodes of each function and set their WCEC. A line cost
+            index is made once per function, so WCEC of each node is a range
+            query over it.
+
+            Args:
+                cfg (CFG): control flow graph
+
+                cline_cycle_table (dic): Dictionary keeping the cost in cycles
+                    to execute the assembly instructions that map to each C
+                    line of each function, i.e.
+                    {
+                        func_name1: {cline1: cycles1, cline2: cycles2, ...},
+                        func_name2: {cline4: cycles4, ...},
                         ...
                     }
         """
+        line_costs = {}
         for entry in cfg.get_entry_nodes():
-            self._compute_wcec_visited(entry.get_func_first_node(), {},
-                    instr_cycle_table, cline_instr_table)
-
-    def _compute_wcec_visited(self, n, visited, instr_cycle_table,
-            cline_instr_table):
-        """ Explore all function graph to set WCEC of each node. Get the cost
-            in cycles to execute each instruction in the range of [start line,
-            end line] of a node, and add to node's WCEC.
+            preorder = entry.get_order().get_preorder()
+            for nid, n in enumerate(preorder):
+                func_name = n.get_func_owner()
+                if func_name not in line_costs:
+                    line_costs[func_name] = CFGLineCosts(
+                            cline_cycle_table.get(func_name, {}))
+                self._compute_node_wcec(n, nid == 0, line_costs[func_name])
+
+    def _compute_node_wcec(self, n, is_first_node, line_costs):
+        """ Set WCEC of a node. Get the cost in cycles to execute each
+            instruction in the range of [start line, end line] of a node, and
+            add to node's WCEC. Nodes must be given in preorder, since each
+            line is taken only by the first node that covers it.
 
             Note I: The first node of each function is the only one that
             includes instructions of lines less than start line, i.e. node
@@ -217,142 +585,191 @@ class CFGWCEC(object):
             Args:
                 n (CFGNode): CFGNode to be visited
 
-                visited (dictionary): Dictionary which keeps all nodes that
-                    were already visited
-
-                instr_cycle_table (dic): Dictionary keeping the cost in cycles
-                    to execute each assembly instruction, i.e.
-                    {instr1: cost_cycle1, instr2: cost_cycle2, ...}
+                is_first_node (boolean): true if n is the function first node
 
-                cline_instr_table (dic): Dictionary keeping the list of assembly
-                    instructions that map to each C line of each function, i.e.
-                    dic: {
-                        func_name1: {cline1: [asm_instr1, asm_instr2, ...], ..},
-                        func_name2: {cline4: [asm_instr1, asm_instr2, ...], ..},
-                        ...
-                    }
+                line_costs (CFGLineCosts): cost in cycles of each C line of
+                    the function n belongs to
         """
-        if not isinstance(n, CFGNode): return
-
-        visited[n] = True
-
         # update loop iterations of each loop condition node
         if n.get_type() == CFGNodeType.WHILE:
             n.set_loop_iters(self._get_loop_iters(n.get_start_line()))
 
-        # visit loop
-        if n.get_type() == CFGNodeType.PSEUDO:
-            self._compute_wcec_visited(n.get_refnode(), visited,
-                    instr_cycle_table, cline_instr_table)
-        else:
-            func_name = n.get_func_owner()
-            if func_name in cline_instr_table:
-                clines = sorted(cline_instr_table[func_name].keys())
-            else:
-                clines = []
-            is_first_node = True if len(visited) == 1 else False
-            wcec = 0
-            for cline in clines:
-                if ((cline >= n.get_start_line() and cline <= n.get_last_line())
-                        or (is_first_node and cline <= n.get_last_line())):
-                    for instr in cline_instr_table[func_name][cline]:
-                        wcec += instr_cycle_table[instr]
-                    del cline_instr_table[func_name][cline]
-
-            # END node should include only the function last line in
-            # assembly code
-            if n.get_type() == CFGNodeType.END and clines != []:
-                cline = -1
-                for instr in cline_instr_table[func_name][clines[cline]]:
-                    wcec += instr_cycle_table[instr]
-                del cline_instr_table[func_name][clines[cline]]
-
-            n.set_wcec(wcec)
+        # PSEUDO node takes WCEC from its loop
+        if n.get_type() == CFGNodeType.PSEUDO: return
 
-        for child in n.get_children():
-            if child not in visited:
-                self._compute_wcec_visited(child, visited, instr_cycle_table,
-                        cline_instr_table)
+        first_line = n.get_start_line()
+        if is_first_node:
+            first_line = None
+        wcec = line_costs.take(first_line, n.get_last_line())
+
+        # END node should include only the function last line in
+        # assembly code
+        if n.get_type() == CFGNodeType.END:
+            wcec += line_costs.take_last()
+
+        n.set_wcec(wcec)
 
     def _get_loop_iters(self, loop_cond_line):
-        """ Get loop condition line from the C file and search for the tag:
-            '// @LOOP <number>'. This tag contains information about the maximum
-            number of loop iterations.
+        """ Get the maximum number of iterations of the loop whose condition is
+            in the given line. C file is read only once, see
+            _make_loop_bound_index().
 
             Args:
                 loop_cond_line (int): loop condition line in C file
 
             Returns:
-                If there is a match to '// @LOOP <number>', return <number>,
-                else return 0
+                If there is a match to '// @LOOP <number>' or a bound given by
+                the user, return <number>, else return 0
+        """
+        return self.get_loop_bound_index().get(loop_cond_line, 0)
+
+    def _make_loop_bound_index(self):
+        """ Read the C file once and search each line for the tag:
+            '// @LOOP <number>'. This tag contains information about the
+            maximum number of loop iterations. Then, add loop bounds given by
+            the user, which replace the tags of the same lines.
+
+            Returns:
+                Dic: {loop condition line: iterations}
         """
-        clines = []
+        index = {}
         with open(self._cfile, 'rU') as f:
-            clines = f.readlines()
+            for cline, text in enumerate(f):
+                res = self.LOOP_PATTERN.search(text)
+                if res:
+                    index[cline + 1] = int(res.group(1))
+
+        loop_bounds = self._loop_bounds
+        if loop_bounds is not None and not isinstance(loop_bounds, dict):
+            loop_bounds = self._read_loop_bounds(loop_bounds)
+        if loop_bounds is not None:
+            for cline, iters in loop_bounds.items():
+                index[int(cline)] = int(iters)
 
-        if clines != [] and loop_cond_line - 1 <= len(clines):
-            pattern = '[^//]*\s*[@LOOP]\s*(\d+)'
-            res = re.search(pattern, clines[loop_cond_line - 1])
-            if res:
-                return int(res.group(1))
+        return index
 
-        return 0
+    def _read_loop_bounds(self, filename):
+        """ Read a loop bounds file. Each line is made of the loop condition
+            line and its maximum number of iterations, i.e. '12 10'. Empty
+            lines and lines starting with '#' are skipped.
+
+            Args:
+                filename (string): loop bounds file name
+
+            Returns:
+                Dic: {loop condition line: iterations}
+
+            Raises:
+                RuntimeError: if a line is not valid
+        """
+        loop_bounds = {}
+        with open(filename, 'rU') as f:
+            for lineno, text in enumerate(f):
+                elems = text.split()
+                if elems == [] or elems[0].startswith('#'): continue
+                try:
+                    cline, iters = elems
+                    loop_bounds[int(cline)] = int(iters)
+                except ValueError:
+                    raise RuntimeError('invalid loop bound in %s:%d'
+                            % (filename, lineno + 1))
+
+        return loop_bounds
 
     def _compute_cfg_rwcec(self, cfg=None):
-        """ Visit all nodes and set their RWCEC by always checking if the
-            current entry node was not already visited, because of a CALL node.
+        """ Visit functions bottom-up in the call graph, so every function is
+            done only once and after all functions it calls. Once a function
+            is done, its RWCEC is kept as its summary and it is set to CALL
+            nodes that call it.
 
             Args:
                 cfg (CFG): control flow graph
+
+            Raises:
+                RuntimeError: if there are recursive functions
         """
         if cfg is None: return
 
-        for entry in cfg.get_entry_nodes():
+        call_graph = CFGCallGraph(cfg)
+        call_graph.check_recursion()
+
+        summaries = {}
+        for scc in call_graph.get_sccs():
+            entry = scc[0]
             first_node = entry.get_func_first_node()
-            if isinstance(first_node, CFGNode) and first_node.get_rwcec() == 0:
-                self._compute_cfg_rwcec_visit(entry.get_func_first_node(),
-                        {}, 1)
-
-    def _compute_cfg_rwcec_visit(self, n, visited, loop_iters):
-        """ Visit node's children to get the greatest RWCEC and pass it to the
-            parent tree. First, check if node is a loop and get loop RWCEC.
-            Then, update all loop nodes according to its RWCEC. After that,
-            check if current node is a CALL, so visit the entry node. So, check
-            if there is a child whose RWCEC plus current node WCEC is greater
-            than the current one, and change it if it is true.
+            if not isinstance(first_node, CFGNode): continue
+            self._compute_func_rwcec(entry, summaries)
+            summaries[entry] = first_node.get_rwcec()
+
+    def _compute_func_rwcec(self, entry, summaries):
+        """ Set RWCEC of all nodes of a function in a single pass over its
+            postorder. Children are always done before their parent and a loop
+            is always done before its PSEUDO node. Functions called by CALL
+            nodes are already done, so their summaries are just set to CALL
+            nodes.
+
+            Each loop is contracted into a summary once its condition node is
+            done, see _make_loop_summary(). A node inside a loop may take its
+            RWCEC from a path back to the loop condition, which is only known
+            after the whole loop is done. So, while the loop is visited, each
+            node keeps its own RWCEC and its longest path back to the loop
+            condition, see _make_loop_path(). Nodes inside loops have their
+            RWCEC set at the end from both, so the whole function takes
+            O(nodes + edges).
 
             Note: nodes outside loop do not have iterations, so just use 1 as
             default to make this code works for nodes outside and inside loops.
 
             Args:
-                n (CFGNode): node to be visit
-                visited (dic): dictionary which keeps all nodes that were
-                    already visited
-                loop_iters (int): maximum number of loop iterations. By
-                    default, it is 1.
-        """
-        visited[n] = True
-
-        # explore loop and compute its RWCEC. Then, update its nodes RWCEC.
-        if (n.get_type() == CFGNodeType.PSEUDO
-                and isinstance(n.get_refnode(), CFGNode)):
-            self._compute_cfg_rwcec_visit(n.get_refnode(), visited,
-                    n.get_loop_iters())
-            self._update_loop_rwcec(n.get_refnode(), {})
-
-        # visit entry node that is called by current node only once. So, if
-        # function rwcec is equal to zero, it was not visited yet.
-        elif (n.get_type() == CFGNodeType.CALL
-                and isinstance(n.get_refnode(), CFGEntryNode)
-                and isinstance(n.get_refnode().get_func_first_node(), CFGNode)
-                and n.get_refnode().get_func_first_node().get_rwcec() == 0):
-            self._compute_cfg_rwcec_visit(
-                    n.get_refnode().get_func_first_node(), visited)
+                entry (CFGEntryNode): function to be visited
+                summaries (dic): {CFGEntryNode: RWCEC} of functions already
+                    done. CALL nodes to other functions keep the RWCEC they
+                    already have, see compute_func_wcec().
+        """
+        order = entry.get_order()
+        loops = order.get_loops()
+        postorder = order.get_postorder()
+        loop_paths = {}
+        loop_summaries = {}
+
+        for n in postorder:
+            loop = loops[n]
+            loop_iters = 1 if loop is None else loop.get_loop_iters()
+
+            # called function is already done
+            if (n.get_type() == CFGNodeType.CALL
+                    and n.get_refnode() in summaries):
+                n.set_refnode_rwcec(summaries[n.get_refnode()])
+
+            self._compute_node_rwcec(n, loop_iters)
+            if loop is None: continue
+
+            loop_paths[n] = self._make_loop_path(n, loop_paths)
+
+            # loop is done, so contract it. Its PSEUDO node needs the loop
+            # RWCEC before nodes inside loop are set.
+            if (n.get_type() == CFGNodeType.WHILE
+                    and loop.get_refnode() is n):
+                loop_summaries[loop] = self._make_loop_summary(n)
+                n.set_rwcec(self._get_loop_node_rwcec(loop_paths[n],
+                        loop_summaries[loop]))
+
+        for n in postorder:
+            loop = loops[n]
+            if loop is not None and loop in loop_summaries:
+                n.set_rwcec(self._get_loop_node_rwcec(loop_paths[n],
+                        loop_summaries[loop]))
+
+    def _compute_node_rwcec(self, n, loop_iters):
+        """ Check if there is a child whose RWCEC plus current node WCEC is
+            greater than the current one, and change it if it is true.
 
+            Args:
+                n (CFGNode): node to be visit
+                loop_iters (int): maximum number of iterations of the loop
+                    node belongs to. Out of loops, it is 1.
+        """
         for child in n.get_children():
-            if child not in visited:
-                self._compute_cfg_rwcec_visit(child, visited, loop_iters)
-
             # since while condition starts loop graph, it does not have RWCEC,
             # so its WCEC is used instead
             if child.get_type() == CFGNodeType.WHILE:
@@ -382,35 +799,159 @@ class CFGWCEC(object):
         if n.get_children() == []:
             n.set_rwcec(n.get_wcec())
 
-    def _update_loop_rwcec(self, n, visited):
-        """ All the times loop RWCEC was right, however the nodes
-            inside it did not reflect properly their RWCEC. So, update all
-            nodes inside loop using its RWCEC.
-
-            First, explore all loop graph until find nodes whose child is the
-            WHILE condition node. Then, starts updating its RWCEC and their
-            parents one according to the loop RWCEC.
+    def _make_loop_path(self, n, loop_paths):
+        """ Make the loop path of a node inside a loop, given the loop paths of
+            its children. Since loop condition starts loop graph, a child which
+            is a WHILE node closes a path back to the loop condition.
 
             Args:
-                n (CFGNode): graph node
-                visited (dic): dictionary which keeps all nodes that were
-                    already visited
+                n (CFGNode): node inside a loop, whose RWCEC is already
+                    computed from its children
+                loop_paths (dic): {CFGNode: loop path} of nodes already done
+
+            Returns:
+                Tuple (RWCEC, longest path), where RWCEC is the greatest RWCEC
+                of n not going back to the loop condition and longest path is
+                the greatest WCEC from n back to the loop condition, or None if
+                there is no path back to it
         """
-        visited[n] = True
+        wcec = n.get_wcec()
+        rwcec = n.get_rwcec()
+        longest_path = None
 
         for child in n.get_children():
-            if child not in visited:
-                self._update_loop_rwcec(child, visited)
-
-            rwcec = 0
-            if (n.get_refnode() != child
-                    and child.get_type() == CFGNodeType.WHILE):
-                loop_max_rwcec = child.get_rwcec()
-                loop_one_run_rwcec = ((loop_max_rwcec - child.get_wcec()) /
-                                child.get_loop_iters())
-                rwcec = loop_max_rwcec - loop_one_run_rwcec + n.get_wcec()
+            if child.get_type() == CFGNodeType.WHILE:
+                path = wcec
             else:
-                rwcec = child.get_rwcec() + n.get_wcec()
+                child_rwcec, child_path = loop_paths[child]
+                if child_rwcec + wcec > rwcec:
+                    rwcec = child_rwcec + wcec
+                if child_path is None: continue
+                path = child_path + wcec
+
+            if longest_path is None or path > longest_path:
+                longest_path = path
+
+        return (rwcec, longest_path)
+
+    def _make_loop_summary(self, loop_cond):
+        """ Loop RWCEC is the RWCEC of its condition node, which covers all
+            iterations. Once the loop is back to its condition, one iteration
+            was done, so the RWCEC left is the loop RWCEC without one run of
+            the loop.
+
+            Args:
+                loop_cond (CFGNode): WHILE node whose RWCEC is computed from
+                    its children
+
+            Returns:
+                RWCEC left after going back to the loop condition (int)
+        """
+        loop_max_rwcec = loop_cond.get_rwcec()
+        loop_one_run_rwcec = ((loop_max_rwcec - loop_cond.get_wcec()) //
+                loop_cond.get_loop_iters())
+        return loop_max_rwcec - loop_one_run_rwcec
+
+    def _get_loop_node_rwcec(self, loop_path, loop_summary):
+        """ Args:
+                loop_path (tuple): (RWCEC, longest path) of a node inside a
+                    loop, see _make_loop_path()
+                loop_summary (int): RWCEC left after going back to the loop
+                    condition, see _make_loop_summary()
+
+            Returns:
+                RWCEC of the node inside the loop (int)
+        """
+        rwcec, longest_path = loop_path
+        if longest_path is not None and loop_summary + longest_path > rwcec:
+            rwcec = loop_summary + longest_path
+        return rwcec
+
+
+class CFGLineCosts(object):
+    """ Cost in cycles of each C line of a function, where each line can be
+        taken only once. Lines are sorted and their cycles are summed up in a
+        prefix array, so the cost of a range of lines is found by bisection
+        in O(log lines) instead of looking at every line.
+
+        Lines already taken are skipped by keeping, for each line, the next
+        line that was not taken yet (a disjoint-set forest). Each line is taken
+        only once, so all queries of a function together take
+        O(nodes log lines + lines).
+
+        Args:
+            cline_cycles (dic): {cline1: cycles1, cline2: cycles2, ...}
+
+        Attributes:
+            _lines (list): sorted C lines
+            _prefix (list): _prefix[i] is the sum of cycles of lines before i
+            _next (list): next line index that was not taken yet
+    """
+    def __init__(self, cline_cycles):
+        self._lines = sorted(cline_cycles.keys())
+        self._prefix = [0]
+        for cline in self._lines:
+            self._prefix.append(self._prefix[-1] + cline_cycles[cline])
+        self._next = list(range(len(self._lines) + 1))
+
+    def take(self, first_line, last_line):
+        """ Take all lines in [first_line, last_line] that were not taken yet.
+
+            Args:
+                first_line (int): first line of the range, None for no limit
+                last_line (int): last line of the range
+
+            Returns:
+                Sum of cycles of lines taken (int)
+        """
+        if first_line is None:
+            lo = 0
+        else:
+            lo = bisect.bisect_left(self._lines, first_line)
+        hi = bisect.bisect_right(self._lines, last_line)
+
+        cycles = 0
+        i = self._find(lo)
+        while i < hi:
+            # sum up a run of lines not taken yet at once
+            j = i
+            while j < hi and self._next[j] == j:
+                self._next[j] = hi
+                j += 1
+            cycles += self._prefix[j] - self._prefix[i]
+            i = self._find(j)
+
+        return cycles
+
+    def take_last(self):
+        """ Take the last line that was not taken yet.
+
+            Returns:
+                Cycles of the line taken or 0 if all lines were taken (int)
+        """
+        i = len(self._lines) - 1
+        while i >= 0 and self._find(i) != i:
+            i -= 1
+        if i < 0: return 0
+
+        self._next[i] = i + 1
+        return self._prefix[i + 1] - self._prefix[i]
+
+    def _find(self, i):
+        """ Find the first line index, from i on, that was not taken yet.
+
+            Args:
+                i (int): line index
+
+            Returns:
+                Line index (int), or the number of lines if all were taken
+        """
+        root = i
+        while self._next[root] != root:
+            root = self._next[root]
+
+        # path compression
+        while self._next[i] != root:
+            self._next[i], i = root, self._next[i]
 
-            if rwcec > n.get_rwcec():
-                n.set_rwcec(rwcec)
+        return root
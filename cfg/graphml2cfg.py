@@ -0,0 +1,179 @@
+import gzip
+
+from xml.etree import ElementTree as ET
+
+from cfg_nodes import CFGNodeType
+from cfg_nodes import CFGEntryNode
+from cfg_nodes import CFGNode
+from cfg_ast_visitor import CFGAstVisitor
+
+
+class Graphml2CFG(object):
+    """ Read a .graphml file written by CFG2Graphml and make again its
+        functions and nodes, with their types, lines, WCEC, RWCEC and loop
+        iterations. So, an archived .graphml can be used without parsing and
+        compiling the C file again.
+
+        Node ids are 'g<function id>n<node id>', where nodes are numbered in
+        preorder, and edges are written in the order they were explored. So,
+        the edges of a node come in the same order as its children. The edge
+        from a PSEUDO node to its loop condition is its first edge, so it
+        becomes its reference node. CALL nodes are linked to the functions
+        they call by name.
+
+        Summary nodes of a hierarchical .graphml and calls between them are
+        skipped, since the nodes they summarize are in their subgraphs. So, a
+        summary .graphml has no nodes to be loaded.
+
+        Note: CFG2Graphml writes data in lower case, so function names are
+        loaded in lower case.
+
+        Attributes:
+            _key_names (dic): {key id: attribute name} of node keys
+    """
+    GRAPHML_NS = '{http://graphml.graphdrawing.org/xmlns}'
+    SUMMARY_TYPES = ('function', 'loop')
+
+    def __init__(self):
+        self._key_names = {}
+
+    def load_graphml(self, filename):
+        """ Read all nodes and edges of a .graphml file. The file is read as a
+            stream and each tag is dropped once it is read. A '.graphmlz' file
+            is read through gzip.
+
+            Args:
+                filename (string): .graphml file name
+
+            Returns:
+                List of CFGEntryNodes in the same order as they were written
+
+            Raises:
+                RuntimeError: if an edge refers to a node that does not exist
+        """
+        if filename.endswith(('.gz', '.graphmlz')):
+            with gzip.open(filename, 'rb') as f:
+                return self._read_graphml(f)
+        return self._read_graphml(filename)
+
+    def _read_graphml(self, source):
+        """ Args:
+                source (string or file): .graphml file name or file object
+
+            Returns:
+                List of CFGEntryNodes in the same order as they were written
+        """
+        self._key_names = {}
+        funcs = {}
+        nodes = {}
+        summaries = set()
+        for event, elem in ET.iterparse(source):
+            tag = elem.tag.replace(self.GRAPHML_NS, '')
+            if tag == 'key':
+                self._key_names[elem.get('id')] = elem.get('attr.name')
+            elif tag == 'node' and self._is_summary(elem):
+                summaries.add(elem.get('id'))
+                elem.clear()
+            elif tag == 'node':
+                n = self._make_node(elem)
+                nodes[elem.get('id')] = n
+                fid, nid = self._split_node_id(elem.get('id'))
+                funcs.setdefault(fid, {})[nid] = n
+                elem.clear()
+            elif tag == 'edge' and elem.get('source') in summaries:
+                elem.clear()
+            elif tag == 'edge':
+                self._add_edge(nodes, elem.get('source'), elem.get('target'))
+                elem.clear()
+
+        entry_nodes = []
+        for fid in sorted(funcs):
+            first_node = funcs[fid][min(funcs[fid])]
+            entry_nodes.append(CFGEntryNode(first_node.get_func_owner(),
+                    first_node))
+
+        return CFGAstVisitor().link_entry_nodes(entry_nodes)
+
+    def _split_node_id(self, node_id):
+        """ Args:
+                node_id (string): 'g<function id>n<node id>'
+
+            Returns:
+                Tuple (function id, node id) as ints
+        """
+        fid, nid = node_id[1:].split('n')
+        return (int(fid), int(nid))
+
+    def _is_summary(self, xml_node):
+        """ Returns:
+                True if xml_node is a function or loop summary node
+        """
+        for xml_data in xml_node.findall(self.GRAPHML_NS + 'data'):
+            if self._key_names.get(xml_data.get('key')) == 'node_type':
+                return xml_data.text in self.SUMMARY_TYPES
+        return False
+
+    def _make_node(self, xml_node):
+        """ Make a node from its data tags. Data tags of graphical
+            information are skipped.
+
+            Args:
+                xml_node (ElementTree.Element): node tag of .graphml
+
+            Returns:
+                CFGNode
+        """
+        data = {}
+        for xml_data in xml_node.findall(self.GRAPHML_NS + 'data'):
+            name = self._key_names.get(xml_data.get('key'))
+            if name is not None:
+                data[name] = xml_data.text
+
+        n = CFGNode(data.get('node_type', 'common').upper())
+        n.set_start_line(int(data.get('start_line', 0)))
+        n.set_last_line(int(data.get('last_line', 0)))
+        n.set_func_owner(self._get_name(data.get('function_owner')))
+        n.set_call_func_name(self._get_name(data.get('call')))
+        n.set_loop_iters(int(data.get('iterations', 0)))
+        n.set_rwcec(int(data.get('rwcec', 0)))
+
+        # WCEC of a CALL node has the RWCEC of the function it calls
+        wcec = int(data.get('wcec', 0))
+        if n.get_type() == CFGNodeType.CALL:
+            n.set_refnode_rwcec(int(data.get('refnode_wcec', 0)))
+            wcec -= n.get_refnode_rwcec()
+        n.set_wcec(wcec)
+
+        return n
+
+    def _get_name(self, name):
+        """ Returns:
+                Function name (string) or None if it was written as 'none'
+        """
+        if name is None or name == 'none':
+            return None
+        return name
+
+    def _add_edge(self, nodes, source, target):
+        """ Add target as a child of source, or as its reference node if
+            source is a PSEUDO node whose loop was not found yet.
+
+            Args:
+                nodes (dic): {node id: CFGNode} of all nodes read so far
+                source (string): node id of the edge source
+                target (string): node id of the edge target
+
+            Raises:
+                RuntimeError: if source or target does not exist
+        """
+        if source not in nodes or target not in nodes:
+            raise RuntimeError('Edge to an unknown node: %s -> %s' %
+                    (source, target))
+
+        n = nodes[source]
+        child = nodes[target]
+        if (n.get_type() == CFGNodeType.PSEUDO and n.get_refnode() is None
+                and child.get_type() == CFGNodeType.WHILE):
+            n.set_refnode(child)
+        else:
+            n.add_child(child)
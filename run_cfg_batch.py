@@ -0,0 +1,33 @@
+import sys
+import argparse
+
+from cfg import cfg_batch
+
+def run_cfg_batch(argv):
+    parser = argparse.ArgumentParser(
+            description='Make the CFG of many C files in parallel.')
+    parser.add_argument('paths', nargs='+',
+            help='C files, directories or glob patterns')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+            help='number of worker processes (default: one per CPU)')
+    parser.add_argument('-o', '--output-dir', default=None,
+            help='directory to write results (default: next to each file)')
+    parser.add_argument('--no-graphml', action='store_true',
+            help='do not write .graphml files')
+    parser.add_argument('--yed', action='store_true',
+            help='add graphical information to .graphml files')
+    parser.add_argument('--dvfs', action='store_true',
+            help='generate DVFS-aware code')
+    parser.add_argument('--cache-dir', default=None,
+            help='directory to cache parsed ASTs and assembler code')
+    args = parser.parse_args(argv)
+
+    batch = cfg_batch.CFGBatch(jobs=args.jobs, output_dir=args.output_dir,
+            graphml=not args.no_graphml, yed_output=args.yed, dvfs=args.dvfs,
+            cache_dir=args.cache_dir)
+    failures = batch.run(args.paths)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run_cfg_batch(sys.argv[1:]))
@@ -10,7 +10,15 @@ suite = unittest.TestLoader().loadTestsFromNames(
         'test_call',
         'test_while',
         'test_general',
-        'test_dvfs_generator'
+        'test_dvfs_generator',
+        'test_cache',
+        'test_asm_file',
+        'test_parallel',
+        'test_graphml',
+        'test_snapshot',
+        'test_export',
+        'test_batch',
+        'test_stress'
     ]
 )
 
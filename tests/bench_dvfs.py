@@ -0,0 +1,70 @@
+import sys, time
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, '..')
+
+from cfg import cfg_ast_visitor, cfg_wcec, cfg_cdvfs_generator
+from pycparser import c_parser
+
+
+# Benchmark DVFS code generation on functions with a growing number of
+# branches. Each if statement has a type-B edge, since its else branch is
+# shorter, so the time per branch should stay about the same as the function
+# grows.
+#
+class SyntheticCFG(object):
+    def __init__(self, entry_nodes):
+        self._entry_nodes = entry_nodes
+
+    def get_entry_nodes(self):
+        return self._entry_nodes
+
+
+def make_source(ifs):
+    lines = ['int main() {', '    int a;', '    a = 0;']
+    for i in range(ifs):
+        lines.append('    if (a < %d) {' % i)
+        lines.append('        a = 1;')
+        lines.append('        a *= 2;')
+        lines.append('    } else {')
+        lines.append('        a = 2;')
+        lines.append('    }')
+    lines.append('    return a;')
+    lines.append('}')
+    return '\n'.join(lines) + '\n', len(lines)
+
+def bench_dvfs(ifs):
+    text, nlines = make_source(ifs)
+    ast = c_parser.CParser().parse(text, 'bench.c')
+    entry_nodes = cfg_ast_visitor.CFGAstVisitor().make_cfg_from_ast(ast)
+    graph = SyntheticCFG(entry_nodes)
+
+    cline_cycle_table = {'main': {}}
+    for cline in range(1, nlines + 1):
+        cline_cycle_table['main'][cline] = 11
+    wcec = cfg_wcec.CFGWCEC('bench.c', graph)
+    wcec._compute_wcec(graph, cline_cycle_table)
+    wcec._compute_cfg_rwcec(graph)
+
+    cdvfs = cfg_cdvfs_generator.CFG_CDVFS()
+    buf = StringIO()
+    start = time.time()
+    plan = cfg_cdvfs_generator.CFGInsertPlan(text.splitlines(True))
+    cdvfs._insert_dvfs_info(graph, plan)
+    plan.write(buf)
+    elapsed = time.time() - start
+
+    return nlines, len(buf.getvalue().splitlines()), elapsed
+
+
+if __name__ == '__main__':
+    print('%10s %10s %10s %10s %16s' % ('branches', 'lines', 'new lines',
+            'seconds', 'us per branch'))
+    for ifs in [1000, 2000, 4000, 8000, 16000]:
+        nlines, new_lines, elapsed = bench_dvfs(ifs)
+        print('%10d %10d %10d %10.3f %16.2f' % (ifs, nlines, new_lines,
+                elapsed, elapsed * 1e6 / ifs))
@@ -0,0 +1,82 @@
+import sys, time
+
+sys.path.insert(0, '..')
+
+from cfg import cfg_ast_visitor, cfg_wcec
+from pycparser import c_parser
+
+
+# Benchmark WCEC computation on functions with a growing number of lines.
+# Every C line has assembler instructions, so the time per node should stay
+# about the same as the function grows. Parsing of the assembler code is
+# measured apart, per assembler line.
+#
+class SyntheticCFG(object):
+    def __init__(self, entry_nodes):
+        self._entry_nodes = entry_nodes
+
+    def get_entry_nodes(self):
+        return self._entry_nodes
+
+
+def make_source(ifs):
+    lines = ['int main() {', '    int a;', '    a = 0;']
+    for i in range(ifs):
+        lines.append('    if (a < %d) {' % i)
+        lines.append('        a = 1;')
+        lines.append('    } else {')
+        lines.append('        a = 2;')
+        lines.append('    }')
+    lines.append('    return a;')
+    lines.append('}')
+    return '\n'.join(lines) + '\n', len(lines)
+
+def bench_wcec(ifs):
+    text, nlines = make_source(ifs)
+    ast = c_parser.CParser().parse(text, 'bench.c')
+    entry_nodes = cfg_ast_visitor.CFGAstVisitor().make_cfg_from_ast(ast)
+    nodes = len(entry_nodes[0].get_order().get_preorder())
+
+    cline_cycle_table = {'main': {}}
+    for cline in range(1, nlines + 1):
+        cline_cycle_table['main'][cline] = 11
+
+    wcec = cfg_wcec.CFGWCEC('bench.c', None)
+    start = time.time()
+    wcec._compute_wcec(SyntheticCFG(entry_nodes), cline_cycle_table)
+    elapsed = time.time() - start
+
+    return nlines, nodes, elapsed
+
+def make_asm(nlines):
+    yield 'main:\n'
+    for cline in range(1, nlines + 1):
+        yield '\t.loc 1 %d 0\n' % cline
+        yield '\tldr\tr3, [fp, #-8]\n'
+        yield '\tadd\tr3, r3, #1\n'
+        yield '\tstr\tr3, [fp, #-8]\n'
+
+def bench_parse_asm(nlines):
+    instr_cycle_table = {'ldr': 5, 'add': 3, 'str': 3}
+
+    wcec = cfg_wcec.CFGWCEC('bench.c', None)
+    start = time.time()
+    wcec._parse_asm(make_asm(nlines), instr_cycle_table)
+    elapsed = time.time() - start
+
+    return nlines * 4 + 1, elapsed
+
+
+if __name__ == '__main__':
+    print('%10s %10s %10s %14s' % ('lines', 'nodes', 'seconds', 'us per node'))
+    for ifs in [1000, 2000, 4000, 8000, 16000]:
+        nlines, nodes, elapsed = bench_wcec(ifs)
+        print('%10d %10d %10.3f %14.2f' % (nlines, nodes, elapsed,
+                elapsed * 1e6 / nodes))
+
+    print('')
+    print('%10s %10s %14s' % ('asm lines', 'seconds', 'us per line'))
+    for nlines in [10000, 100000, 1000000]:
+        asm_lines, elapsed = bench_parse_asm(nlines)
+        print('%10d %10.3f %14.2f' % (asm_lines, elapsed,
+                elapsed * 1e6 / asm_lines))
@@ -0,0 +1,10 @@
+int main() {
+    int a;
+
+    a = 2;
+    if (a < 3) {
+        a = 3;
+    }
+
+    return a;
+}
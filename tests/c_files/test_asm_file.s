@@ -0,0 +1,49 @@
+	.arch armv4t
+	.fpu softvfp
+	.eabi_attribute 20, 1
+	.eabi_attribute 21, 1
+	.eabi_attribute 23, 3
+	.eabi_attribute 24, 1
+	.eabi_attribute 25, 1
+	.eabi_attribute 26, 2
+	.eabi_attribute 30, 6
+	.eabi_attribute 18, 4
+	.file	"test_asm_file.c"
+	.text
+.Ltext0:
+	.align	2
+	.global	main
+	.type	main, %function
+main:
+.LFB0:
+	.file 1 "test_asm_file.c"
+	.loc 1 1 0
+	@ Function supports interworking.
+	@ args = 0, pretend = 0, frame = 8
+	@ frame_needed = 1, uses_anonymous_args = 0
+	@ link register save eliminated.
+	str	fp, [sp, #-4]!
+	add	fp, sp, #0
+	sub	sp, sp, #12
+	.loc 1 4 0
+	mov	r3, #2
+	str	r3, [fp, #-8]
+	.loc 1 5 0
+	ldr	r3, [fp, #-8]
+	cmp	r3, #2
+	bgt	.L2
+	.loc 1 6 0
+	mov	r3, #3
+	str	r3, [fp, #-8]
+.L2:
+	.loc 1 9 0
+	ldr	r3, [fp, #-8]
+	.loc 1 10 0
+	mov	r0, r3
+	add	sp, fp, #0
+	ldmfd	sp!, {fp}
+	bx	lr
+.LFE0:
+	.size	main, .-main
+	.ident	"GCC: (GNU) 4.4.3"
+	.section	.note.GNU-stack,"",%progbits
@@ -0,0 +1,17 @@
+int g(int a) {
+    return a + 1;
+}
+
+int h(int a) {
+    return a * 2;
+}
+
+int f(int n) {
+    return g(f(n - 1));
+}
+
+int main() {
+    int c;
+    c = f(h(2));
+    return c;
+}
@@ -0,0 +1,27 @@
+int even(int n);
+
+int odd(int n) {
+    int r;
+
+    r = 0;
+    if (n > 0) {
+        r = even(n - 1);
+    }
+
+    return r;
+}
+
+int even(int n) {
+    int r;
+
+    r = 1;
+    if (n > 0) {
+        r = odd(n - 1);
+    }
+
+    return r;
+}
+
+int main() {
+    return even(4);
+}
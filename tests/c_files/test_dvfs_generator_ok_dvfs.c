@@ -69,6 +69,10 @@ int main() {
 
 
     /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 96;
+    __cfg_rwcec_bj = 16;
+    __cfg_loop_max_iter = 5;
     __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop19_iter);
 
     return 0;
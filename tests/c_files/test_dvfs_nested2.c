@@ -0,0 +1,25 @@
+int main() {
+    int a, b, c;
+
+    a = 2;
+    b = c = 3;
+
+    while (a < b) { // @LOOP 4
+        a = 3;
+        while (b < c) { // @LOOP 8
+            b++;
+        }
+        c = a + b;
+    }
+
+    c = 0;
+    while (a > c) { // @LOOP 5
+        c++;
+        while (b > c) { // @LOOP 2
+            b--;
+            c += a;
+        }
+    }
+
+    return c;
+}
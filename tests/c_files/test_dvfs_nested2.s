@@ -0,0 +1,75 @@
+	.arch armv4t
+	.file	"test_dvfs_nested2.c"
+	.text
+	.align	2
+	.global	main
+	.type	main, %function
+main:
+	.file 1 "test_dvfs_nested2.c"
+	.loc 1 1 0
+	str	fp, [sp, #-4]!
+	add	fp, sp, #0
+	sub	sp, sp, #12
+	.loc 1 4 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 5 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 7 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L7
+	.loc 1 8 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 9 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L9
+	.loc 1 10 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 12 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 15 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 16 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L16
+	.loc 1 17 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 18 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L18
+	.loc 1 19 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 20 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 24 0
+	ldr	r3, [fp, #-8]
+	mov	r0, r3
+	add	sp, fp, #0
+	ldmfd	sp!, {fp}
+	bx	lr
+	.size	main, .-main
@@ -0,0 +1,113 @@
+
+/*** auto generate DVFS code ***/
+#include "cfg_wcec.h"
+__cfg_edge_type __cfg_type;
+float __cfg_rwcec_bi;
+float __cfg_rwcec_bj;
+int __cfg_loop_max_iter;
+
+int main() {
+    int a, b, c;
+
+    a = 2;
+    b = c = 3;
+
+    /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 100;
+    __cfg_rwcec_bj = 260;
+    __cfg_loop_max_iter = 4;
+    int __cfg_loop7_iter = 0;
+
+
+    while (a < b) { // @LOOP 4
+
+        /*** auto generate DVFS code ***/
+        __cfg_loop7_iter++;
+
+        a = 3;
+
+        /*** auto generate DVFS code ***/
+        __cfg_type = __CFG_TYPE_L;
+        __cfg_rwcec_bi = 29;
+        __cfg_rwcec_bj = 315;
+        __cfg_loop_max_iter = 8;
+        int __cfg_loop9_iter = 0;
+
+        while (b < c) { // @LOOP 8
+
+            /*** auto generate DVFS code ***/
+            __cfg_loop9_iter++;
+
+            b++;
+        }
+
+        /*** auto generate DVFS code ***/
+        __cfg_type = __CFG_TYPE_L;
+        __cfg_rwcec_bi = 29;
+        __cfg_rwcec_bj = 315;
+        __cfg_loop_max_iter = 8;
+        __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop9_iter);
+
+        c = a + b;
+    }
+
+
+    /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 100;
+    __cfg_rwcec_bj = 260;
+    __cfg_loop_max_iter = 4;
+    __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop7_iter);
+
+    c = 0;
+
+    /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 46;
+    __cfg_rwcec_bj = 18;
+    __cfg_loop_max_iter = 5;
+    int __cfg_loop16_iter = 0;
+
+    while (a > c) { // @LOOP 5
+
+        /*** auto generate DVFS code ***/
+        __cfg_loop16_iter++;
+
+        c++;
+
+        /*** auto generate DVFS code ***/
+        __cfg_type = __CFG_TYPE_L;
+        __cfg_rwcec_bi = 46;
+        __cfg_rwcec_bj = 231;
+        __cfg_loop_max_iter = 2;
+        int __cfg_loop18_iter = 0;
+
+        while (b > c) { // @LOOP 2
+
+            /*** auto generate DVFS code ***/
+            __cfg_loop18_iter++;
+
+            b--;
+            c += a;
+        }
+
+        /*** auto generate DVFS code ***/
+        __cfg_type = __CFG_TYPE_L;
+        __cfg_rwcec_bi = 46;
+        __cfg_rwcec_bj = 231;
+        __cfg_loop_max_iter = 2;
+        __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop18_iter);
+
+    }
+
+
+    /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 46;
+    __cfg_rwcec_bj = 18;
+    __cfg_loop_max_iter = 5;
+    __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop16_iter);
+
+    return c;
+}
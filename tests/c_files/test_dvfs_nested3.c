@@ -0,0 +1,20 @@
+int main() {
+    int a, b, c;
+
+    a = 2;
+    b = c = 3;
+
+    while (a < 10) { // @LOOP 3
+        b = 0;
+        while (b < 10) { // @LOOP 4
+            c = 0;
+            while (c < 10) { // @LOOP 6
+                c += a;
+            }
+            b += c;
+        }
+        a++;
+    }
+
+    return a + b;
+}
@@ -0,0 +1,62 @@
+	.arch armv4t
+	.file	"test_dvfs_nested3.c"
+	.text
+	.align	2
+	.global	main
+	.type	main, %function
+main:
+	.file 1 "test_dvfs_nested3.c"
+	.loc 1 1 0
+	str	fp, [sp, #-4]!
+	add	fp, sp, #0
+	sub	sp, sp, #12
+	.loc 1 4 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 5 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 7 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L7
+	.loc 1 8 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 9 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L9
+	.loc 1 10 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 11 0
+	ldr	r2, [fp, #-8]
+	ldr	r3, [fp, #-12]
+	cmp	r2, r3
+	blt	.L11
+	.loc 1 12 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 14 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 16 0
+	ldr	r3, [fp, #-8]
+	add	r3, r3, #1
+	str	r3, [fp, #-8]
+	.loc 1 19 0
+	ldr	r3, [fp, #-8]
+	mov	r0, r3
+	add	sp, fp, #0
+	ldmfd	sp!, {fp}
+	bx	lr
+	.size	main, .-main
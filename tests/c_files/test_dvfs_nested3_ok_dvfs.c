@@ -0,0 +1,88 @@
+
+/*** auto generate DVFS code ***/
+#include "cfg_wcec.h"
+__cfg_edge_type __cfg_type;
+float __cfg_rwcec_bi;
+float __cfg_rwcec_bj;
+int __cfg_loop_max_iter;
+
+int main() {
+    int a, b, c;
+
+    a = 2;
+    b = c = 3;
+
+    /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 158;
+    __cfg_rwcec_bj = 18;
+    __cfg_loop_max_iter = 3;
+    int __cfg_loop7_iter = 0;
+
+
+    while (a < 10) { // @LOOP 3
+
+        /*** auto generate DVFS code ***/
+        __cfg_loop7_iter++;
+
+        b = 0;
+
+        /*** auto generate DVFS code ***/
+        __cfg_type = __CFG_TYPE_L;
+        __cfg_rwcec_bi = 86;
+        __cfg_rwcec_bj = 334;
+        __cfg_loop_max_iter = 4;
+        int __cfg_loop9_iter = 0;
+
+        while (b < 10) { // @LOOP 4
+
+            /*** auto generate DVFS code ***/
+            __cfg_loop9_iter++;
+
+            c = 0;
+
+            /*** auto generate DVFS code ***/
+            __cfg_type = __CFG_TYPE_L;
+            __cfg_rwcec_bi = 29;
+            __cfg_rwcec_bj = 275;
+            __cfg_loop_max_iter = 6;
+            int __cfg_loop11_iter = 0;
+
+            while (c < 10) { // @LOOP 6
+
+                /*** auto generate DVFS code ***/
+                __cfg_loop11_iter++;
+
+                c += a;
+            }
+
+            /*** auto generate DVFS code ***/
+            __cfg_type = __CFG_TYPE_L;
+            __cfg_rwcec_bi = 29;
+            __cfg_rwcec_bj = 275;
+            __cfg_loop_max_iter = 6;
+            __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop11_iter);
+
+            b += c;
+        }
+
+        /*** auto generate DVFS code ***/
+        __cfg_type = __CFG_TYPE_L;
+        __cfg_rwcec_bi = 86;
+        __cfg_rwcec_bj = 334;
+        __cfg_loop_max_iter = 4;
+        __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop9_iter);
+
+        a++;
+    }
+
+
+    /*** auto generate DVFS code ***/
+    __cfg_type = __CFG_TYPE_L;
+    __cfg_rwcec_bi = 158;
+    __cfg_rwcec_bj = 18;
+    __cfg_loop_max_iter = 3;
+    __cfg_change_freq(&__cfg_type, __cfg_rwcec_bi, __cfg_rwcec_bj, __cfg_loop_max_iter, __cfg_loop7_iter);
+
+    return a + b;
+}
@@ -0,0 +1,30 @@
+import sys
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg_wcec
+
+
+# Compiler is replaced by an assembler code where each line of each function
+# has a single instruction. Functions not defined in the C file are ignored
+# by the analysis.
+#
+class LineCFGWCEC(cfg_wcec.CFGWCEC):
+    FUNCS = ['foo', 'bar', 'f', 'g', 'h', 'main']
+
+    def _get_asm_cc_path(self):
+        return sys.executable
+
+    def _gen_asm_file(self, cfile):
+        with open(cfile) as f:
+            last_line = len(f.readlines())
+        for func in self.FUNCS:
+            yield func + ':'
+            for cline in range(1, last_line + 1):
+                yield '\t.loc 1 %d 0' % cline
+                yield '\tldr\tr3, [fp, #-8]'
+
+
+class LineCFG(cfg.CFG):
+    def _make_cfg_wcec(self):
+        return LineCFGWCEC(self._filename, self, self._cache)
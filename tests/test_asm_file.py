@@ -0,0 +1,166 @@
+import sys, os, shutil, tempfile, threading, time
+import unittest
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg_wcec
+
+
+# Test assembler code given by the user instead of running the compiler
+#
+class TestAsmFile(unittest.TestCase):
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def test_asm_file_gcc(self):
+        c_test_file = self._find_file('test_asm_file.c')
+        asm_file = self._find_file('test_asm_file.s')
+
+        wcec = cfg_wcec.CFGWCEC(c_test_file, asm_file=asm_file)
+        table = wcec._asm_cycles_from_clines(c_test_file,
+                wcec._make_instr_cycle_table())
+
+        self.assertEqual(table,
+                {'main': {1: 9, 4: 6, 5: 11, 6: 6, 9: 5, 10: 13}})
+
+    def test_asm_file_objdump(self):
+        c_test_file = self._find_file('test_asm_file.c')
+        asm_file = self._find_file('test_asm_file.objdump')
+
+        wcec = cfg_wcec.CFGWCEC(c_test_file, asm_file=asm_file)
+        table = wcec._asm_cycles_from_clines(c_test_file,
+                wcec._make_instr_cycle_table())
+
+        # objdump shows 'ldmfd sp!, {fp}' as 'pop {fp}'
+        self.assertEqual(table,
+                {'main': {1: 9, 4: 6, 5: 11, 6: 6, 9: 5, 10: 12}})
+
+    def test_asm_file_unknown_instr(self):
+        wcec = cfg_wcec.CFGWCEC()
+        instr_cycle_table = {'mov': 1}
+
+        asm_lines = ['main:', '\t.loc 1 3 0', '\tmov\tr0, #0',
+                '\tandeq\tr0, r0, r0']
+        with self.assertRaises(RuntimeError) as cm:
+            wcec._parse_asm(asm_lines, instr_cycle_table)
+        self.assertIn("'andeq'", str(cm.exception))
+        self.assertIn('line 4: andeq\tr0, r0, r0', str(cm.exception))
+
+        asm_lines = ['00000000 <main>:', '/tmp/main.c:3',
+                '   0:\te3a00000 \tmov\tr0, #0',
+                '   4:\te8bd0800 \tldmia\tsp!, {fp}']
+        with self.assertRaises(RuntimeError) as cm:
+            wcec._parse_objdump(asm_lines, instr_cycle_table)
+        self.assertIn("'ldmia'", str(cm.exception))
+        self.assertIn('line 4: 4:', str(cm.exception))
+
+    def test_asm_file_no_loc(self):
+        wcec = cfg_wcec.CFGWCEC()
+        instr_cycle_table = {'mov': 1, 'bx': 3}
+
+        # instruction before the first .loc of its function
+        asm_lines = ['main:', '\tmov\tr0, #0', '\t.loc 1 3 0', '\tbx\tlr']
+        with self.assertRaises(RuntimeError) as cm:
+            wcec._parse_asm(asm_lines, instr_cycle_table)
+        self.assertIn("No C line for instruction 'mov' at assembler line 2",
+                str(cm.exception))
+
+        # .loc of the previous function does not count
+        asm_lines = ['foo:', '\t.loc 1 3 0', '\tbx\tlr', 'main:',
+                '\tmov\tr0, #0']
+        self.assertRaises(RuntimeError, wcec._parse_asm, asm_lines,
+                instr_cycle_table)
+
+    def test_asm_file_cfg(self):
+        c_test_file = self._find_file('test_asm_file.c')
+        asm_file = self._find_file('test_asm_file.s')
+
+        # the compiler must not run at all
+        cc_path = cfg_wcec.CFGWCEC.ASM_CC_PATH
+        cfg_wcec.CFGWCEC.ASM_CC_PATH = os.path.join('no', 'such', 'gcc')
+        try:
+            graph = cfg.CFG(c_test_file, asm_file=asm_file)
+            graph.make_cfg()
+        finally:
+            cfg_wcec.CFGWCEC.ASM_CC_PATH = cc_path
+
+        preorder = graph.get_entry_nodes()[0].get_order().get_preorder()
+        self.assertEqual([n.get_wcec() for n in preorder], [15, 11, 6, 5, 13])
+        self.assertEqual([n.get_rwcec() for n in preorder],
+                [50, 35, 24, 18, 13])
+
+    def test_asm_file_background(self):
+        c_test_file = self._find_file('test_asm_file.c')
+        asm_file = self._find_file('test_asm_file.s')
+        threads = []
+
+        # compiler is replaced by the assembler code file
+        class FakeCFGWCEC(cfg_wcec.CFGWCEC):
+            def _gen_asm_file(self, cfile):
+                threads.append(threading.current_thread())
+                with open(asm_file) as f:
+                    for line in f:
+                        yield line
+
+        class FakeCFG(cfg.CFG):
+            def _make_cfg_wcec(self):
+                return FakeCFGWCEC(self._filename, self)
+
+        graph = FakeCFG(c_test_file)
+        graph.make_cfg()
+
+        preorder = graph.get_entry_nodes()[0].get_order().get_preorder()
+        self.assertEqual([n.get_wcec() for n in preorder], [15, 11, 6, 5, 13])
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.current_thread())
+
+    def test_asm_file_background_error(self):
+        c_test_file = self._find_file('test_asm_file.c')
+
+        class FakeCFGWCEC(cfg_wcec.CFGWCEC):
+            def _gen_asm_file(self, cfile):
+                raise RuntimeError('Unable to produce assembler code.')
+
+        class FakeCFG(cfg.CFG):
+            def _make_cfg_wcec(self):
+                return FakeCFGWCEC(self._filename, self)
+
+        graph = FakeCFG(c_test_file)
+        self.assertRaises(RuntimeError, graph.make_cfg)
+
+
+    def test_asm_file_background_parse_error(self):
+        tmpdir = tempfile.mkdtemp()
+        c_test_file = os.path.join(tmpdir, 'bad.c')
+        with open(c_test_file, 'w') as f:
+            f.write('int main() { return 0 }\n')
+        runs = []
+
+        # compiler is slower than the parser
+        class FakeCFGWCEC(cfg_wcec.CFGWCEC):
+            def _gen_asm_file(self, cfile):
+                time.sleep(0.2)
+                runs.append(cfile)
+                return []
+
+        class FakeCFG(cfg.CFG):
+            def _make_cfg_wcec(self):
+                return FakeCFGWCEC(self._filename, self)
+
+        try:
+            graph = FakeCFG(c_test_file)
+            self.assertRaises(Exception, graph.make_cfg)
+        finally:
+            shutil.rmtree(tmpdir)
+
+        # background thread was joined before the error was raised
+        self.assertEqual(runs, [c_test_file])
+        self.assertEqual(graph._cfg_wcec, None)
+
+if __name__ == '__main__':
+    unittest.main()
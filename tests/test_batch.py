@@ -0,0 +1,104 @@
+import sys, os, shutil, tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, '..')
+
+from cfg import cfg_batch
+import run_cfg_batch
+
+
+# Test many C files analyzed at once
+#
+class TestBatch(unittest.TestCase):
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmpdir)
+
+    def _add_file(self, name, text=None):
+        """ Write a file under the temporary directory. If no text is given,
+            copy test_if.c.
+        """
+        filename = os.path.join(self._tmpdir, name)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        if text is None:
+            shutil.copy(self._find_file('test_if.c'), filename)
+        else:
+            with open(filename, 'w') as f:
+                f.write(text)
+        return filename
+
+    def test_batch_find_files(self):
+        a = self._add_file(os.path.join('src', 'a', 'task.c'), '')
+        b = self._add_file(os.path.join('src', 'b', 'task.c'), '')
+        self._add_file(os.path.join('src', 'a', 'task_dvfs.c'), '')
+        self._add_file(os.path.join('src', 'a', 'task.h'), '')
+        c = self._add_file(os.path.join('tasks', 'one.c'), '')
+        d = self._add_file(os.path.join('tasks', 'two.c'), '')
+        self._add_file(os.path.join('tasks', 'two.h'), '')
+
+        batch = cfg_batch.CFGBatch(jobs=1)
+        files = batch.find_files([os.path.join(self._tmpdir, 'src'),
+                os.path.join(self._tmpdir, 'tasks', '*.c'), a])
+        self.assertEqual(files, sorted([a, b, c, d]))
+
+    def test_batch_output_dir(self):
+        a = self._add_file(os.path.join('src', 'a', 'task.c'))
+        b = self._add_file(os.path.join('src', 'b', 'task.c'))
+        output_dir = os.path.join(self._tmpdir, 'out')
+
+        batch = cfg_batch.CFGBatch(jobs=1, output_dir=output_dir)
+        failures = batch.run([a, b], log=StringIO())
+
+        self.assertEqual(failures, {})
+        for name in ['a', 'b']:
+            self.assertTrue(os.path.isfile(os.path.join(output_dir, name,
+                    'task.graphml')))
+
+    def test_batch_failure(self):
+        good = self._add_file('good.c')
+        bad = self._add_file('bad.c', 'int main() {\n    return 0\n}\n')
+        last = self._add_file('last.c')
+
+        log = StringIO()
+        batch = cfg_batch.CFGBatch(jobs=2)
+        failures = batch.run([self._tmpdir], log=log)
+
+        self.assertEqual(list(failures), [bad])
+        for cfile in [good, last]:
+            graphml = os.path.splitext(cfile)[0] + '.graphml'
+            self.assertTrue(os.path.isfile(graphml))
+        self.assertTrue(log.getvalue().endswith('3 files, 1 failed\n'))
+
+    def test_batch_exit_status(self):
+        good = self._add_file('good.c')
+        bad = self._add_file('bad.c', 'int main() {\n    return 0\n}\n')
+
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            self.assertEqual(run_cfg_batch.run_cfg_batch(['-j', '1',
+                    '--no-graphml', good]), 0)
+            self.assertEqual(run_cfg_batch.run_cfg_batch(['-j', '1',
+                    '--no-graphml', self._tmpdir]), 1)
+        finally:
+            sys.stderr = stderr
+
+
+if __name__ == '__main__':
+    unittest.main()
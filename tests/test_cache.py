@@ -0,0 +1,264 @@
+import sys, os, re, time, shutil, tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, '..')
+
+import pycparser
+
+from cfg import cfg, cfg_cache, cfg_parallel, cfg_wcec
+from line_cfg import LineCFG, LineCFGWCEC
+
+
+# Compiler is replaced by an assembler code where each line of a function has
+# a single instruction, like LineCFGWCEC, but only lines of the function are
+# given, as gcc does
+#
+class FuncLineCFGWCEC(LineCFGWCEC):
+    FUNC_PATTERN = re.compile(r'int (\w+)\(')
+
+    def _gen_asm_file(self, cfile):
+        with open(cfile) as f:
+            for cline, line in enumerate(f, 1):
+                res = self.FUNC_PATTERN.match(line)
+                if res:
+                    yield res.group(1) + ':'
+                yield '\t.loc 1 %d 0' % cline
+                yield '\tldr\tr3, [fp, #-8]'
+
+
+class FuncLineCFG(cfg.CFG):
+    def _make_cfg_wcec(self):
+        return FuncLineCFGWCEC(self._filename, self, self._cache)
+
+
+# Test on-disk cache
+#
+class TestCache(unittest.TestCase):
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def setUp(self):
+        self._cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._cache_dir)
+
+    def test_cache_get_put(self):
+        cache = cfg_cache.CFGCache(self._cache_dir)
+        key = cache.make_key('int main() {}', '-E')
+
+        self.assertEqual(cache.get('ast', key), None)
+        cache.put('ast', key, {'main': [1, 2, 3]})
+        self.assertEqual(cache.get('ast', key), {'main': [1, 2, 3]})
+        self.assertNotEqual(key, cache.make_key('int main() {}', '-O2'))
+
+    def test_cache_lru_eviction(self):
+        # room for only one entry
+        cache = cfg_cache.CFGCache(self._cache_dir, max_size=1500)
+        old_key = cache.make_key('old')
+        new_key = cache.make_key('new')
+
+        cache.put('ast', old_key, 'x' * 1024)
+        path = cache._entry_path('ast', old_key)
+        os.utime(path, (time.time() - 60, time.time() - 60))
+        cache.put('ast', new_key, 'y' * 1024)
+
+        self.assertEqual(cache.get('ast', old_key), None)
+        self.assertEqual(cache.get('ast', new_key), 'y' * 1024)
+
+    def test_cache_eviction_walks(self):
+        walks = []
+
+        class CountingCache(cfg_cache.CFGCache):
+            def _evict(self):
+                walks.append(self._size)
+                cfg_cache.CFGCache._evict(self)
+
+        # the directory is walked once, then only when the cache is full
+        cache = CountingCache(self._cache_dir, max_size=2500)
+        for i in range(4):
+            cache.put('ast', cache.make_key(i), 'x' * 1024)
+            os.utime(cache._entry_path('ast', cache.make_key(i)),
+                    (time.time() - 60 + i, time.time() - 60 + i))
+        self.assertEqual(len(walks), 3)
+        self.assertEqual(walks[0], None)
+        self.assertEqual(cache.get('ast', cache.make_key(1)), None)
+        self.assertEqual(cache.get('ast', cache.make_key(3)), 'x' * 1024)
+
+    def test_cache_ast(self):
+        c_test_file = self._find_file('test_if.c')
+
+        graph = cfg.CFG(c_test_file, cache_dir=self._cache_dir)
+        ast = graph._parse_file()
+        cached_graph = cfg.CFG(c_test_file, cache_dir=self._cache_dir)
+        cached_ast = cached_graph._parse_file()
+
+        self.assertEqual(len(os.listdir(os.path.join(self._cache_dir, 'ast'))),
+                1)
+        self.assertEqual(len(ast.ext), len(cached_ast.ext))
+        self.assertEqual(ast.ext[-1].decl.name, cached_ast.ext[-1].decl.name)
+
+        # trees of another pycparser version are not taken
+        version = pycparser.__version__
+        pycparser.__version__ = version + '.old'
+        try:
+            cfg.CFG(c_test_file, cache_dir=self._cache_dir)._parse_file()
+        finally:
+            pycparser.__version__ = version
+        self.assertEqual(len(os.listdir(os.path.join(self._cache_dir, 'ast'))),
+                2)
+
+    def test_cache_preprocess_once(self):
+        c_test_file = self._find_file('test_call.c')
+        runs = []
+
+        def count_preprocess(*args, **kwargs):
+            runs.append(args)
+            return preprocess_file(*args, **kwargs)
+
+        # both the AST and the assembler cache keys need the preprocessed file
+        preprocess_file = cfg.preprocess_file
+        cfg.preprocess_file = cfg_wcec.preprocess_file = count_preprocess
+        try:
+            LineCFG(c_test_file, cache_dir=self._cache_dir).make_cfg()
+        finally:
+            cfg.preprocess_file = cfg_wcec.preprocess_file = preprocess_file
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self._cache_dir, 'asm'))),
+                1)
+
+    def test_cache_asm(self):
+        c_test_file = self._find_file('test_if.c')
+        asm_lines = ['main:', '\t.loc 1 3 0', '\tmov\tr0, #0', '\tbx\tlr']
+        runs = []
+
+        # compiler is replaced by a canned assembler code
+        class FakeCFGWCEC(cfg_wcec.CFGWCEC):
+            def _get_asm_cc_path(self):
+                return sys.executable
+            def _gen_asm_file(self, cfile):
+                runs.append(cfile)
+                return asm_lines
+
+        cache = cfg_cache.CFGCache(self._cache_dir)
+        instr_cycle_table = {'mov': 1, 'bx': 3}
+        table = FakeCFGWCEC(c_test_file, None, cache)._asm_cycles_from_clines(
+                c_test_file, instr_cycle_table)
+        cached_table = FakeCFGWCEC(c_test_file, None,
+                cache)._asm_cycles_from_clines(c_test_file, instr_cycle_table)
+
+        self.assertEqual(table, {'main': {3: 4}})
+        self.assertEqual(cached_table, table)
+        self.assertEqual(len(runs), 1)
+
+        # other instruction costs make other cycle totals
+        FakeCFGWCEC(c_test_file, None, cache)._asm_cycles_from_clines(
+                c_test_file, {'mov': 2, 'bx': 3})
+        self.assertEqual(len(runs), 2)
+
+    def test_cache_asm_key_header(self):
+        cdir = tempfile.mkdtemp(dir=self._cache_dir)
+        cfile = os.path.join(cdir, 'main.c')
+        hfile = os.path.join(cdir, 'costs.h')
+        with open(cfile, 'w') as f:
+            f.write('#include "costs.h"\n')
+            f.write('int main() { return COST; }\n')
+        with open(hfile, 'w') as f:
+            f.write('#define COST 1\n')
+
+        cache = cfg_cache.CFGCache(self._cache_dir)
+        instr_cycle_table = {'mov': 1}
+        wcec = LineCFGWCEC(cfile, None, cache)
+        key = wcec._make_asm_cache_key(cfile, instr_cycle_table)
+        self.assertEqual(key, wcec._make_asm_cache_key(cfile,
+                instr_cycle_table))
+
+        # C file is the same, but its header is not
+        with open(hfile, 'w') as f:
+            f.write('#define COST 1000\n')
+        self.assertNotEqual(key, wcec._make_asm_cache_key(cfile,
+                instr_cycle_table))
+
+    def _write_incremental_file(self, cfile, foo_stmt):
+        with open(cfile, 'w') as f:
+            f.write('int foo(int a) {\n')
+            f.write('    a = a + 1;\n')
+            f.write('    %s\n' % foo_stmt)
+            f.write('    return a;\n')
+            f.write('}\n')
+            f.write('int bar(int b) {\n')
+            f.write('    while (b < 3) { // @LOOP 3\n')
+            f.write('        b++;\n')
+            f.write('    }\n')
+            f.write('    return b;\n')
+            f.write('}\n')
+            f.write('int main() {\n')
+            f.write('    int c;\n')
+            f.write('    c = foo(1);\n')
+            f.write('    c = c + bar(c);\n')
+            f.write('    return c;\n')
+            f.write('}\n')
+
+    def _make_incremental(self, cfile, graph_class=LineCFG):
+        graph = graph_class(cfile, cache_dir=self._cache_dir)
+        parallel = cfg_parallel.CFGParallel(1, cache=graph.get_cache())
+        parallel.make_cfg(graph._parse_file(), graph._make_cfg_wcec())
+        return parallel.get_reused()
+
+    def _show(self, graph):
+        buf = StringIO()
+        graph.show(buf=buf, dump=True)
+        for entry in graph.get_entry_nodes():
+            for n in entry.get_order().get_preorder():
+                buf.write('%d %d\n' % (n.get_wcec(), n.get_rwcec()))
+        return buf.getvalue()
+
+    def test_cache_incremental(self):
+        cfile = os.path.join(self._cache_dir, 'incremental.c')
+        self._write_incremental_file(cfile, '')
+
+        self.assertEqual(self._make_incremental(cfile), [])
+        self.assertEqual(self._make_incremental(cfile), ['foo', 'bar',
+                'main'])
+
+        # main is reused, but its RWCEC is computed again
+        self._write_incremental_file(cfile, 'a = a * 2;')
+        self.assertEqual(self._make_incremental(cfile), ['bar', 'main'])
+
+        graph = LineCFG(cfile)
+        graph.make_cfg()
+        incremental_graph = LineCFG(cfile, cache_dir=self._cache_dir)
+        incremental_graph.make_cfg(incremental=True)
+        self.assertEqual(self._show(incremental_graph), self._show(graph))
+
+        self.assertRaises(RuntimeError, LineCFG(cfile).make_cfg,
+                incremental=True)
+
+    def test_cache_incremental_moved(self):
+        cfile = os.path.join(self._cache_dir, 'incremental.c')
+        self._write_incremental_file(cfile, '')
+        self.assertEqual(self._make_incremental(cfile, FuncLineCFG), [])
+
+        # a new line in foo moves bar and main, which are still reused
+        self._write_incremental_file(cfile, 'a = a * 2;\n    a = a - 1;')
+        self.assertEqual(self._make_incremental(cfile, FuncLineCFG),
+                ['bar', 'main'])
+
+        graph = FuncLineCFG(cfile)
+        graph.make_cfg()
+        incremental_graph = FuncLineCFG(cfile, cache_dir=self._cache_dir)
+        incremental_graph.make_cfg(incremental=True)
+        self.assertEqual(self._show(incremental_graph), self._show(graph))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ sys.path.insert(0, '..')
 
 from pycparser import parse_file, c_ast
 
-from cfg import cfg, cfg2graphml
+from cfg import cfg, cfg2graphml, cfg_call_graph
 
 
 # Test if statements
@@ -63,5 +63,82 @@ class TestCall(unittest.TestCase):
         self.assertTrue(test_assert)
         os.remove(result_check)
 
+    def test_call_graphml_compact(self):
+        c_test_file = self._find_file('test_call.c')
+        result_pretty = self._find_file('test_call_pretty_check.graphml')
+        result_check = self._find_file('test_call_compact_check.graphml')
+
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        graph.make_cfg()
+        cfg2graph = cfg2graphml.CFG2Graphml()
+        cfg2graph.make_graphml(graph, result_pretty, True)
+        cfg2graph.make_graphml(graph, result_check, True, pretty=False)
+
+        with open(result_check, 'rU') as check_file,\
+                open(result_pretty, 'rU') as pretty_file:
+            check = check_file.read()
+            pretty = pretty_file.read()
+
+        # same tags, only without indentation
+        self.assertEqual(check, ''.join(line.strip()
+                for line in pretty.splitlines()))
+        os.remove(result_pretty)
+        os.remove(result_check)
+
+    def test_call_graph(self):
+        c_test_file = self._find_file('test_call.c')
+
+        # no assembler code is needed to find calls
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        graph.make_cfg()
+        call_graph = cfg_call_graph.CFGCallGraph(graph)
+        foo, main = graph.get_entry_nodes()
+
+        self.assertEqual(call_graph.get_callees(main), [foo])
+        self.assertEqual(call_graph.get_callees(foo), [])
+        self.assertEqual(call_graph.get_sccs(), [[foo], [main]])
+
+    def test_call_recursive(self):
+        c_test_file = self._find_file('test_call_recursive.c')
+
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        self.assertRaises(RuntimeError, graph.make_cfg)
+
+        call_graph = cfg_call_graph.CFGCallGraph(graph)
+        odd, even, main = graph.get_entry_nodes()
+        sccs = call_graph.get_sccs()
+        self.assertEqual(len(sccs), 2)
+        self.assertEqual(set(sccs[0]), set([odd, even]))
+        self.assertTrue(call_graph.is_recursive(sccs[0]))
+        self.assertEqual(sccs[1], [main])
+        self.assertFalse(call_graph.is_recursive(sccs[1]))
+
+    def test_call_roots(self):
+        c_test_file = self._find_file('test_call.c')
+
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        graph.make_cfg(roots=['foo'])
+        self.assertEqual([entry.get_func_name()
+                for entry in graph.get_entry_nodes()], ['foo'])
+
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        graph.make_cfg(roots=['main'])
+        foo, main = graph.get_entry_nodes()
+        self.assertEqual(cfg_call_graph.CFGCallGraph(graph).get_callees(main),
+                [foo])
+
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        self.assertRaises(RuntimeError, graph.make_cfg, roots=['bar'])
+
+    def test_call_roots_args(self):
+        c_test_file = self._find_file('test_call_args.c')
+
+        # h is only called inside an argument of f, so it has no CALL node
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        graph.make_cfg(roots=['main'])
+        self.assertEqual([entry.get_func_name()
+                for entry in graph.get_entry_nodes()], ['g', 'f', 'main'])
+
+
 if __name__ == '__main__':
     unittest.main()
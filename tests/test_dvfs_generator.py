@@ -42,6 +42,36 @@ class TestDVFSGen(unittest.TestCase):
         self.assertTrue(test_assert)
         os.remove(result_check)
 
+    def _check_nested(self, test_name):
+        """ Assembler code is given, so no compiler is needed
+        """
+        c_test_file = self._find_file(test_name + '.c')
+        asm_file = self._find_file(test_name + '.s')
+        result_ok = self._find_file(test_name + '_ok_dvfs.c')
+        result_check = self._find_file(test_name + '_check.c')
+
+        graph = cfg.CFG(c_test_file, asm_file=asm_file)
+        graph.make_cfg()
+
+        cdvfs = cfg_cdvfs_generator.CFG_CDVFS()
+        cdvfs.gen(graph, result_check)
+
+        # '_dvfs' string is always appending to new file name
+        result_check = self._find_file(test_name + '_check_dvfs.c')
+        with open(result_check, 'rU') as check_file,\
+                open(result_ok, 'rU') as ok_file:
+            check = check_file.read()
+            ok = ok_file.read()
+
+        self.assertEqual(check, ok)
+        os.remove(result_check)
+
+    def test_dvfs_nested2(self):
+        self._check_nested('test_dvfs_nested2')
+
+    def test_dvfs_nested3(self):
+        self._check_nested('test_dvfs_nested3')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,95 @@
+import sys, os, gzip, json, shutil, tempfile
+import unittest
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg_export, cfg2graphml
+
+
+# Test CFG writers other than plain .graphml
+#
+class TestExport(unittest.TestCase):
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp()
+        # CFG is taken from the golden .graphml, so no compiler is needed
+        self._graph = cfg.CFG(self._find_file('test_general_while_call.c'))
+        self._graph.load_graphml(
+                self._find_file('test_general_while_call.graphml'))
+
+    def tearDown(self):
+        shutil.rmtree(self._tmpdir)
+
+    def _count(self):
+        nodes = 0
+        edges = 0
+        for entry in self._graph.get_entry_nodes():
+            nodes += len(entry.get_order().get_preorder())
+            edges += len(entry.get_order().get_edges())
+        return nodes, edges
+
+    def test_export_graphmlz(self):
+        result_ok = self._find_file('test_general_while_call.graphml')
+        result_check = os.path.join(self._tmpdir, 'check.graphmlz')
+
+        exporter = cfg_export.get_exporter(result_check)
+        self.assertTrue(isinstance(exporter, cfg2graphml.CFG2Graphml))
+        exporter.make_graphml(self._graph, result_check, True)
+
+        with gzip.open(result_check, 'rb') as check_file,\
+                open(result_ok, 'rU') as ok_file:
+            self.assertEqual(check_file.read(), ok_file.read())
+
+        graph = cfg.CFG(self._graph.get_cfilename())
+        graph.load_graphml(result_check)
+        self.assertEqual(len(graph.get_entry_nodes()), 2)
+
+    def test_export_jsonl(self):
+        result_check = os.path.join(self._tmpdir, 'check.jsonl')
+        cfg_export.get_exporter(result_check).export(self._graph,
+                result_check)
+
+        with open(result_check) as f:
+            records = [json.loads(line) for line in f]
+
+        kinds = [r['record'] for r in records]
+        nodes, edges = self._count()
+        self.assertEqual(kinds.count('function'), 2)
+        self.assertEqual(kinds.count('node'), nodes)
+        self.assertEqual(kinds.count('edge'), edges)
+
+        first_node = self._graph.get_entry_nodes()[0].get_func_first_node()
+        self.assertEqual(records[0]['name'], 'foo')
+        self.assertEqual(records[1]['id'], 'g1n0')
+        self.assertEqual(records[1]['node_type'], 'common')
+        self.assertEqual(records[1]['wcec'], first_node.get_wcec())
+        self.assertEqual(records[1]['rwcec'], first_node.get_rwcec())
+
+    def test_export_dot(self):
+        result_check = os.path.join(self._tmpdir, 'check.dot')
+        cfg_export.get_exporter(result_check).export(self._graph,
+                result_check)
+
+        with open(result_check) as f:
+            lines = f.read().splitlines()
+
+        nodes, edges = self._count()
+        self.assertEqual(lines[0], 'digraph cfg {')
+        self.assertEqual(lines[-1], '}')
+        self.assertEqual(len([l for l in lines if ' -> ' in l]), edges)
+        self.assertEqual(len([l for l in lines if '[label="' in l
+                and ' -> ' not in l]), nodes)
+
+    def test_export_unknown(self):
+        self.assertRaises(RuntimeError, cfg_export.get_exporter, 'cfg.txt')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -193,5 +193,28 @@ class TestGeneral(unittest.TestCase):
         self.assertTrue(test_assert)
         os.remove(result_check)
 
+    def test_general_all_dump(self):
+        test_name = self.test_general_all.__name__
+
+        c_test_file = self._find_file(test_name + '.c')
+        result_ok = self._find_file(test_name + '.dump')
+        result_check = self._find_file(test_name + '_check.dump')
+
+        graph = cfg.CFG(c_test_file)
+        graph.make_cfg()
+        with open(result_check, 'w') as f:
+            graph.show(buf=f, dump=True)
+
+        test_assert = False
+        with open(result_check, 'rU') as check_file,\
+                open(result_ok, 'rU') as ok_file:
+            check = check_file.read()
+            ok = ok_file.read()
+            test_assert = (check == ok)
+
+        self.assertTrue(test_assert)
+        os.remove(result_check)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,161 @@
+import sys, os
+import unittest
+
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg2graphml, cfg_cdvfs_generator
+
+
+# Test CFG loaded from .graphml files
+#
+class TestGraphml(unittest.TestCase):
+    GRAPHML_NS = '{http://graphml.graphdrawing.org/xmlns}'
+
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def test_graphml_load(self):
+        for test_name in ['test_if', 'test_while', 'test_call',
+                'test_general_all', 'test_general_if_call',
+                'test_general_if_while', 'test_general_while_call']:
+            c_test_file = self._find_file(test_name + '.c')
+            result_ok = self._find_file(test_name + '.graphml')
+            result_check = self._find_file(test_name + '_load_check.graphml')
+
+            # no parsing and no compiling
+            graph = cfg.CFG(c_test_file)
+            graph.load_graphml(result_ok)
+            self.assertEqual(graph.get_ast(), None)
+            cfg2graph = cfg2graphml.CFG2Graphml()
+            cfg2graph.make_graphml(graph, result_check, True)
+
+            with open(result_check, 'rU') as check_file,\
+                    open(result_ok, 'rU') as ok_file:
+                check = check_file.read()
+                ok = ok_file.read()
+
+            self.assertEqual(check, ok, test_name)
+            os.remove(result_check)
+
+    def test_graphml_dvfs(self):
+        test_name = 'test_dvfs_generator'
+
+        c_test_file = self._find_file(test_name + '.c')
+        result_ok = self._find_file(test_name + '_ok_dvfs.c')
+        result_graphml = self._find_file(test_name + '_check.graphml')
+        result_check = self._find_file(test_name + '_check.c')
+
+        graph = cfg.CFG(c_test_file)
+        graph.make_cfg()
+        cfg2graph = cfg2graphml.CFG2Graphml()
+        cfg2graph.make_graphml(graph, result_graphml)
+
+        # DVFS-aware code only from the archived .graphml
+        archived_graph = cfg.CFG(c_test_file)
+        archived_graph.load_graphml(result_graphml)
+        cdvfs = cfg_cdvfs_generator.CFG_CDVFS()
+        cdvfs.gen(archived_graph, result_check)
+
+        # '_dvfs' string is always appending to new file name
+        result_check = self._find_file(test_name + '_check_dvfs.c')
+        with open(result_check, 'rU') as check_file,\
+                open(result_ok, 'rU') as ok_file:
+            check = check_file.read()
+            ok = ok_file.read()
+
+        self.assertEqual(check, ok)
+        os.remove(result_check)
+        os.remove(result_graphml)
+
+    def _get_nodes(self, graph_elem, node_type):
+        """ Returns:
+                List of node tags with the given type in the whole graph
+        """
+        ns = self.GRAPHML_NS
+        return [node for node in graph_elem.iter(ns + 'node')
+                if node.find(ns + 'data').text == node_type]
+
+    def test_graphml_hierarchical(self):
+        test_name = 'test_while'
+        ns = self.GRAPHML_NS
+
+        c_test_file = self._find_file(test_name + '.c')
+        result_ok = self._find_file(test_name + '.graphml')
+        result_check = self._find_file(test_name + '_check.graphml')
+
+        graph = cfg.CFG(c_test_file)
+        graph.load_graphml(result_ok)
+        cfg2graph = cfg2graphml.CFG2Graphml()
+        cfg2graph.make_graphml(graph, result_check, hierarchical=True)
+
+        root = ET.parse(result_check).getroot()
+        funcs = root.find(ns + 'graph').findall(ns + 'node')
+        self.assertEqual([f.get('id') for f in funcs], ['g1'])
+
+        # each loop is a subgraph of its summary node, inner loops inside
+        # outer ones
+        loops = self._get_nodes(root, 'loop')
+        self.assertEqual(len(loops), 7)
+        outer = funcs[0].find(ns + 'graph').findall(ns + 'node')
+        outer_loops = [l for l in outer if l in loops]
+        self.assertEqual(len(outer_loops), 4)
+        first_loop = [n.get('id') for n in
+                outer_loops[0].find(ns + 'graph').findall(ns + 'node')]
+        self.assertEqual(first_loop, ['g1n1', 'g1n2', 'g1n3'])
+        inner_loops = [len(self._get_nodes(l.find(ns + 'graph'), 'loop'))
+                for l in outer_loops]
+        self.assertEqual(inner_loops, [0, 1, 1, 1])
+
+        # summary nodes are skipped when loaded
+        hierarchical_graph = cfg.CFG(c_test_file)
+        hierarchical_graph.load_graphml(result_check)
+        cfg2graph.make_graphml(hierarchical_graph, result_check, True)
+        with open(result_check, 'rU') as check_file,\
+                open(result_ok, 'rU') as ok_file:
+            self.assertEqual(check_file.read(), ok_file.read())
+
+        os.remove(result_check)
+
+    def test_graphml_summary(self):
+        test_name = 'test_general_all'
+        ns = self.GRAPHML_NS
+
+        c_test_file = self._find_file(test_name + '.c')
+        result_ok = self._find_file(test_name + '.graphml')
+        result_check = self._find_file(test_name + '_check.graphml')
+
+        graph = cfg.CFG(c_test_file)
+        graph.load_graphml(result_ok)
+        cfg2graph = cfg2graphml.CFG2Graphml()
+        cfg2graph.make_graphml(graph, result_check, True, summary_only=True)
+
+        self.assertTrue(os.path.getsize(result_check) * 5 <
+                os.path.getsize(result_ok))
+
+        root = ET.parse(result_check).getroot()
+        nodes = list(root.iter(ns + 'node'))
+        funcs = self._get_nodes(root, 'function')
+        self.assertEqual(len(funcs), 2)
+        self.assertEqual(len(funcs) + len(self._get_nodes(root, 'loop')),
+                len(nodes))
+
+        # only the call from main to foo, labeled with foo RWCEC
+        foo, main = graph.get_entry_nodes()
+        edges = list(root.iter(ns + 'edge'))
+        self.assertEqual([(e.get('source'), e.get('target')) for e in edges],
+                [('g2', 'g1')])
+        self.assertEqual(edges[0].find(ns + 'data').text,
+                str(foo.get_func_first_node().get_rwcec()))
+
+        os.remove(result_check)
+
+
+if __name__ == '__main__':
+    unittest.main()
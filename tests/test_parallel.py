@@ -0,0 +1,100 @@
+import sys, os
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg_nodes
+from line_cfg import LineCFG
+
+
+# Test functions analyzed by a pool of processes
+#
+class TestParallel(unittest.TestCase):
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def _show(self, graph):
+        buf = StringIO()
+        graph.show(buf=buf, dump=True)
+        return buf.getvalue()
+
+    def _costs(self, graph):
+        costs = []
+        for entry in graph.get_entry_nodes():
+            for n in entry.get_order().get_preorder():
+                costs.append((n.get_wcec(), n.get_rwcec(), n.get_loop_iters()))
+        return costs
+
+    def test_parallel(self):
+        c_test_file = self._find_file('test_general_all.c')
+
+        graph = LineCFG(c_test_file)
+        graph.make_cfg()
+        parallel_graph = LineCFG(c_test_file)
+        parallel_graph.make_cfg(jobs=2)
+
+        self.assertEqual(self._show(parallel_graph), self._show(graph))
+        self.assertEqual(self._costs(parallel_graph), self._costs(graph))
+
+        # calls refer to the functions of the same graph
+        foo, main = parallel_graph.get_entry_nodes()
+        calls = [n for n in main.get_order().get_preorder()
+                if n.get_type() == cfg_nodes.CFGNodeType.CALL]
+        self.assertNotEqual(calls, [])
+        for n in calls:
+            self.assertTrue(n.get_refnode() is foo)
+
+        # nodes keep elements of the AST of the graph, not copies
+        ast_elems = set()
+        stack = [parallel_graph.get_ast()]
+        while stack:
+            elem = stack.pop()
+            ast_elems.add(id(elem))
+            stack.extend(child for name, child in elem.children())
+        for n in main.get_order().get_preorder():
+            for elem in n.get_ast_elem_list():
+                self.assertTrue(id(elem) in ast_elems)
+
+    def test_parallel_release_ast(self):
+        c_test_file = self._find_file('test_general_all.c')
+
+        graph = LineCFG(c_test_file)
+        graph.make_cfg(release_ast=True)
+        parallel_graph = LineCFG(c_test_file)
+        parallel_graph.make_cfg(release_ast=True, jobs=2)
+
+        self.assertEqual(parallel_graph.get_ast(), None)
+        self.assertEqual(self._show(parallel_graph), self._show(graph))
+        self.assertEqual(self._costs(parallel_graph), self._costs(graph))
+
+    def test_parallel_call_args(self):
+        c_test_file = self._find_file('test_call_args.c')
+
+        # calls inside arguments have no CALL node, so f is not recursive
+        graph = LineCFG(c_test_file)
+        graph.make_cfg()
+        parallel_graph = LineCFG(c_test_file)
+        parallel_graph.make_cfg(jobs=2)
+
+        self.assertEqual(self._show(parallel_graph), self._show(graph))
+        self.assertEqual(self._costs(parallel_graph), self._costs(graph))
+
+    def test_parallel_recursive(self):
+        c_test_file = self._find_file('test_call_recursive.c')
+
+        graph = cfg.CFG(c_test_file, asm_file=os.devnull)
+        self.assertRaises(RuntimeError, graph.make_cfg, jobs=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
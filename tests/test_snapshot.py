@@ -0,0 +1,74 @@
+import sys, os, shutil, tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg_nodes
+from line_cfg import LineCFG
+
+
+# Test binary snapshots of CFG
+#
+class TestSnapshot(unittest.TestCase):
+    def _find_file(self, name):
+        """ Find a c file by name, taking into account the current dir can be
+            in a couple of typical places
+        """
+        testdir = os.path.dirname(__file__)
+        name = os.path.join(testdir, 'c_files', name)
+        return name
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._tmpdir)
+
+    def _show(self, graph):
+        buf = StringIO()
+        graph.show(buf=buf, dump=True)
+        for entry in graph.get_entry_nodes():
+            for n in entry.get_order().get_preorder():
+                buf.write('%d %d %d %d\n' % (n.get_wcec(), n.get_rwcec(),
+                        n.get_loop_iters(), n.get_refnode_rwcec()))
+        return buf.getvalue()
+
+    def test_snapshot(self):
+        c_test_file = self._find_file('test_general_all.c')
+        snapshot = os.path.join(self._tmpdir, 'test_general_all.cfgs')
+
+        graph = LineCFG(c_test_file)
+        graph.make_cfg()
+        graph.save(snapshot)
+
+        loaded_graph = cfg.CFG(c_test_file)
+        foo, main = loaded_graph.load(snapshot)
+        self.assertEqual(loaded_graph.get_ast(), None)
+
+        # nodes are made only when a function is explored
+        self.assertEqual(foo._func_first_node, None)
+        calls = [n for n in main.get_order().get_preorder()
+                if n.get_type() == cfg_nodes.CFGNodeType.CALL]
+        self.assertEqual(foo._func_first_node, None)
+        self.assertTrue(calls[0].get_refnode() is foo)
+
+        self.assertEqual(self._show(loaded_graph), self._show(graph))
+
+    def test_snapshot_invalid(self):
+        c_test_file = self._find_file('test_general_all.c')
+
+        graph = cfg.CFG(c_test_file)
+        self.assertRaises(RuntimeError, graph.load, c_test_file)
+
+        empty_file = os.path.join(self._tmpdir, 'empty.cfgs')
+        open(empty_file, 'w').close()
+        self.assertRaises(RuntimeError, graph.load, empty_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import sys, os, shutil, tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.insert(0, '..')
+
+from cfg import cfg, cfg2graphml, cfg_cdvfs_generator, cfg_nodes, cfg_wcec
+from line_cfg import LineCFG
+
+
+# Compiler is replaced by an assembler code where only the first and last
+# lines of each function have instructions
+#
+class SyntheticCFGWCEC(cfg_wcec.CFGWCEC):
+    def _gen_asm_file(self, cfile):
+        with open(cfile) as f:
+            last_line = len(f.readlines())
+        return ['main:', '\t.loc 1 1 0', '\tstmfd\tsp!, {fp}',
+                '\t.loc 1 %d 0' % last_line, '\tldmfd\tsp!, {fp}', '\tbx\tlr']
+
+
+class SyntheticCFG(cfg.CFG):
+    def _make_cfg_wcec(self):
+        return SyntheticCFGWCEC(self._filename, self)
+
+
+# Test graphs that are deeper than the recursion limit
+#
+class TestStress(unittest.TestCase):
+    IFS = 17000 # each if-else statement makes three nodes
+    LOOPS = 100
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp()
+        self._cfile = os.path.join(self._tmpdir, 'stress.c')
+        with open(self._cfile, 'w') as f:
+            f.write('int main() {\n')
+            f.write('    int a;\n')
+            f.write('    a = 0;\n')
+            f.write('    while (a < 1) { // @LOOP 2\n')
+            for i in range(self.IFS):
+                f.write('        if (a < %d) {\n' % i)
+                f.write('            a = 1;\n')
+                f.write('        } else {\n')
+                f.write('            a = 2;\n')
+                f.write('        }\n')
+            f.write('    }\n')
+            f.write('    return a;\n')
+            f.write('}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self._tmpdir)
+
+    def test_stress(self):
+        graph = SyntheticCFG(self._cfile)
+        graph.make_cfg(release_ast=True)
+        self.assertEqual(graph.get_ast(), None)
+
+        entry = graph.get_entry_nodes()[0]
+        self.assertEqual(entry.get_func_first_node().get_ast_elem_list(), [])
+        self.assertEqual(entry.get_func_first_node().get_start_line(), 2)
+        nodes = len(entry.get_order().get_preorder())
+        self.assertTrue(nodes > 50000)
+        self.assertTrue(sys.getrecursionlimit() < nodes)
+
+        dump = StringIO()
+        graph.show(buf=dump, dump=True)
+        self.assertEqual(len(dump.getvalue().splitlines()), nodes + 1)
+
+        first_node = entry.get_func_first_node()
+        self.assertTrue(first_node.get_rwcec() > first_node.get_wcec())
+
+        try:
+            arrays = graph.to_arrays()
+        except RuntimeError: # NumPy is not installed
+            arrays = None
+        if arrays is not None:
+            self.assertEqual(len(arrays['type']), nodes)
+            self.assertEqual(arrays['child_offsets'][-1],
+                    len(arrays['child_indices']))
+            self.assertEqual(arrays['rwcec'][0], first_node.get_rwcec())
+
+        graphml_file = os.path.join(self._tmpdir, 'stress.graphml')
+        cfg2graphml.CFG2Graphml().make_graphml(graph, graphml_file)
+        self.assertTrue(os.path.getsize(graphml_file) > 0)
+
+        cdvfs = cfg_cdvfs_generator.CFG_CDVFS()
+        cdvfs.gen(graph, self._cfile)
+        self.assertTrue(os.path.exists(os.path.join(self._tmpdir,
+                'stress_dvfs.c')))
+
+    def test_stress_nested_loops(self):
+        nested_file = os.path.join(self._tmpdir, 'nested.c')
+        with open(nested_file, 'w') as f:
+            f.write('int main() {\n')
+            f.write('    int a;\n')
+            f.write('    a = 0;\n')
+            for i in range(self.LOOPS):
+                f.write('    while (a < 1) { // @LOOP 2\n')
+                f.write('        a = 1;\n')
+            f.write('    a = 3;\n')
+            for i in range(self.LOOPS):
+                f.write('    }\n')
+                f.write('    a = 2;\n')
+            f.write('    return a;\n')
+            f.write('}\n')
+
+        graph = LineCFG(nested_file)
+        graph.make_cfg()
+
+        entry = graph.get_entry_nodes()[0]
+        loops = [n for n in entry.get_order().get_preorder()
+                if n.get_type() == cfg_nodes.CFGNodeType.WHILE]
+        self.assertEqual(len(loops), self.LOOPS)
+
+        # each line costs 5 cycles (ldr). Innermost loop is its condition
+        # plus two runs of its two lines body and condition.
+        self.assertEqual(loops[-1].get_rwcec(), 5 + (10 + 5) * 2)
+        self.assertEqual(entry.get_func_first_node().get_rwcec(), 3530)
+
+
+if __name__ == '__main__':
+    unittest.main()
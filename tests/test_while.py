@@ -1,11 +1,11 @@
-import sys, os
+import sys, os, tempfile
 import unittest
 
 sys.path.insert(0, '..')
 
 from pycparser import parse_file, c_ast
 
-from cfg import cfg, cfg2graphml
+from cfg import cfg, cfg2graphml, cfg_wcec
 
 
 # Test if statements
@@ -63,5 +63,25 @@ class TestWhile(unittest.TestCase):
         self.assertTrue(test_assert)
         os.remove(result_check)
 
+    def test_while_loop_bounds(self):
+        c_test_file = self._find_file('test_dvfs_generator.c')
+
+        # '//@LOOP 5' tag in line 19
+        wcec = cfg_wcec.CFGWCEC(c_test_file)
+        self.assertEqual(wcec._get_loop_iters(19), 5)
+        self.assertEqual(wcec._get_loop_iters(20), 0)
+
+        wcec = cfg_wcec.CFGWCEC(c_test_file, loop_bounds={19: 8, 21: 2})
+        self.assertEqual(wcec._get_loop_iters(19), 8)
+        self.assertEqual(wcec._get_loop_iters(21), 2)
+
+        fd, loop_bounds_file = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write('# line iterations\n19 7\n')
+        wcec = cfg_wcec.CFGWCEC(c_test_file, loop_bounds=loop_bounds_file)
+        self.assertEqual(wcec._get_loop_iters(19), 7)
+        os.remove(loop_bounds_file)
+
+
 if __name__ == '__main__':
     unittest.main()